@@ -0,0 +1,470 @@
+# src/path_comment/cache.py
+"""Persistent cache of files already known to carry the right header.
+
+A file found in order is remembered by its relative path and stat
+signature ``(st_mtime_ns, st_size, st_ino)``. Later runs skip reading it
+while the signature is unchanged, so repeated runs over an unchanged tree
+only cost a ``stat()`` per file. Each cache file is tied to a hash of the
+tool version, the effective configuration and the operation, so changing
+any of them starts afresh.
+
+In ``content`` mode a BLAKE2b digest of each file is stored as well. Files
+whose signature changed but whose bytes did not, as on a fresh CI checkout,
+are then recognised after hashing them, and the digests can be moved
+between machines with :func:`export_cache` and :func:`import_cache`.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Set, Tuple
+
+from rich.console import Console
+
+from .__about__ import __version__
+from .config import CacheMode, Config
+
+console = Console()
+
+CACHE_DIR_NAME = ".path-comment-cache"
+
+# Operations with a cache file of their own
+OPERATIONS = ("ensure", "delete")
+
+# Files modified this recently are not trusted by their signature: a later
+# write within the file system's timestamp granularity could leave their
+# mtime unchanged
+_RACY_WINDOW_NS = 2_000_000_000
+
+# Settings that do not affect whether a file is in order
+_UNFINGERPRINTED_SETTINGS = {
+    "durability",
+    "cache_mode",
+    "discovery",
+    "use_gitignore",
+    "walk_threads",
+}
+
+_DIGEST_SIZE = 16
+_HASH_CHUNK = 1 << 20
+
+# Format of exported cache artifacts
+_EXPORT_FORMAT = 1
+
+Signature = Tuple[int, int, int]
+
+
+class CacheError(Exception):
+    """Raised when a cache artifact cannot be exported or imported."""
+
+    pass
+
+
+@dataclass(frozen=True)
+class CacheEntry:
+    """A file's cache key and its current identity.
+
+    Attributes:
+        path: The absolute path of the file.
+        rel_path: The file's POSIX path relative to the project root.
+        signature: ``(st_mtime_ns, st_size, st_ino)`` of the file.
+        digest: Hex digest of the file's bytes, in content mode only.
+    """
+
+    path: Path
+    rel_path: str
+    signature: Signature
+    digest: str | None = None
+
+
+@dataclass
+class _Stored:
+    """What is known about a good file: its signature and/or content digest."""
+
+    signature: Signature | None
+    digest: str | None
+
+
+def file_digest(path: Path) -> str:
+    """Return the BLAKE2b digest of the file at *path*, reading it in chunks."""
+    hasher = hashlib.blake2b(digest_size=_DIGEST_SIZE)
+    with path.open("rb") as f:
+        while chunk := f.read(_HASH_CHUNK):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class ResultCache:
+    """Known-good files of one operation, persisted under the project root.
+
+    The cache is shared by all worker threads of a run. Call :meth:`save`
+    once the run is over; entries of files that no longer exist are
+    dropped then, and entries saved meanwhile by concurrent runs (such as
+    parallel pre-commit hooks) are kept.
+    """
+
+    def __init__(
+        self,
+        project_root: Path,
+        operation: str,
+        key: str,
+        mode: CacheMode = CacheMode.STAT,
+    ) -> None:
+        """Load the cache of *operation*, discarding it unless it was saved under *key*.
+
+        Args:
+            project_root: Root directory that holds the cache directory.
+            operation: Operation type ("ensure" or "delete").
+            key: Hash of everything the cached results depend on.
+            mode: How unchanged files are recognised.
+        """
+        self.project_root = project_root.resolve()
+        self.path = _cache_file(self.project_root, operation)
+        self.key = key
+        self.mode = mode
+        self._entries: Dict[str, _Stored] = {}
+        self._seen: Set[str] = set()
+        # Entries changed since the last drain(); None marks a removal
+        self._changes: Dict[str, _Stored | None] = {}
+        # Every entry this run changed, including in worker processes, for save()
+        self._updates: Dict[str, _Stored | None] = {}
+        self._lock = threading.Lock()
+        self._started_ns = time.time_ns()
+        data = _read_json(self.path)
+        if data is not None and data.get("key") == key:
+            self._entries = _decode_entries(data)
+
+    @classmethod
+    def for_run(
+        cls,
+        project_root: Path,
+        config: Config,
+        operation: str,
+        mode: CacheMode | None = None,
+    ) -> ResultCache:
+        """Create the cache for *operation* under the effective *config*.
+
+        Args:
+            project_root: Root directory that holds the cache directory.
+            config: The effective configuration.
+            operation: Operation type ("ensure" or "delete").
+            mode: How unchanged files are recognised; defaults to the
+                configured ``cache_mode``.
+        """
+        return cls(
+            project_root,
+            operation,
+            cache_key(config, operation),
+            mode or CacheMode(config.cache_mode),
+        )
+
+    def entry_for(self, file_path: Path, resolved: bool = False) -> CacheEntry | None:
+        """Stat (and in content mode hash) *file_path*, or return None if it cannot be cached.
+
+        Relative paths are taken relative to the project root, like the
+        injector does; *resolved* paths are used as they are. A file whose
+        signature is unchanged is not hashed again; its recorded digest is
+        reused, if it has one: entries recorded in stat mode are hashed
+        once, so switching to content mode fills in their digests.
+        """
+        if not file_path.is_absolute():
+            file_path = self.project_root / file_path
+        try:
+            if not resolved:
+                file_path = file_path.resolve()
+            rel_path = file_path.relative_to(self.project_root).as_posix()
+            signature = _signature(file_path)
+            digest = None
+            if self.mode is CacheMode.CONTENT:
+                with self._lock:
+                    stored = self._entries.get(rel_path)
+                if (
+                    stored is not None
+                    and stored.signature == signature
+                    and stored.digest is not None
+                ):
+                    digest = stored.digest
+                else:
+                    digest = file_digest(file_path)
+        except (OSError, ValueError):
+            return None
+        return CacheEntry(file_path, rel_path, signature, digest)
+
+    def is_known_good(self, entry: CacheEntry) -> bool:
+        """Return whether the file was in order when it last had this identity.
+
+        A file recognised by its digest alone has its new signature recorded,
+        so the next run can skip hashing it; a file recognised by its
+        signature has a newly computed digest recorded, so it can be exported.
+        """
+        with self._lock:
+            self._seen.add(entry.rel_path)
+            stored = self._entries.get(entry.rel_path)
+            if stored is None:
+                return False
+            if stored.signature == entry.signature:
+                if stored.digest is None and entry.digest is not None:
+                    stored.digest = entry.digest
+                    self._changes[entry.rel_path] = self._updates[entry.rel_path] = stored
+                return True
+            if entry.digest is None or stored.digest != entry.digest:
+                return False
+            stored.signature = self._trusted(entry.signature)
+            self._changes[entry.rel_path] = self._updates[entry.rel_path] = stored
+            return True
+
+    def record(self, entry: CacheEntry) -> None:
+        """Remember the file of *entry* as being in order.
+
+        Nothing is recorded if the file changed since *entry* was taken, as
+        the result may then describe other contents.
+        """
+        try:
+            unchanged = _signature(entry.path) == entry.signature
+        except OSError:
+            unchanged = False
+        with self._lock:
+            self._seen.add(entry.rel_path)
+            signature = self._trusted(entry.signature)
+            if unchanged and (signature is not None or entry.digest is not None):
+                stored = _Stored(signature, entry.digest)
+                self._entries[entry.rel_path] = stored
+                self._changes[entry.rel_path] = self._updates[entry.rel_path] = stored
+            else:
+                self._entries.pop(entry.rel_path, None)
+                self._changes[entry.rel_path] = self._updates[entry.rel_path] = None
+
+    def forget(self, entry: CacheEntry) -> None:
+        """Drop the file of *entry* from the cache."""
+        with self._lock:
+            self._seen.add(entry.rel_path)
+            self._entries.pop(entry.rel_path, None)
+            self._changes[entry.rel_path] = self._updates[entry.rel_path] = None
+
+    def drain(self) -> Tuple[Dict[str, _Stored | None], Set[str]]:
+        """Hand over the entries changed and the files seen since the last drain.
+
+        Used by worker processes, which work on a copy of the cache, to report
+        to the parent's cache, see :meth:`merge`.
+        """
+        with self._lock:
+            state = (self._changes, self._seen)
+            self._changes, self._seen = {}, set()
+        return state
+
+    def merge(self, changes: Dict[str, _Stored | None], seen: Set[str]) -> None:
+        """Apply the state drained from a worker process's copy of the cache."""
+        with self._lock:
+            self._seen |= seen
+            self._updates.update(changes)
+            for rel_path, stored in changes.items():
+                if stored is None:
+                    self._entries.pop(rel_path, None)
+                else:
+                    self._entries[rel_path] = stored
+
+    def save(self) -> None:
+        """Write the cache back to disk, evicting entries of deleted files.
+
+        The file is read again first, and this run's updates are applied to
+        what it holds now, so runs sharing the cache do not undo each
+        other's updates. Failures only produce a warning; the cache merely
+        saves time.
+        """
+        data = _read_json(self.path)
+        with self._lock:
+            if data is not None and data.get("key") == self.key:
+                entries = _decode_entries(data)
+                for rel_path, stored in self._updates.items():
+                    if stored is None:
+                        entries.pop(rel_path, None)
+                    else:
+                        entries[rel_path] = stored
+            else:
+                entries = dict(self._entries)
+            entries = {
+                rel_path: stored
+                for rel_path, stored in entries.items()
+                if rel_path in self._seen or os.path.lexists(self.project_root / rel_path)
+            }
+        try:
+            _write_cache_file(self.path, self.key, entries)
+        except OSError as e:
+            console.print(f"[yellow]Warning:[/yellow] Failed to save cache {self.path}: {e}")
+
+    def _trusted(self, signature: Signature) -> Signature | None:
+        """Return *signature* unless the file was modified too recently to rely on it."""
+        return signature if signature[0] < self._started_ns - _RACY_WINDOW_NS else None
+
+
+def cache_key(config: Config, operation: str) -> str:
+    """Return the fingerprint of everything the results of *operation* depend on."""
+    settings = {
+        name: value
+        for name, value in config.to_dict().items()
+        if name not in _UNFINGERPRINTED_SETTINGS
+    }
+    fingerprint = {"version": __version__, "config": settings, "operation": operation}
+    return hashlib.sha256(json.dumps(fingerprint, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def export_cache(project_root: Path, destination: Path) -> int:
+    """Write the content digests of the project's caches to one compressed file.
+
+    Signatures are left out as they only hold on this machine, so only
+    files recorded in content mode are exported.
+
+    Args:
+        project_root: Root directory that holds the cache directory.
+        destination: The artifact to write.
+
+    Returns:
+        The number of exported entries.
+
+    Raises:
+        CacheError: If the artifact cannot be written.
+    """
+    caches: Dict[str, Any] = {}
+    count = 0
+    for operation in OPERATIONS:
+        data = _read_json(_cache_file(project_root.resolve(), operation))
+        if data is None or "key" not in data:
+            continue
+        digests = {
+            rel_path: stored.digest
+            for rel_path, stored in _decode_entries(data).items()
+            if stored.digest is not None
+        }
+        caches[operation] = {"key": data["key"], "digests": digests}
+        count += len(digests)
+
+    payload = json.dumps({"format": _EXPORT_FORMAT, "caches": caches}, separators=(",", ":"))
+    try:
+        _write_atomic(destination, gzip.compress(payload.encode("utf-8"), mtime=0))
+    except OSError as e:
+        raise CacheError(f"Failed to export cache to {destination}: {e}") from e
+    return count
+
+
+def import_cache(project_root: Path, source: Path) -> int:
+    """Merge the digests of an exported artifact into the project's caches.
+
+    Local caches saved under a different fingerprint are replaced; imported
+    files are recognised by hashing them on the next run in content mode.
+
+    Args:
+        project_root: Root directory that holds the cache directory.
+        source: An artifact written by :func:`export_cache`.
+
+    Returns:
+        The number of imported entries.
+
+    Raises:
+        CacheError: If the artifact cannot be read or is not a cache export.
+    """
+    try:
+        compressed = source.read_bytes()
+    except OSError as e:
+        raise CacheError(f"Failed to import cache from {source}: {e}") from e
+    try:
+        data = json.loads(gzip.decompress(compressed))
+    except (OSError, EOFError, zlib.error, ValueError) as e:
+        raise CacheError(f"{source} is not a valid cache export: {e}") from e
+
+    try:
+        if data["format"] != _EXPORT_FORMAT:
+            raise CacheError(f"Unsupported cache format {data['format']} in {source}")
+        caches = data["caches"]
+        count = 0
+        for operation in OPERATIONS:
+            if operation not in caches:
+                continue
+            key, digests = caches[operation]["key"], caches[operation]["digests"]
+            path = _cache_file(project_root.resolve(), operation)
+            local = _read_json(path)
+            entries = _decode_entries(local) if local and local.get("key") == key else {}
+            for rel_path, digest in digests.items():
+                stored = entries.get(rel_path)
+                if stored is None or stored.digest != digest:
+                    entries[rel_path] = _Stored(None, str(digest))
+            _write_cache_file(path, key, entries)
+            count += len(digests)
+    except CacheError:
+        raise
+    except OSError as e:
+        raise CacheError(f"Failed to import cache from {source}: {e}") from e
+    except (KeyError, TypeError, AttributeError) as e:
+        raise CacheError(f"{source} is not a valid cache export: {e}") from e
+    return count
+
+
+def _cache_file(project_root: Path, operation: str) -> Path:
+    return project_root / CACHE_DIR_NAME / f"{operation}.json"
+
+
+def _signature(path: Path) -> Signature:
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def _read_json(path: Path) -> Dict[str, Any] | None:
+    """Read a cache file; a missing or corrupt one reads as None."""
+    try:
+        with path.open(encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _decode_entries(data: Dict[str, Any]) -> Dict[str, _Stored]:
+    """Decode the entries of a cache file; malformed ones are dropped."""
+    entries: Dict[str, _Stored] = {}
+    try:
+        items = data["entries"].items()
+    except (KeyError, AttributeError):
+        return entries
+    for rel_path, value in items:
+        try:
+            signature, digest = value
+            stored = _Stored(None, str(digest) if digest else None)
+            if signature:
+                mtime_ns, size, ino = (int(part) for part in signature)
+                stored.signature = (mtime_ns, size, ino)
+        except (ValueError, TypeError):
+            continue
+        entries[rel_path] = stored
+    return entries
+
+
+def _write_cache_file(path: Path, key: str, entries: Dict[str, _Stored]) -> None:
+    """Atomically write *entries* saved under *key* to the cache file *path*."""
+    path.parent.mkdir(exist_ok=True)
+    gitignore = path.parent / ".gitignore"
+    if not gitignore.exists():
+        gitignore.write_text("# Created by path-comment-hook\n*\n", encoding="utf-8")
+
+    encoded = {rel_path: [stored.signature, stored.digest] for rel_path, stored in entries.items()}
+    payload = json.dumps({"key": key, "entries": encoded}, separators=(",", ":"))
+    _write_atomic(path, payload.encode("utf-8"))
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    """Replace *path* with *data* through a temporary file in the same directory."""
+    fd, temp_path = tempfile.mkstemp(suffix=".tmp", prefix=f".{path.name}.", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
@@ -9,22 +9,62 @@ Calling pattern expected by pre-commit:
 
 from __future__ import annotations
 
+import os
+import stat
 import sys
+from contextlib import closing
 from pathlib import Path
-from typing import TYPE_CHECKING, List
+from typing import Callable, Dict, Iterable, List, Tuple, Union, cast
 
 import typer
 from rich.console import Console
+from rich.progress import Progress
 from rich.table import Table
 
 from .__about__ import __version__
-from .config import ConfigError, load_config
-from .processor import print_processing_summary, process_files_parallel
+from .cache import (
+    CACHE_DIR_NAME,
+    CacheError,
+    ResultCache,
+    export_cache,
+    import_cache,
+)
+from .config import (
+    CacheMode,
+    Config,
+    ConfigError,
+    DiscoverySource,
+    Durability,
+    Schedule,
+    load_config,
+)
+from .discovery import (
+    DISCOVERY_QUEUE_SIZE,
+    DiscoveryError,
+    changed_files,
+    discover_file_entries,
+    prefetch,
+    renamed_files,
+    schedule_files,
+    shard_files,
+)
+from .file_handler import SyncPolicy
+from .injector import Result
+from .processor import (
+    AUTO_WORKERS,
+    ExecutorKind,
+    ProcessingResult,
+    SlowestFiles,
+    collect_processing_statistics,
+    print_result_detail,
+    print_slowest_files,
+    print_statistics,
+    process_files_iter,
+    update_processing_statistics,
+)
+from .report import ReportError, RunReport, merge_reports, read_report, write_report
 from .welcome import display_welcome
 
-if TYPE_CHECKING:
-    from .config import Config
-
 # Rich console for better output
 console = Console()
 
@@ -36,6 +76,10 @@ app = typer.Typer(
     no_args_is_help=True,
 )
 
+# Sub-app for managing the result cache
+cache_app = typer.Typer(help="Export or import the result cache.", no_args_is_help=True)
+app.add_typer(cache_app, name="cache")
+
 
 # Constants for Typer parameter defaults to avoid function calls in default
 
@@ -63,10 +107,29 @@ PROJECT_ROOT_OPTION = typer.Option(
     help="Root directory used to compute the relative header path.",
 )
 
+
+def _parse_workers(value: Union[str, None]) -> Union[int, str, None]:
+    """Convert the --workers value to a positive worker count or ``AUTO_WORKERS``."""
+    if value is None or value == AUTO_WORKERS:
+        return value
+    try:
+        count = int(value)
+    except ValueError:
+        count = 0
+    if count < 1:
+        raise typer.BadParameter(f"must be a positive integer or '{AUTO_WORKERS}'")
+    return count
+
+
 WORKERS_OPTION = typer.Option(
     None,
     "--workers",
-    help="Number of worker threads for parallel processing. Defaults to CPU count.",
+    callback=_parse_workers,
+    help=(
+        "Number of worker threads for parallel processing. Defaults to CPU count. "
+        f"'{AUTO_WORKERS}' runs small batches inline and tunes the thread count of "
+        "larger ones to the measured throughput."
+    ),
 )
 
 VERBOSE_OPTION = typer.Option(
@@ -88,16 +151,225 @@ ALL_FILES_OPTION = typer.Option(
     help="Process all supported files under --project-root (recursively)",
 )
 
+DURABILITY_OPTION = typer.Option(
+    None,
+    "--durability",
+    case_sensitive=False,
+    help=(
+        "How rewritten files are flushed to disk: fsync each file, batch one sync "
+        "at the end, or none. Overrides the 'durability' config setting."
+    ),
+)
+
+NO_CACHE_OPTION = typer.Option(
+    False,
+    "--no-cache",
+    help=f"Re-read every file instead of skipping unchanged ones recorded in {CACHE_DIR_NAME}/.",
+)
+
+CACHE_MODE_OPTION = typer.Option(
+    None,
+    "--cache-mode",
+    case_sensitive=False,
+    help=(
+        "Recognise unchanged files by stat signature, or also by content hash so "
+        "the cache survives fresh checkouts. Overrides the 'cache_mode' config setting."
+    ),
+)
+
+EXECUTOR_OPTION = typer.Option(
+    ExecutorKind.THREAD,
+    "--executor",
+    case_sensitive=False,
+    help=(
+        "Process files in worker threads, or in worker processes to scale "
+        "CPU-bound work across cores."
+    ),
+)
+
+FAIL_FAST_OPTION = typer.Option(
+    False,
+    "--fail-fast",
+    help=(
+        "Stop at the first failing file (one that would change in --check mode, "
+        "or that cannot be processed), cancel the remaining work and exit 1."
+    ),
+)
+
+SCHEDULE_OPTION = typer.Option(
+    Schedule.INPUT,
+    "--schedule",
+    case_sensitive=False,
+    help=(
+        "Order in which files are processed: as given, by disk locality (directory, "
+        "then inode) to cut seeks on spinning disks and network storage, or largest first "
+        "to avoid a long file finishing last."
+    ),
+)
+
+
+def _parse_timeout(value: Union[float, None]) -> Union[float, None]:
+    """Check that a --timeout value is a positive number of seconds."""
+    if value is not None and value <= 0:
+        raise typer.BadParameter("must be a positive number of seconds")
+    return value
+
+
+TIMEOUT_OPTION = typer.Option(
+    None,
+    "--timeout",
+    callback=_parse_timeout,
+    metavar="SECONDS",
+    help=(
+        "Abandon any file that takes longer than this and report it as an error, "
+        "so one pathological file (a FIFO, a stalled network mount) cannot stall the run. "
+        "An abandoned file may still be rewritten: the run waits up to 5s for it before "
+        "its final sync; if it is still stuck then, it may be written unsynced, or cut "
+        "off at exit, leaving a .tmp file beside it."
+    ),
+)
+
+SLOWEST_OPTION = typer.Option(
+    0,
+    "--slowest",
+    min=0,
+    metavar="N",
+    help="List the N slowest files and their durations after processing.",
+)
+
+DISCOVERY_OPTION = typer.Option(
+    None,
+    "--discovery",
+    case_sensitive=False,
+    help=(
+        "Where --all finds files: walk the directory tree, list the git index (tracked "
+        "files only, no directory listing), or auto to use git when --project-root "
+        "contains .git. Overrides the 'discovery' config setting."
+    ),
+)
+
+WALK_THREADS_OPTION = typer.Option(
+    None,
+    "--walk-threads",
+    min=1,
+    metavar="N",
+    help=(
+        "Number of directories to list at once when walking the tree, e.g. 8 on network "
+        "filesystems. Overrides the 'walk_threads' config setting."
+    ),
+)
+
+SINCE_OPTION = typer.Option(
+    None,
+    "--since",
+    metavar="REF",
+    help=(
+        "Process only files added, modified or renamed since the merge base of REF "
+        "and HEAD (e.g. origin/main), including uncommitted changes."
+    ),
+)
+
+STAGED_OPTION = typer.Option(
+    False,
+    "--staged",
+    help="Process only files added, modified or renamed in the git index.",
+)
+
+RENAMES_SINCE_OPTION = typer.Option(
+    None,
+    "--since",
+    metavar="REF",
+    help="Sync files renamed since the merge base of REF and HEAD, committed or not.",
+)
+
+RENAMES_STAGED_OPTION = typer.Option(
+    False,
+    "--staged",
+    help="Sync files renamed in the git index.",
+)
+
+SIMILARITY_OPTION = typer.Option(
+    50,
+    "--similarity",
+    min=1,
+    max=100,
+    metavar="PERCENT",
+    help="How similar a deleted and an added file must be for git to see a rename.",
+)
+
+
+def _parse_shard(value: Union[str, None]) -> Union[Tuple[int, int], None]:
+    """Convert an ``INDEX/COUNT`` --shard value to a tuple, validating its range."""
+    if value is None:
+        return None
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise typer.BadParameter("must look like INDEX/COUNT, e.g. 1/4") from None
+    if not 1 <= index <= count:
+        raise typer.BadParameter("INDEX must be between 1 and COUNT")
+    return index, count
+
+
+SHARD_OPTION = typer.Option(
+    None,
+    "--shard",
+    callback=_parse_shard,
+    metavar="INDEX/COUNT",
+    help=(
+        "Process only shard INDEX of COUNT (1-based). Files are split by a stable hash "
+        "of their relative path, so parallel CI nodes cover every file exactly once."
+    ),
+)
+
+SHARD_BALANCE_OPTION = typer.Option(
+    False,
+    "--shard-balance",
+    help="Split --shard by file size, largest first, for evenly sized shards.",
+)
+
+REPORT_OPTION = typer.Option(
+    None,
+    "--report",
+    help="Write the statistics and the files that were not OK to this JSON file.",
+)
+
+CACHE_FILE_ARGUMENT = typer.Argument(..., help="Cache artifact file.")
+
+REPORTS_ARGUMENT = typer.Argument(..., help="Reports written by run or delete with --report.")
+
+MERGED_REPORT_OPTION = typer.Option(
+    None,
+    "--output",
+    "-o",
+    help="Also write the merged report to this file.",
+)
+
 
 @app.command()
 def run(
     files: List[str] = FILES_ARGUMENT,
     check: bool = CHECK_OPTION,
     project_root: Path = PROJECT_ROOT_OPTION,
-    workers: int = WORKERS_OPTION,
+    workers: str = WORKERS_OPTION,
     verbose: bool = VERBOSE_OPTION,
     show_progress: bool = PROGRESS_OPTION,
     all_files: bool = ALL_FILES_OPTION,
+    durability: Durability = DURABILITY_OPTION,
+    no_cache: bool = NO_CACHE_OPTION,
+    cache_mode: CacheMode = CACHE_MODE_OPTION,
+    executor: ExecutorKind = EXECUTOR_OPTION,
+    fail_fast: bool = FAIL_FAST_OPTION,
+    schedule: Schedule = SCHEDULE_OPTION,
+    shard: str = SHARD_OPTION,
+    shard_balance: bool = SHARD_BALANCE_OPTION,
+    report: Path = REPORT_OPTION,
+    timeout: float = TIMEOUT_OPTION,
+    slowest: int = SLOWEST_OPTION,
+    discovery: DiscoverySource = DISCOVERY_OPTION,
+    walk_threads: int = WALK_THREADS_OPTION,
+    since: str = SINCE_OPTION,
+    staged: bool = STAGED_OPTION,
 ) -> None:
     """Process files and ensure they have the correct header."""
     # Set project_root to current working directory if not explicitly provided
@@ -107,77 +379,88 @@ def run(
     # Resolve project_root to handle symlinks (e.g., /var -> /private/var on macOS)
     project_root = project_root.resolve()
 
-    # If --all specified or no files provided, discover files automatically
-    if all_files or not files:
-        try:
-            cfg = load_config(project_root)
-        except ConfigError as e:
-            console.print(f"[bold red]Configuration Error:[/bold red] {e}")
-            raise typer.Exit(code=1) from e
-
-        file_paths = _discover_files(project_root, cfg)
+    try:
+        cfg = load_config(project_root)
+    except ConfigError as e:
+        console.print(f"[bold red]Configuration Error:[/bold red] {e}")
+        raise typer.Exit(code=1) from e
 
-        if not file_paths:
-            console.print("[yellow]No eligible files found to process.[/yellow]")
-            raise typer.Exit(code=0)
-    else:
-        # Convert string file arguments to Path objects
-        file_paths = []
-        for file_str in files:
-            file_path = Path(file_str)
-            # Convert relative paths to absolute paths based on current working directory
-            if not file_path.is_absolute():
-                file_path = Path.cwd() / file_path
-            # Resolve to handle symlinks (e.g., /var -> /private/var on macOS)
-            file_path = file_path.resolve()
-            file_paths.append(file_path)
-
-    # Validate provided/discovered files
-    for file_path in file_paths:
-        if not file_path.exists():
-            console.print(f"[bold red]Error:[/bold red] File '{file_path}' does not exist.")
-            raise typer.Exit(code=1)
-        if not file_path.is_file():
-            console.print(f"[bold red]Error:[/bold red] '{file_path}' is not a file.")
-            raise typer.Exit(code=1)
+    # If --all specified or no files provided, discover files automatically;
+    # the walk runs in the background while discovered files are processed
+    discovered = all_files or not files
+    shard_range = cast(Union[Tuple[int, int], None], shard)  # converted by _parse_shard
+    file_paths, total = _select_files(
+        None if discovered else files,
+        project_root,
+        cfg,
+        schedule,
+        shard_range,
+        shard_balance,
+        discovery,
+        walk_threads,
+        since=since,
+        staged=staged,
+        all_files=all_files,
+    )
 
     mode = "check" if check else "fix"
+    sync = SyncPolicy(durability or Durability(cfg.durability))
 
-    # Process files in parallel
-    results = process_files_parallel(
+    # Process files in parallel, reporting each file as it completes
+    results = process_files_iter(
         files=file_paths,
         project_root=project_root,
         mode=mode,
         workers=workers,
-        show_progress=show_progress,
+        sync=sync,
+        cache=None if no_cache else ResultCache.for_run(project_root, cfg, "ensure", cache_mode),
+        executor=executor,
+        # With --fail-fast, report the first failure to finish, not the first in order
+        ordered=not fail_fast,
+        timeout=timeout,
+        # Discovered and file argument paths alike are resolved regular files
+        resolved_paths=True,
     )
+    run_report = RunReport(mode, "ensure", shard_range, {})
+    slowest_files = SlowestFiles(slowest)
+    with closing(results):
+        stats, failure = _report_results(
+            results,
+            Result.CHANGED,
+            "Would update" if check else "Updated",
+            verbose=verbose,
+            per_file=not all_files,
+            show_progress=show_progress,
+            total=total,
+            fail_fast=fail_fast,
+            check=check,
+            record=None if report is None else lambda r: run_report.add(r, project_root),
+            slowest=slowest_files,
+        )
+    if report is not None:
+        run_report.stats = stats
+        _write_run_report(run_report, report)
+    if failure is not None:
+        console.print("[red]Stopped at the first failing file (--fail-fast).[/red]")
+        raise typer.Exit(code=1)
+    if discovered and not stats["total"]:
+        console.print("[yellow]No eligible files found to process.[/yellow]")
+        raise typer.Exit(code=0)
 
     # Print summary if verbose or if there were changes/errors
-    has_changes = any(r.result.name == "CHANGED" for r in results)
-    has_errors = any(r.error is not None for r in results)
+    has_changes = stats["changed"] > 0
+    has_errors = stats["errors"] > 0
 
     if verbose or has_errors:
-        print_processing_summary(results, mode, show_details=verbose)
-    elif has_changes and not check:
-        if all_files:
-            # Show concise summary for bulk operations
-            changed_count = sum(1 for r in results if r.result.name == "CHANGED")
-            console.print(f"Successfully updated {changed_count} files.")
-        else:
-            # Show individual files for specific file operations
-            for result in results:
-                if result.result.name == "CHANGED":
-                    console.print(f"Updated {result.file_path}")
-    elif has_changes and check:
-        if all_files:
-            # Show concise summary for bulk check operations
-            changed_count = sum(1 for r in results if r.result.name == "CHANGED")
-            console.print(f"Would update {changed_count} files.")
+        print_statistics(stats, mode, sync_seconds=_sync_seconds(sync, stats, check))
+        console.print()
+    elif has_changes and all_files:
+        # Show concise summary for bulk operations
+        if check:
+            console.print(f"Would update {stats['changed']} files.")
         else:
-            # Show individual files for specific file check operations
-            for result in results:
-                if result.result.name == "CHANGED":
-                    console.print(f"Would update {result.file_path}")
+            console.print(f"Successfully updated {stats['changed']} files.")
+    print_slowest_files(slowest_files.results())
 
     # Exit with error code if in check mode and there were changes or errors
     if check and (has_changes or has_errors):
@@ -214,6 +497,7 @@ def show_config(
         # Add configuration rows
         table.add_row("exclude_globs", str(config_dict["exclude_globs"]))
         table.add_row("use_default_ignores", str(config_dict["use_default_ignores"]))
+        table.add_row("use_gitignore", str(config_dict["use_gitignore"]))
         table.add_row(
             "default_ignore_patterns",
             f"{len(config_dict['default_ignore_patterns'])} patterns"
@@ -227,6 +511,10 @@ def show_config(
             else "[dim]None[/dim]",
         )
         table.add_row("default_mode", config_dict["default_mode"])
+        table.add_row("durability", config_dict["durability"])
+        table.add_row("cache_mode", config_dict["cache_mode"])
+        table.add_row("discovery", config_dict["discovery"])
+        table.add_row("walk_threads", str(config_dict["walk_threads"]))
 
         console.print(table)
         console.print()
@@ -244,10 +532,25 @@ def delete(
     files: List[str] = FILES_ARGUMENT,
     check: bool = CHECK_OPTION,
     project_root: Path = PROJECT_ROOT_OPTION,
-    workers: int = WORKERS_OPTION,
+    workers: str = WORKERS_OPTION,
     verbose: bool = VERBOSE_OPTION,
     show_progress: bool = PROGRESS_OPTION,
     all_files: bool = ALL_FILES_OPTION,
+    durability: Durability = DURABILITY_OPTION,
+    no_cache: bool = NO_CACHE_OPTION,
+    cache_mode: CacheMode = CACHE_MODE_OPTION,
+    executor: ExecutorKind = EXECUTOR_OPTION,
+    fail_fast: bool = FAIL_FAST_OPTION,
+    schedule: Schedule = SCHEDULE_OPTION,
+    shard: str = SHARD_OPTION,
+    shard_balance: bool = SHARD_BALANCE_OPTION,
+    report: Path = REPORT_OPTION,
+    timeout: float = TIMEOUT_OPTION,
+    slowest: int = SLOWEST_OPTION,
+    discovery: DiscoverySource = DISCOVERY_OPTION,
+    walk_threads: int = WALK_THREADS_OPTION,
+    since: str = SINCE_OPTION,
+    staged: bool = STAGED_OPTION,
 ) -> None:
     """Remove path comment headers from files."""
     # Set project_root to current working directory if not explicitly provided
@@ -257,78 +560,89 @@ def delete(
     # Resolve project_root to handle symlinks (e.g., /var -> /private/var on macOS)
     project_root = project_root.resolve()
 
-    # If --all specified or no files provided, discover files automatically
-    if all_files or not files:
-        try:
-            cfg = load_config(project_root)
-        except ConfigError as e:
-            console.print(f"[bold red]Configuration Error:[/bold red] {e}")
-            raise typer.Exit(code=1) from e
-
-        file_paths = _discover_files(project_root, cfg)
+    try:
+        cfg = load_config(project_root)
+    except ConfigError as e:
+        console.print(f"[bold red]Configuration Error:[/bold red] {e}")
+        raise typer.Exit(code=1) from e
 
-        if not file_paths:
-            console.print("[yellow]No eligible files found to process.[/yellow]")
-            raise typer.Exit(code=0)
-    else:
-        # Convert string file arguments to Path objects
-        file_paths = []
-        for file_str in files:
-            file_path = Path(file_str)
-            # Convert relative paths to absolute paths based on current working directory
-            if not file_path.is_absolute():
-                file_path = Path.cwd() / file_path
-            # Resolve to handle symlinks (e.g., /var -> /private/var on macOS)
-            file_path = file_path.resolve()
-            file_paths.append(file_path)
-
-    # Validate provided/discovered files
-    for file_path in file_paths:
-        if not file_path.exists():
-            console.print(f"[bold red]Error:[/bold red] File '{file_path}' does not exist.")
-            raise typer.Exit(code=1)
-        if not file_path.is_file():
-            console.print(f"[bold red]Error:[/bold red] '{file_path}' is not a file.")
-            raise typer.Exit(code=1)
+    # If --all specified or no files provided, discover files automatically;
+    # the walk runs in the background while discovered files are processed
+    discovered = all_files or not files
+    shard_range = cast(Union[Tuple[int, int], None], shard)  # converted by _parse_shard
+    file_paths, total = _select_files(
+        None if discovered else files,
+        project_root,
+        cfg,
+        schedule,
+        shard_range,
+        shard_balance,
+        discovery,
+        walk_threads,
+        since=since,
+        staged=staged,
+        all_files=all_files,
+    )
 
     mode = "check" if check else "fix"
+    sync = SyncPolicy(durability or Durability(cfg.durability))
 
     # Process files in parallel with delete operation
-    results = process_files_parallel(
+    results = process_files_iter(
         files=file_paths,
         project_root=project_root,
         mode=mode,
         workers=workers,
-        show_progress=show_progress,
         operation="delete",
+        sync=sync,
+        cache=None if no_cache else ResultCache.for_run(project_root, cfg, "delete", cache_mode),
+        executor=executor,
+        # With --fail-fast, report the first failure to finish, not the first in order
+        ordered=not fail_fast,
+        timeout=timeout,
+        # Discovered and file argument paths alike are resolved regular files
+        resolved_paths=True,
     )
+    run_report = RunReport(mode, "delete", shard_range, {})
+    slowest_files = SlowestFiles(slowest)
+    with closing(results):
+        stats, failure = _report_results(
+            results,
+            Result.REMOVED,
+            "Would remove header from" if check else "Removed header from",
+            verbose=verbose,
+            per_file=not all_files,
+            show_progress=show_progress,
+            total=total,
+            fail_fast=fail_fast,
+            check=check,
+            record=None if report is None else lambda r: run_report.add(r, project_root),
+            slowest=slowest_files,
+        )
+    if report is not None:
+        run_report.stats = stats
+        _write_run_report(run_report, report)
+    if failure is not None:
+        console.print("[red]Stopped at the first failing file (--fail-fast).[/red]")
+        raise typer.Exit(code=1)
+    if discovered and not stats["total"]:
+        console.print("[yellow]No eligible files found to process.[/yellow]")
+        raise typer.Exit(code=0)
 
     # Print summary if verbose or if there were changes/errors
-    has_removals = any(r.result.name == "REMOVED" for r in results)
-    has_errors = any(r.error is not None for r in results)
+    has_removals = stats["removed"] > 0
+    has_errors = stats["errors"] > 0
 
     if verbose or has_errors:
-        print_processing_summary(results, mode, show_details=verbose)
-    elif has_removals and not check:
-        if all_files:
-            # Show concise summary for bulk operations
-            removed_count = sum(1 for r in results if r.result.name == "REMOVED")
-            console.print(f"Successfully deleted hook from {removed_count} files.")
-        else:
-            # Show individual files for specific file operations
-            for result in results:
-                if result.result.name == "REMOVED":
-                    console.print(f"Removed header from {result.file_path}")
-    elif has_removals and check:
-        if all_files:
-            # Show concise summary for bulk check operations
-            removed_count = sum(1 for r in results if r.result.name == "REMOVED")
-            console.print(f"Would remove header from {removed_count} files.")
+        print_statistics(stats, mode, sync_seconds=_sync_seconds(sync, stats, check))
+        console.print()
+    elif has_removals and all_files:
+        # Show concise summary for bulk operations
+        if check:
+            console.print(f"Would remove header from {stats['removed']} files.")
         else:
-            # Show individual files for specific file check operations
-            for result in results:
-                if result.result.name == "REMOVED":
-                    console.print(f"Would remove header from {result.file_path}")
+            console.print(f"Successfully deleted hook from {stats['removed']} files.")
+    print_slowest_files(slowest_files.results())
 
     # Exit with error code if in check mode and there were changes or errors
     if check and (has_removals or has_errors):
@@ -337,27 +651,300 @@ def delete(
         raise typer.Exit(code=1)
 
 
+@cache_app.command("export")
+def cache_export(
+    destination: Path = CACHE_FILE_ARGUMENT,
+    project_root: Path = PROJECT_ROOT_OPTION,
+) -> None:
+    """Write the content digests of known-good files to a compact artifact."""
+    if project_root is None:
+        project_root = Path.cwd()
+
+    try:
+        count = export_cache(project_root, destination)
+    except CacheError as e:
+        console.print(f"[bold red]Cache Error:[/bold red] {e}")
+        raise typer.Exit(code=1) from e
+    console.print(f"Exported {count} cache entries to {destination}.")
+    if not count:
+        console.print("[yellow]Only files checked with --cache-mode content are exported.[/yellow]")
+
+
+@cache_app.command("import")
+def cache_import(
+    source: Path = CACHE_FILE_ARGUMENT,
+    project_root: Path = PROJECT_ROOT_OPTION,
+) -> None:
+    """Merge an artifact written by 'cache export' into the local cache."""
+    if project_root is None:
+        project_root = Path.cwd()
+
+    try:
+        count = import_cache(project_root, source)
+    except CacheError as e:
+        console.print(f"[bold red]Cache Error:[/bold red] {e}")
+        raise typer.Exit(code=1) from e
+    console.print(f"Imported {count} cache entries from {source}.")
+
+
+@app.command("merge-reports")
+def merge_reports_command(
+    reports: List[Path] = REPORTS_ARGUMENT,
+    output: Path = MERGED_REPORT_OPTION,
+) -> None:
+    """Merge the reports of sharded runs; exit 1 if the combined run failed."""
+    try:
+        merged = merge_reports([read_report(path) for path in reports])
+        if output is not None:
+            write_report(merged, output)
+    except ReportError as e:
+        console.print(f"[bold red]Report Error:[/bold red] {e}")
+        raise typer.Exit(code=1) from e
+
+    for reported in merged.files:
+        error = f" (Error: {reported.error})" if reported.error else ""
+        console.print(f"  {reported.result}{error}: {reported.path}")
+    print_statistics(merged.stats, merged.mode)
+    console.print()
+
+    if merged.failed:
+        raise typer.Exit(code=1)
+
+
+@app.command("sync-renames")
+def sync_renames(
+    check: bool = CHECK_OPTION,
+    project_root: Path = PROJECT_ROOT_OPTION,
+    since: str = RENAMES_SINCE_OPTION,
+    staged: bool = RENAMES_STAGED_OPTION,
+    similarity: int = SIMILARITY_OPTION,
+    workers: str = WORKERS_OPTION,
+    verbose: bool = VERBOSE_OPTION,
+    durability: Durability = DURABILITY_OPTION,
+) -> None:
+    """Rewrite the stale headers of files that git reports as renamed."""
+    if project_root is None:
+        project_root = Path.cwd()
+    project_root = project_root.resolve()
+
+    if (since is not None) == staged:
+        raise typer.BadParameter("Pass exactly one of --since REF or --staged")
+
+    try:
+        cfg = load_config(project_root)
+    except ConfigError as e:
+        console.print(f"[bold red]Configuration Error:[/bold red] {e}")
+        raise typer.Exit(code=1) from e
+
+    try:
+        renames = renamed_files(project_root, cfg, since, staged, similarity)
+    except DiscoveryError as e:
+        console.print(f"[bold red]Discovery Error:[/bold red] {e}")
+        raise typer.Exit(code=1) from e
+    if not renames:
+        console.print("[yellow]No renamed files found.[/yellow]")
+        raise typer.Exit(code=0)
+
+    mode = "check" if check else "fix"
+    sync = SyncPolicy(durability or Durability(cfg.durability))
+
+    # Only the renamed files are read; files without a header are skipped
+    results = process_files_iter(
+        files=[new for _, new in renames],
+        project_root=project_root,
+        mode=mode,
+        workers=workers,
+        operation="sync",
+        sync=sync,
+        ordered=True,
+        resolved_paths=True,
+    )
+    with closing(results):
+        stats, _ = _report_results(
+            results,
+            Result.CHANGED,
+            "Would update" if check else "Updated",
+            verbose=verbose,
+            per_file=True,
+            show_progress=False,
+            total=len(renames),
+        )
+
+    has_changes = stats["changed"] > 0
+    has_errors = stats["errors"] > 0
+    if verbose or has_errors:
+        print_statistics(stats, mode, sync_seconds=_sync_seconds(sync, stats, check))
+        console.print()
+
+    if has_errors or (check and has_changes):
+        raise typer.Exit(code=1)
+
+
 @app.command()
 def welcome() -> None:
     """Display the welcome message with ASCII art and quick start guide."""
     display_welcome()
 
 
-def _discover_files(project_root: Path, config: Config) -> List[Path]:
-    """Recursively discover files to process under *project_root*.
-
-    The discovery respects *exclude_globs* from the configuration and also
-    consults :func:`path_comment.detectors.comment_prefix` to skip binaries or
-    unsupported types.
+def _report_results(
+    results: Iterable[ProcessingResult],
+    outcome: Result,
+    message: str,
+    verbose: bool,
+    per_file: bool,
+    show_progress: bool,
+    total: Union[int, None],
+    fail_fast: bool = False,
+    check: bool = False,
+    record: Union[Callable[[ProcessingResult], None], None] = None,
+    slowest: Union[SlowestFiles, None] = None,
+) -> Tuple[Dict, Union[ProcessingResult, None]]:
+    """Print results as they stream in and return their statistics.
+
+    Only counts are kept, so memory does not grow with the number of files.
+
+    Args:
+        results: Stream of processing results.
+        outcome: Result that is reported per file, e.g. CHANGED.
+        message: Text printed before the path of each such file.
+        verbose: Print the status of every file instead.
+        per_file: Whether to print files with *outcome* at all.
+        show_progress: Whether to show a progress bar.
+        total: Number of files expected, for the progress bar, if known.
+        fail_fast: Stop reading *results* at the first failing file, which
+            is always reported.
+        check: Whether files with *outcome* fail the run, as in --check mode;
+            otherwise only errors do.
+        record: Called with every result, e.g. to build a run report.
+        slowest: Tracker of the slowest files, fed every result.
+
+    Returns:
+        The statistics and the result that stopped reporting, if any.
+    """
+    stats = collect_processing_statistics([])
+    with Progress(console=console, disable=not show_progress) as progress:
+        task = progress.add_task("Processing files...", total=total)
+        if verbose:
+            console.print("\n[bold]Details:[/bold]")
+        for result in results:
+            update_processing_statistics(stats, result)
+            progress.advance(task)
+            if record is not None:
+                record(result)
+            if slowest is not None:
+                slowest.add(result)
+            failed = result.error is not None or (check and result.result is outcome)
+            stop = fail_fast and failed
+            if verbose:
+                print_result_detail(result)
+            elif result.result is outcome and (per_file or stop):
+                console.print(f"{message} {result.file_path}")
+            elif stop:
+                print_result_detail(result)
+            if stop:
+                return stats, result
+    return stats, None
+
+
+def _sync_seconds(sync: SyncPolicy, stats: Dict, check: bool) -> Union[float, None]:
+    """Return the time *sync* spent syncing, or None if the run synced nothing.
+
+    That is the case in --check mode, under ``Durability.NONE`` and when no
+    file was rewritten.
     """
-    from .detectors import comment_prefix  # local import to avoid CLI startup cost
+    written = stats["changed"] + stats["removed"]
+    if check or sync.durability is Durability.NONE or not written:
+        return None
+    return sync.sync_seconds
+
+
+def _select_files(
+    files: Union[List[str], None],
+    project_root: Path,
+    config: Config,
+    schedule: Schedule,
+    shard: Union[Tuple[int, int], None],
+    shard_balance: bool,
+    discovery: Union[DiscoverySource, None] = None,
+    walk_threads: Union[int, None] = None,
+    since: Union[str, None] = None,
+    staged: bool = False,
+    all_files: bool = False,
+) -> Tuple[Iterable[Path], Union[int, None]]:
+    """Return the files to process, in scheduled order, and their number if known.
+
+    With *since* or *staged* only the files changed according to git are
+    selected. Otherwise, without *files* the project is discovered lazily on
+    a background thread, so the number of files is not known up front.
+    """
+    paths: Iterable[Path]
+    if since is not None or staged:
+        if since is not None and staged:
+            raise typer.BadParameter("--since and --staged cannot be combined")
+        if files is not None or all_files:
+            raise typer.BadParameter("--since and --staged cannot be combined with files or --all")
+        try:
+            paths = changed_files(project_root, config, since=since, staged=staged)
+        except DiscoveryError as e:
+            console.print(f"[bold red]Discovery Error:[/bold red] {e}")
+            raise typer.Exit(code=1) from e
+    elif files is None:
+        # Collect only what scheduling and sharding use, so no file is stat'ed for them
+        sizes = schedule is Schedule.LARGEST_FIRST or (shard is not None and shard_balance)
+        try:
+            entries = discover_file_entries(
+                project_root,
+                config,
+                discovery,
+                walk_threads,
+                inodes=schedule is not Schedule.INPUT,
+                sizes=sizes,
+            )
+        except DiscoveryError as e:
+            console.print(f"[bold red]Discovery Error:[/bold red] {e}")
+            raise typer.Exit(code=1) from e
+        if shard is not None:
+            entries = shard_files(entries, project_root, *shard, balance_by_size=shard_balance)
+        # Reorder in windows, as the walk never holds all paths at once
+        return prefetch(schedule_files(entries, schedule, window=DISCOVERY_QUEUE_SIZE)), None
+    else:
+        paths = _resolve_file_arguments(files)
+
+    if shard is not None:
+        paths = shard_files(paths, project_root, *shard, balance_by_size=shard_balance)
+    selected = list(schedule_files(paths, schedule))
+    return selected, len(selected)
+
+
+def _write_run_report(run_report: RunReport, path: Path) -> None:
+    """Write *run_report* to *path*, exiting with an error if that fails."""
+    try:
+        write_report(run_report, path)
+    except ReportError as e:
+        console.print(f"[bold red]Report Error:[/bold red] {e}")
+        raise typer.Exit(code=1) from e
 
-    files: List[Path] = []
-    for path in project_root.rglob("*"):
-        if path.is_file() and not config.should_exclude(path, project_root):
-            if comment_prefix(path) is not None:  # only supported types
-                files.append(path)
-    return files
+
+def _resolve_file_arguments(files: List[str]) -> List[Path]:
+    """Turn file arguments into absolute paths, exiting if any is not a file."""
+    file_paths = []
+    for file_str in files:
+        file_path = Path(file_str)
+        # Convert relative paths to absolute paths based on current working directory
+        if not file_path.is_absolute():
+            file_path = Path.cwd() / file_path
+        # Resolve to handle symlinks (e.g., /var -> /private/var on macOS)
+        file_path = file_path.resolve()
+        try:
+            mode = os.stat(file_path).st_mode
+        except OSError:
+            console.print(f"[bold red]Error:[/bold red] File '{file_path}' does not exist.")
+            raise typer.Exit(code=1) from None
+        if not stat.S_ISREG(mode):
+            console.print(f"[bold red]Error:[/bold red] '{file_path}' is not a file.")
+            raise typer.Exit(code=1)
+        file_paths.append(file_path)
+    return file_paths
 
 
 def main() -> None:
@@ -382,6 +969,9 @@ def main() -> None:
         "show-config",
         "delete",
         "welcome",
+        "cache",
+        "merge-reports",
+        "sync-renames",
     }  # Add any other top-level commands
     is_known_command_call = args[0] in known_commands
 
@@ -8,10 +8,13 @@ rest of the codebase can rely on a single, validated source of truth.
 from __future__ import annotations
 
 import fnmatch
+import os
+import re
 import sys
 from dataclasses import dataclass, field
+from enum import Enum
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple, Union
 
 # Python 3.11+ has tomllib in stdlib, older versions need tomli
 try:
@@ -34,6 +37,39 @@ class ConfigError(Exception):
     pass
 
 
+# Settings with a fixed set of values. They live here rather than in the
+# modules that act on them, so loading the configuration imports none of those.
+class Durability(Enum):
+    """How rewritten files are flushed to stable storage."""
+
+    FSYNC = "fsync"  # fsync every file before it is renamed into place
+    BATCH = "batch"  # sync the touched filesystems once, after all writes
+    NONE = "none"  # leave write-back to the OS (throwaway checkouts, tmpfs)
+
+
+class CacheMode(Enum):
+    """How the result cache recognises unchanged files."""
+
+    STAT = "stat"  # path + (mtime, size, inode); local to one checkout
+    CONTENT = "content"  # also a digest of the bytes; survives fresh checkouts
+
+
+class DiscoverySource(Enum):
+    """Where discovery finds the files of the project."""
+
+    AUTO = "auto"  # the git index if the project root is a repository, else a walk
+    WALK = "walk"  # walk the directory tree
+    GIT = "git"  # list the files tracked in the git index
+
+
+class Schedule(Enum):
+    """Order in which files are handed to the workers."""
+
+    INPUT = "input"  # as given on the command line or found by the walk
+    LOCALITY = "locality"  # by directory, then inode number, to reduce seeks
+    LARGEST_FIRST = "largest-first"  # by size, descending, to shorten the tail of a run
+
+
 # Default ignore patterns - comprehensive list of files/directories to exclude
 DEFAULT_IGNORE_PATTERNS = [
     # Version Control
@@ -96,6 +132,8 @@ DEFAULT_IGNORE_PATTERNS = [
     "vendor/*",  # Go, PHP
     "Pods/*",  # iOS CocoaPods
     ".bundle/*",  # Ruby
+    # path-comment-hook's own result cache
+    ".path-comment-cache/*",
 ]
 
 
@@ -108,12 +146,26 @@ class Config:
         custom_comment_map: Mapping of file extensions to custom comment templates.
         default_mode: Default path resolution mode ('file', 'folder', or 'smart').
         use_default_ignores: Whether to include default ignore patterns.
+        use_gitignore: Whether walking the tree skips files ignored by .gitignore.
+        durability: How rewritten files are flushed to disk ('fsync', 'batch', or 'none').
+        cache_mode: How the result cache recognises unchanged files ('stat' or 'content').
+        discovery: Where --all finds files ('auto', 'walk', or 'git').
+        walk_threads: Number of directories walking the tree lists at once.
     """
 
     exclude_globs: List[str] = field(default_factory=list)
     custom_comment_map: Dict[str, str] = field(default_factory=dict)
     default_mode: str = "file"
     use_default_ignores: bool = True
+    use_gitignore: bool = True
+    durability: str = Durability.FSYNC.value
+    cache_mode: str = CacheMode.STAT.value
+    discovery: str = DiscoverySource.AUTO.value
+    walk_threads: int = 1
+    # Exclusion patterns compiled into one regex, with the settings they came from
+    _compiled_excludes: Union[Tuple[Tuple[Tuple[str, ...], bool], re.Pattern], None] = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     def __post_init__(self) -> None:
         """Validate configuration after initialization."""
@@ -121,6 +173,24 @@ class Config:
             raise ConfigError(
                 f"Invalid default_mode '{self.default_mode}'. Must be one of: file, folder, smart"
             )
+        durability_levels = [level.value for level in Durability]
+        if self.durability not in durability_levels:
+            raise ConfigError(
+                f"Invalid durability '{self.durability}'. "
+                f"Must be one of: {', '.join(durability_levels)}"
+            )
+        cache_modes = [mode.value for mode in CacheMode]
+        if self.cache_mode not in cache_modes:
+            raise ConfigError(
+                f"Invalid cache_mode '{self.cache_mode}'. Must be one of: {', '.join(cache_modes)}"
+            )
+        sources = [source.value for source in DiscoverySource]
+        if self.discovery not in sources:
+            raise ConfigError(
+                f"Invalid discovery '{self.discovery}'. Must be one of: {', '.join(sources)}"
+            )
+        if self.walk_threads < 1:
+            raise ConfigError(f"Invalid walk_threads {self.walk_threads}. Must be at least 1")
 
     def should_exclude(self, file_path: Path, project_root: Path | None = None) -> bool:
         """Check if a file should be excluded based on ignore patterns.
@@ -145,20 +215,73 @@ class Config:
                 # file_path is not under project_root
                 pass
 
-        # Check user-defined exclude patterns
-        for pattern in self.exclude_globs:
-            if fnmatch.fnmatch(path_str, pattern):
-                return True
-            if relative_path_str and fnmatch.fnmatch(relative_path_str, pattern):
-                return True
+        # Check user-defined and, if enabled, default patterns in one match each
+        excludes = self._exclude_regex()
+        if excludes.match(os.path.normcase(path_str)):
+            return True
+        if relative_path_str and excludes.match(os.path.normcase(relative_path_str)):
+            return True
+
+        return False
 
-        # Check default ignore patterns if enabled
+    def _exclude_regex(self) -> re.Pattern:
+        """Return all exclusion patterns compiled into one regex.
+
+        The regex matches exactly what :func:`fnmatch.fnmatch` matches for any of
+        the patterns, and is rebuilt only when the patterns change.
+        """
+        settings = (tuple(self.exclude_globs), self.use_default_ignores)
+        if self._compiled_excludes is None or self._compiled_excludes[0] != settings:
+            patterns = list(self.exclude_globs)
+            if self.use_default_ignores:
+                patterns.extend(DEFAULT_IGNORE_PATTERNS)
+            # Without patterns, a regex that never matches
+            regex = "|".join(fnmatch.translate(os.path.normcase(p)) for p in patterns) or "(?!)"
+            compiled = re.compile(regex)
+            self._compiled_excludes = (settings, compiled)
+            return compiled
+        return self._compiled_excludes[1]
+
+    def should_prune(self, dir_path: Path, project_root: Path | None = None) -> bool:
+        """Check if every path below a directory is excluded, so it need not be walked.
+
+        A directory is pruned when an ignore pattern ending in ``*`` matches it,
+        or one of its ancestors, up to that final wildcard, e.g.
+        ``node_modules/*`` for ``node_modules``.
+        Since ``*`` also matches path separators, such a pattern excludes every
+        file at any depth below the directory.
+
+        Args:
+            dir_path: Directory to check.
+            project_root: Project root for relative path calculation (optional).
+
+        Returns:
+            True if no file below the directory can be included, False otherwise.
+        """
+        paths = [dir_path]
+        if project_root:
+            try:
+                paths.append(dir_path.relative_to(project_root))
+            except ValueError:
+                # dir_path is not under project_root
+                pass
+
+        # The directory and each of its ancestors, ending in a separator
+        candidates = []
+        for path in paths:
+            for depth in range(1, len(path.parts) + 1):
+                candidates.append(str(Path(*path.parts[:depth])) + os.sep)
+
+        patterns = list(self.exclude_globs)
         if self.use_default_ignores:
-            for pattern in DEFAULT_IGNORE_PATTERNS:
-                if fnmatch.fnmatch(path_str, pattern):
-                    return True
-                if relative_path_str and fnmatch.fnmatch(relative_path_str, pattern):
-                    return True
+            patterns.extend(DEFAULT_IGNORE_PATTERNS)
+
+        for pattern in patterns:
+            if not pattern.endswith("*"):
+                continue
+            prefix = pattern[:-1]
+            if any(fnmatch.fnmatch(candidate, prefix) for candidate in candidates):
+                return True
 
         return False
 
@@ -184,6 +307,11 @@ class Config:
             "custom_comment_map": self.custom_comment_map,
             "default_mode": self.default_mode,
             "use_default_ignores": self.use_default_ignores,
+            "use_gitignore": self.use_gitignore,
+            "durability": self.durability,
+            "cache_mode": self.cache_mode,
+            "discovery": self.discovery,
+            "walk_threads": self.walk_threads,
             "default_ignore_patterns": DEFAULT_IGNORE_PATTERNS if self.use_default_ignores else [],
         }
 
@@ -220,6 +348,11 @@ def load_config(project_root: Path) -> Config:
     custom_comment_map = tool_config.get("custom_comment_map", {})
     default_mode = tool_config.get("default_mode", "file")
     use_default_ignores = tool_config.get("use_default_ignores", True)
+    use_gitignore = tool_config.get("use_gitignore", True)
+    durability = tool_config.get("durability", Durability.FSYNC.value)
+    cache_mode = tool_config.get("cache_mode", CacheMode.STAT.value)
+    discovery = tool_config.get("discovery", DiscoverySource.AUTO.value)
+    walk_threads = tool_config.get("walk_threads", 1)
 
     # Type validation
     if not isinstance(exclude_globs, list):
@@ -236,12 +369,32 @@ def load_config(project_root: Path) -> Config:
     if not isinstance(use_default_ignores, bool):
         raise ConfigError("use_default_ignores must be a boolean")
 
+    if not isinstance(use_gitignore, bool):
+        raise ConfigError("use_gitignore must be a boolean")
+
+    if not isinstance(durability, str):
+        raise ConfigError("durability must be a string")
+
+    if not isinstance(cache_mode, str):
+        raise ConfigError("cache_mode must be a string")
+
+    if not isinstance(discovery, str):
+        raise ConfigError("discovery must be a string")
+
+    if not isinstance(walk_threads, int) or isinstance(walk_threads, bool):
+        raise ConfigError("walk_threads must be an integer")
+
     try:
         return Config(
             exclude_globs=exclude_globs,
             custom_comment_map=custom_comment_map,
             default_mode=default_mode,
             use_default_ignores=use_default_ignores,
+            use_gitignore=use_gitignore,
+            durability=durability,
+            cache_mode=cache_mode,
+            discovery=discovery,
+            walk_threads=walk_threads,
         )
     except ConfigError:
         # Re-raise validation errors from Config.__post_init__
@@ -11,7 +11,7 @@ from __future__ import annotations
 from pathlib import Path
 from typing import Dict, Set
 
-from identify.identify import tags_from_path
+from identify.identify import ENCODING_TAGS, tags_from_filename, tags_from_path
 
 # Map an *identify* tag → the prefix that starts a line-comment
 COMMENT_PREFIXES: Dict[str, str] = {
@@ -38,33 +38,85 @@ _SKIP_TAGS: Set[str] = {
 }
 
 
-def _get_shebang_tag(path: Path) -> str | None:
-    """Check if file starts with a shebang and return appropriate tag."""
+def _get_shebang_tag(path: Path, head: bytes | None = None) -> str | None:
+    """Check if file starts with a shebang and return appropriate tag.
+
+    When *head* (the leading bytes of the file) is supplied, the shebang is
+    read from it instead of opening *path* again.
+    """
+    if head is None:
+        try:
+            with path.open("rb") as f:
+                # Kernels cap shebang lines well below this length
+                head = f.readline(4096)
+        except OSError:
+            # File cannot be read - skip shebang detection
+            return None
+
+    if not head.startswith(b"#!"):
+        return None
+
+    end = head.find(b"\n")
     try:
-        with path.open("r", encoding="utf-8") as f:
-            first_line = f.readline().strip()
-            if first_line.startswith("#!"):
-                if "python" in first_line.lower():
-                    return "python"
-                if "sh" in first_line.lower():
-                    return "shell"
-    except (OSError, UnicodeDecodeError):
-        # File cannot be read or contains invalid UTF-8 - skip shebang detection
+        first_line = head[: end if end != -1 else len(head)].decode("utf-8").strip()
+    except UnicodeDecodeError:
+        # Contains invalid UTF-8 - skip shebang detection
         return None
+
+    if "python" in first_line.lower():
+        return "python"
+    if "sh" in first_line.lower():
+        return "shell"
     return None
 
 
-def comment_prefix(path: Path) -> str | None:
+def file_tags(path: Path, regular_file: bool = False) -> Set[str]:
+    """Return the *identify* tags of *path*.
+
+    When the caller already knows *path* is a regular file, e.g. from the
+    directory listing that found it, and the name alone tells its type and
+    whether it is text, the tags come from the name without touching the
+    file system. Otherwise *path* is stat'ed and may be opened.
+    """
+    if regular_file:
+        tags = tags_from_filename(path.name)
+        if tags & ENCODING_TAGS:
+            return tags
+    return tags_from_path(str(path))
+
+
+def is_supported(path: Path, regular_file: bool = False) -> bool:
+    """Return whether *path* has a known comment style.
+
+    Equivalent to ``comment_prefix(path) is not None``, but a regular file
+    whose name maps to a comment style is not opened to look for a shebang,
+    as a shebang could only pick another style.
+    """
+    tags = file_tags(path, regular_file)
+    if tags & _SKIP_TAGS:
+        return False
+    if any(tag in COMMENT_PREFIXES for tag in tags):
+        return True
+    return comment_prefix(path, tags=tags) is not None
+
+
+def comment_prefix(
+    path: Path, head: bytes | None = None, tags: Set[str] | None = None
+) -> str | None:
     """Return the correct **line-comment prefix** for *path*.
 
-    Returns None if the file should be skipped entirely.
+    *head* may carry the already-read leading bytes of the file so that
+    shebang detection does not reopen it, and *tags* its already known
+    *identify* tags (see :func:`file_tags`). Returns None if the file should
+    be skipped entirely.
     """
-    tags = tags_from_path(str(path))
+    if tags is None:
+        tags = tags_from_path(str(path))
     if tags & _SKIP_TAGS:
         return None
 
     # First check if it's a shebang script
-    if shebang_tag := _get_shebang_tag(path):
+    if shebang_tag := _get_shebang_tag(path, head):
         if prefix := COMMENT_PREFIXES.get(shebang_tag):
             return prefix
 
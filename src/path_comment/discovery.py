@@ -0,0 +1,807 @@
+# src/path_comment/discovery.py
+"""Discover the files to process under a project root.
+
+Discovery is lazy: :func:`discover_files` yields paths as the tree is
+walked with :func:`os.scandir`, never descending into excluded directories,
+or as git lists its index. On high-latency filesystems the walk can list
+several directories at once on a small thread pool. :func:`prefetch` runs discovery on a background
+thread feeding a bounded queue. Processing can therefore start with the
+first files found, and the full file list never has to be held in memory.
+:func:`schedule_files` optionally reorders files for disk locality or by
+size on the way.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import heapq
+import io
+import os
+import queue
+import re
+import shutil
+import stat
+import subprocess
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import (
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+    cast,
+)
+
+from .config import Config, DiscoverySource, Schedule
+from .ignore import GITIGNORE, IgnoreChain, IgnoreRules, is_ignored
+
+# Paths discovered ahead of processing; bounds memory on huge trees
+DISCOVERY_QUEUE_SIZE = 4096
+
+# How often a producer blocked on a full queue checks whether to stop
+_PUT_TIMEOUT = 0.1
+
+# Marks the end of the walk in the queue
+_DONE = object()
+
+# Directories a parallel walk lists ahead of the one it yields, per thread
+_WALK_LOOKAHEAD_PER_THREAD = 16
+
+# Bytes read from ``git ls-files`` at a time
+_GIT_READ_SIZE = 1 << 16
+
+# Index entry modes of submodules and symlinks, which are not processed
+_GIT_SKIPPED_MODES = {b"160000", b"120000"}
+
+# The stat data ``git ls-files --debug`` writes after each entry's NUL. The
+# format is meant for humans and not promised to be stable, hence the fallback
+# in _git_index
+_GIT_DEBUG = re.compile(
+    rb"\s*ctime:[^\n]*\n\s*mtime:[^\n]*\n\s*dev:\s*\d+\s+ino:\s*(\d+)\n"
+    rb"\s*uid:[^\n]*\n\s*size:\s*(\d+)[^\n]*\n"
+)
+
+
+class DiscoveryError(Exception):
+    """Raised when the files to process cannot be listed."""
+
+    pass
+
+
+class _GitDebugFormatError(DiscoveryError):
+    """Raised when the stat data of ``git ls-files --debug`` cannot be parsed."""
+
+
+class FileEntry(NamedTuple):
+    """A discovered file, with what its directory listing or index entry told about it."""
+
+    path: Path
+    inode: Union[int, None] = None  # None if not looked up
+    size: Union[int, None] = None  # in bytes; None if not looked up
+
+
+# A path given as is, or a discovered file
+_File = TypeVar("_File", Path, FileEntry)
+
+
+def discover_files(
+    project_root: Path,
+    config: Config,
+    source: Union[DiscoverySource, None] = None,
+    walk_threads: Union[int, None] = None,
+) -> Iterator[Path]:
+    """Return an iterator over the files to process under *project_root*, recursively.
+
+    The discovery respects *exclude_globs* from the configuration and also
+    consults :func:`path_comment.detectors.is_supported` to skip binaries or
+    unsupported types. Files are never stat'ed to find them: types come
+    from the directory listing or the index, and whether a file is
+    supported from its name wherever that decides it. The paths yielded are
+    resolved paths of regular files, so they can be processed with
+    ``resolved_paths=True``.
+
+    Walking the tree, directories whose whole subtree is excluded (see
+    :meth:`Config.should_prune`) or that ``.gitignore`` rules ignore are
+    never listed, and each directory's files are yielded in name order
+    before its subdirectories are walked.
+    The git index instead yields the tracked files present on disk, in index
+    order, without listing any directory; untracked files are not found.
+
+    Args:
+        project_root: Directory to search.
+        config: Configuration providing the exclusion patterns and the
+            default discovery source.
+        source: Where to find files; defaults to the configured source.
+            ``DiscoverySource.AUTO`` uses the git index when *project_root*
+            contains ``.git`` and git can list it, and walks otherwise.
+        walk_threads: Number of directories the walk lists at once; defaults
+            to the configured number. Files are found in the same order
+            whatever the number.
+
+    Returns:
+        An iterator yielding paths of supported, non-excluded files, as they
+        are found.
+
+    Raises:
+        DiscoveryError: If ``DiscoverySource.GIT`` is requested and git
+            cannot list the index.
+    """
+    entries = discover_file_entries(project_root, config, source, walk_threads)
+    return (entry.path for entry in entries)
+
+
+def discover_file_entries(
+    project_root: Path,
+    config: Config,
+    source: Union[DiscoverySource, None] = None,
+    walk_threads: Union[int, None] = None,
+    inodes: bool = False,
+    sizes: bool = False,
+) -> Iterator[FileEntry]:
+    """Discover files like :func:`discover_files`, keeping what discovery learnt about them.
+
+    :func:`schedule_files` and :func:`shard_files` use the inode numbers and
+    sizes of the entries instead of stat'ing every file again.
+
+    Args:
+        project_root: Directory to search.
+        config: Configuration providing the exclusion patterns and the
+            default discovery source.
+        source: Where to find files, as for :func:`discover_files`.
+        walk_threads: Number of directories the walk lists at once, as for
+            :func:`discover_files`.
+        inodes: Fill in inode numbers. The walk reads them from the
+            directory listing; git lists the index with ``--debug``, and
+            entries are left without them if git's output cannot be parsed.
+        sizes: Fill in sizes. The walk stats each file for them; git
+            reads them from the index with ``--debug``, like *inodes*.
+
+    Returns:
+        An iterator yielding entries of supported, non-excluded files, as
+        they are found.
+
+    Raises:
+        DiscoveryError: If ``DiscoverySource.GIT`` is requested and git
+            cannot list the index.
+    """
+    if source is None:
+        source = DiscoverySource(config.discovery)
+
+    entries: Union[Iterator[FileEntry], None] = None
+    if source is DiscoverySource.GIT or (
+        source is DiscoverySource.AUTO and (project_root / ".git").exists()
+    ):
+        try:
+            entries = _git_index(project_root, metadata=inodes or sizes)
+        except DiscoveryError:
+            if source is DiscoverySource.GIT:
+                raise
+    if entries is None:
+        if walk_threads is None:
+            walk_threads = config.walk_threads
+        if walk_threads > 1:
+            entries = _walk_parallel(project_root, config, walk_threads, inodes, sizes)
+        else:
+            entries = _walk(project_root, config, inodes, sizes)
+    return _supported_files(entries, project_root, config)
+
+
+def _supported_files(files: Iterable[_File], project_root: Path, config: Config) -> Iterator[_File]:
+    """Yield the files of *files*, all regular, that are not excluded and supported."""
+    from .detectors import is_supported  # local import to avoid CLI startup cost
+
+    for file in files:
+        path = _path_of(file)
+        if not config.should_exclude(path, project_root):
+            if is_supported(path, regular_file=True):  # only supported types
+                yield file
+
+
+def _path_of(file: Union[Path, FileEntry]) -> Path:
+    """Return the path of a path or discovered file."""
+    return file.path if isinstance(file, FileEntry) else file
+
+
+def _is_regular_file(path: Path) -> bool:
+    """Return whether *path* is a regular file and not a symlink, with a single ``lstat``."""
+    try:
+        return stat.S_ISREG(os.lstat(path).st_mode)
+    except OSError:
+        return False
+
+
+def _walk(
+    project_root: Path, config: Config, inodes: bool = False, sizes: bool = False
+) -> Iterator[FileEntry]:
+    """Yield the files under *project_root*, depth first, skipping pruned directories."""
+    # Each directory with its path relative to the project root and the
+    # ignore rules that apply to it, read once as the walk descends
+    pending = [(project_root, "", _root_chain(project_root, config))]
+    while pending:
+        directory, prefix, chain = pending.pop()
+        files, subdirs, chain = _scan_directory(
+            directory, prefix, chain, project_root, config, inodes, sizes
+        )
+        yield from files
+        # Reversed, so the first subdirectory is popped and walked first
+        for subdir in reversed(subdirs):
+            pending.append((subdir, f"{prefix}{subdir.name}/", chain))
+
+
+def _walk_parallel(
+    project_root: Path, config: Config, threads: int, inodes: bool = False, sizes: bool = False
+) -> Iterator[FileEntry]:
+    """Yield the files under *project_root* like :func:`_walk`, listing directories on *threads*.
+
+    Directories are still yielded depth first in name order, but the ones
+    the walk reaches next are listed ahead on a thread pool, so up to
+    *threads* listings wait on the filesystem at once. The number of
+    directories listed ahead is bounded, so memory stays bounded when the
+    consumer is slow.
+    """
+    lookahead = threads * _WALK_LOOKAHEAD_PER_THREAD
+    # Directories still to yield, as in _walk, with their listing once started
+    pending: List[Tuple[Path, str, IgnoreChain, Union[Future, None]]] = [
+        (project_root, "", _root_chain(project_root, config), None)
+    ]
+    started = 0
+    pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="path-comment-walk")
+    try:
+        while pending:
+            # Start listing the directories the walk reaches next, top of the stack first
+            for index in range(len(pending) - 1, -1, -1):
+                if started >= lookahead:
+                    break
+                directory, prefix, chain, future = pending[index]
+                if future is None:
+                    future = pool.submit(
+                        _scan_directory,
+                        directory,
+                        prefix,
+                        chain,
+                        project_root,
+                        config,
+                        inodes,
+                        sizes,
+                    )
+                    pending[index] = (directory, prefix, chain, future)
+                    started += 1
+
+            directory, prefix, _, future = pending.pop()
+            started -= 1
+            files, subdirs, chain = cast(Future, future).result()
+            yield from files
+            for subdir in reversed(subdirs):
+                pending.append((subdir, f"{prefix}{subdir.name}/", chain, None))
+    finally:
+        # Listings not yet started are dropped when the walk is closed early
+        for *_, future in pending:
+            if future is not None:
+                future.cancel()
+        pool.shutdown(wait=True)
+
+
+def _root_chain(project_root: Path, config: Config) -> IgnoreChain:
+    """Return the ignore rules that apply to the whole walk."""
+    if config.use_gitignore:
+        # Repository-wide rules that are not committed
+        rules = IgnoreRules.from_file(project_root / ".git" / "info" / "exclude")
+        if rules is not None:
+            return (("", rules),)
+    return ()
+
+
+def _scan_directory(
+    directory: Path,
+    prefix: str,
+    chain: IgnoreChain,
+    project_root: Path,
+    config: Config,
+    inodes: bool = False,
+    sizes: bool = False,
+) -> Tuple[List[FileEntry], List[Path], IgnoreChain]:
+    """List the files of *directory* and its subdirectories that are not pruned, by name.
+
+    Entry types, and inode numbers if *inodes*, come from the directory
+    listing itself, so no file is stat'ed unless *sizes* asks for its size.
+    Symlinks are left out: symlinked directories are not followed,
+    like :meth:`Path.rglob`, and symlinked files are not processed.
+    Unreadable directories are skipped. Entries ignored
+    by *chain*, extended with the directory's own ``.gitignore``, are left
+    out; the extended chain is returned for the subdirectories.
+    """
+    try:
+        with os.scandir(directory) as it:
+            entries = sorted(it, key=lambda entry: entry.name)
+    except OSError:
+        return [], [], chain
+
+    if config.use_gitignore and any(entry.name == GITIGNORE for entry in entries):
+        rules = IgnoreRules.from_file(directory / GITIGNORE)
+        if rules is not None:
+            chain = (*chain, (prefix, rules))
+
+    files: List[FileEntry] = []
+    subdirs: List[Path] = []
+    for entry in entries:
+        path = directory / entry.name
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                if chain and is_ignored(chain, prefix + entry.name, True):
+                    continue
+                if not config.should_prune(path, project_root):
+                    subdirs.append(path)
+            # Symlinks to files were always left out, identify tagging them as
+            # "symlink"; d_type now tells without an lstat
+            elif entry.is_file(follow_symlinks=False):
+                if not (chain and is_ignored(chain, prefix + entry.name, False)):
+                    inode = entry.inode() if inodes else None
+                    size = entry.stat(follow_symlinks=False).st_size if sizes else None
+                    files.append(FileEntry(path, inode, size))
+        except OSError:
+            continue
+    return files, subdirs, chain
+
+
+def git_index_files(project_root: Path) -> Iterator[Path]:
+    """Return an iterator over the files tracked in the git index under *project_root*.
+
+    A single ``git ls-files`` call lists the index, which is streamed as git
+    writes it. Files deleted from the working tree, entries outside a sparse
+    checkout, submodules and symlinks are skipped. Git is started right
+    away, so a failure to list the index is raised here rather than while
+    iterating.
+
+    Args:
+        project_root: Directory inside a git working tree.
+
+    Returns:
+        An iterator yielding the paths of the tracked files, in index order.
+
+    Raises:
+        DiscoveryError: If git is not installed or cannot list the index.
+    """
+    return (entry.path for entry in _git_index(project_root))
+
+
+def _git_index(project_root: Path, metadata: bool = False) -> Iterator[FileEntry]:
+    """List the index like :func:`git_index_files`, with inodes and sizes if *metadata*.
+
+    Inode numbers and sizes are those the index recorded when git last
+    refreshed it, which ``--debug`` prints at no extra cost. That output is
+    meant for humans and git does not promise to keep its format; if it
+    cannot be parsed, the rest of the index is listed again without it and
+    its entries carry no inode or size, so they are stat'ed where needed.
+    """
+    git = shutil.which("git")
+    if git is None:
+        raise DiscoveryError("git is not installed")
+    command = [git, "ls-files", "-z", "--cached", "--deleted", "-t", "--stage"]
+    if metadata:
+        command.append("--debug")
+    try:
+        process = subprocess.Popen(
+            command, cwd=project_root, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+    except OSError as e:
+        raise DiscoveryError(f"Failed to run git: {e}") from e
+
+    stdout, stderr = (
+        cast(io.BufferedReader, process.stdout),
+        cast(io.BufferedReader, process.stderr),
+    )
+    # Git fails before writing anything, so the first chunk tells whether it works
+    first = stdout.read1(_GIT_READ_SIZE)
+    if not first and process.wait() != 0:
+        message = stderr.read().decode(errors="replace").strip()
+        stdout.close()
+        stderr.close()
+        raise DiscoveryError(f"git ls-files failed in {project_root}: {message}")
+    entries = _read_git_index(process, first, project_root, metadata)
+    return _relist_without_stats_on_error(entries, project_root) if metadata else entries
+
+
+def _relist_without_stats_on_error(
+    entries: Iterator[FileEntry], project_root: Path
+) -> Iterator[FileEntry]:
+    """Yield *entries* of a ``--debug`` listing, falling back to a plain one if it is unparsable."""
+    listed = 0
+    try:
+        for entry in entries:
+            yield entry
+            listed += 1
+    except _GitDebugFormatError:
+        # Both listings go through the index in the same order
+        yield from islice(_git_index(project_root), listed, None)
+
+
+def changed_files(
+    project_root: Path,
+    config: Config,
+    since: Union[str, None] = None,
+    staged: bool = False,
+) -> List[Path]:
+    """Return the files under *project_root* that git reports as changed.
+
+    Only added, modified and renamed files are returned (renames under their
+    new name), filtered like :func:`discover_files`. The work done scales
+    with the size of the diff rather than the size of the repository.
+
+    Args:
+        project_root: Directory inside a git working tree.
+        config: Configuration providing the exclusion patterns.
+        since: Return files changed since the merge base of this ref and
+            ``HEAD``, committed or not, e.g. ``origin/main``.
+        staged: Return files changed in the index instead.
+
+    Returns:
+        The changed files that exist on disk, in git's path order.
+
+    Raises:
+        DiscoveryError: If git cannot be run or does not know *since*.
+        ValueError: If neither or both of *since* and *staged* are given.
+    """
+    output = _git_diff(project_root, since, staged, "--name-only", "--diff-filter=AMR", "-M")
+    paths = [project_root / os.fsdecode(name) for name in output.split(b"\0") if name]
+    # Staged files may since have been removed from the working tree
+    return list(_supported_files(filter(_is_regular_file, paths), project_root, config))
+
+
+def renamed_files(
+    project_root: Path,
+    config: Config,
+    since: Union[str, None] = None,
+    staged: bool = False,
+    similarity: int = 50,
+) -> List[Tuple[Path, Path]]:
+    """Return the files under *project_root* that git detects as renamed.
+
+    Renames are found by git's similarity-based rename detection (``-M``),
+    so files moved together with small edits are included. Renamed files
+    are filtered by their new path like :func:`discover_files`.
+
+    Args:
+        project_root: Directory inside a git working tree.
+        config: Configuration providing the exclusion patterns.
+        since: Return files renamed since the merge base of this ref and
+            ``HEAD``, committed or not, e.g. ``origin/main``.
+        staged: Return files renamed in the index instead.
+        similarity: Minimum similarity, in percent, for git to consider a
+            deleted and an added file a rename.
+
+    Returns:
+        ``(old path, new path)`` pairs of the renamed files that exist on
+        disk, in git's path order.
+
+    Raises:
+        DiscoveryError: If git cannot be run or does not know *since*.
+        ValueError: If neither or both of *since* and *staged* are given.
+    """
+    output = _git_diff(
+        project_root, since, staged, "--name-status", "--diff-filter=R", f"-M{similarity}%"
+    )
+    # Each rename is written as "R<score>", the old path and the new path
+    fields = output.split(b"\0")
+    renames = []
+    for status, old, new in zip(fields[0::3], fields[1::3], fields[2::3]):
+        if status.startswith(b"R"):
+            renames.append((project_root / os.fsdecode(old), project_root / os.fsdecode(new)))
+
+    current = {new for _, new in renames if _is_regular_file(new)}
+    supported = set(_supported_files(current, project_root, config))
+    return [(old, new) for old, new in renames if new in supported]
+
+
+def _git_diff(project_root: Path, since: Union[str, None], staged: bool, *options: str) -> bytes:
+    """Return the output of ``git diff -z`` with *options* for *since* or *staged*.
+
+    Paths are reported relative to *project_root*, and only paths under it.
+
+    Raises:
+        DiscoveryError: If git cannot be run or does not know *since*.
+        ValueError: If neither or both of *since* and *staged* are given.
+    """
+    if (since is not None) == staged:
+        raise ValueError("Exactly one of since and staged must be given")
+
+    diff = ["diff", "-z", "--relative", *options]
+    if staged:
+        return _git_output(project_root, *diff, "--cached")
+    base = _git_output(project_root, "merge-base", str(since), "HEAD").strip()
+    # "--" keeps a base that looks like a path from being read as one
+    return _git_output(project_root, *diff, os.fsdecode(base), "--")
+
+
+def _git_output(project_root: Path, *args: str) -> bytes:
+    """Run git with *args* in *project_root* and return its output.
+
+    Raises:
+        DiscoveryError: If git is not installed or fails.
+    """
+    git = shutil.which("git")
+    if git is None:
+        raise DiscoveryError("git is not installed")
+    try:
+        completed = subprocess.run([git, *args], cwd=project_root, capture_output=True)
+    except OSError as e:
+        raise DiscoveryError(f"Failed to run git: {e}") from e
+    if completed.returncode != 0:
+        message = completed.stderr.decode(errors="replace").strip()
+        raise DiscoveryError(f"git {args[0]} failed in {project_root}: {message}")
+    return completed.stdout
+
+
+def _read_git_index(
+    process: subprocess.Popen, first: bytes, project_root: Path, metadata: bool = False
+) -> Iterator[FileEntry]:
+    """Yield the files listed by a running ``git ls-files -z -t --stage`` process."""
+    stdout, stderr = (
+        cast(io.BufferedReader, process.stdout),
+        cast(io.BufferedReader, process.stderr),
+    )
+    records = _git_records(stdout, first)
+    current: Union[bytes, None] = None
+    entry = FileEntry(project_root)
+    keep = False
+    try:
+        for record, inode, size in _with_index_stats(records) if metadata else _unstated(records):
+            # Records look like "TAG MODE OBJECT STAGE\tPATH"; a path repeats
+            # for each conflict stage and once more if deleted from disk
+            info, _, name = record.partition(b"\t")
+            tag, mode = info.split(b" ", 2)[:2]
+            if name != current:
+                if keep:
+                    yield entry
+                current = name
+                entry = FileEntry(project_root / os.fsdecode(name), inode, size)
+                keep = tag != b"S" and mode not in _GIT_SKIPPED_MODES
+            if tag == b"R":
+                keep = False
+        if keep:
+            yield entry
+        if process.wait() != 0:
+            message = stderr.read().decode(errors="replace").strip()
+            raise DiscoveryError(f"git ls-files failed in {project_root}: {message}")
+    finally:
+        # Also reached when the caller stops iterating early
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        stdout.close()
+        stderr.close()
+
+
+def _git_records(stdout: io.BufferedReader, first: bytes) -> Iterator[bytes]:
+    """Split the NUL-terminated records git writes to *stdout*, starting with *first*.
+
+    Output after the last NUL, such as the stat data ``--debug`` writes
+    after the last record, is yielded as a final record.
+    """
+    pending = first
+    while True:
+        *records, pending = pending.split(b"\0")
+        yield from records
+        chunk = stdout.read1(_GIT_READ_SIZE)
+        if not chunk:
+            if pending:
+                yield pending
+            return
+        pending += chunk
+
+
+def _unstated(records: Iterable[bytes]) -> Iterator[Tuple[bytes, None, None]]:
+    """Pair each record with an unknown inode and size."""
+    for record in records:
+        yield record, None, None
+
+
+def _with_index_stats(records: Iterable[bytes]) -> Iterator[Tuple[bytes, int, int]]:
+    """Pair each ``ls-files --debug`` record with the inode and size printed after it.
+
+    The stat data follows the NUL that ends a record, so each piece after
+    the first starts with the data of the previous record.
+    """
+    record: Union[bytes, None] = None
+    for piece in records:
+        if record is not None:
+            stats = _GIT_DEBUG.match(piece)
+            if stats is None:
+                raise _GitDebugFormatError("Unexpected output from git ls-files --debug")
+            yield record, int(stats[1]), int(stats[2])
+            piece = piece[stats.end() :]
+        record = piece or None
+
+
+def schedule_files(
+    paths: Iterable[Union[Path, FileEntry]], schedule: Schedule, window: Union[int, None] = None
+) -> Iterator[Path]:
+    """Reorder *paths* according to *schedule*.
+
+    Locality ordering groups files by directory and orders each directory by
+    inode number, which approximates on-disk order on most filesystems and
+    turns scattered reads into mostly sequential ones on spinning disks and
+    network storage. Largest-first ordering starts the biggest files first,
+    so no long file is left running alone at the end of the run.
+
+    The inode numbers and sizes of :class:`FileEntry` items are used as
+    discovered; only plain paths, such as those given on the command line,
+    are stat'ed. Files that cannot be stat'ed go last in their directory.
+
+    Args:
+        paths: Paths or discovered files to reorder.
+        schedule: Ordering to apply. ``Schedule.INPUT`` leaves *paths* as is.
+        window: Reorder consecutive chunks of this many paths, keeping memory
+            bounded for endless streams; None reorders all paths at once.
+
+    Yields:
+        The paths of *paths*, in scheduled order.
+    """
+    if schedule is Schedule.INPUT:
+        for file in paths:
+            yield _path_of(file)
+        return
+
+    source = iter(paths)
+    while True:
+        chunk = [_with_schedule_stats(file, schedule) for file in islice(source, window)]
+        if not chunk:
+            return
+        keyed = [(_schedule_key(entry, schedule), entry.path) for entry in chunk]
+        keyed.sort(key=lambda item: item[0])
+        for _, path in keyed:
+            yield path
+
+
+def _with_schedule_stats(file: Union[Path, FileEntry], schedule: Schedule) -> FileEntry:
+    """Return *file* as an entry with what *schedule* needs, stat'ing only if it is missing."""
+    entry = file if isinstance(file, FileEntry) else FileEntry(file)
+    if entry.inode is None or (schedule is Schedule.LARGEST_FIRST and entry.size is None):
+        try:
+            st = os.stat(entry.path)
+        except OSError:
+            return entry
+        entry = FileEntry(entry.path, st.st_ino, st.st_size)
+    return entry
+
+
+def _schedule_key(entry: FileEntry, schedule: Schedule) -> Tuple[int, str, int, int]:
+    """Return the sort key of *entry*; files of unknown inode go last in their directory."""
+    size = -(entry.size or 0) if schedule is Schedule.LARGEST_FIRST else 0
+    unknown = entry.inode is None
+    return size, str(entry.path.parent), unknown, entry.inode or 0
+
+
+def shard_files(
+    paths: Iterable[_File],
+    project_root: Path,
+    index: int,
+    count: int,
+    balance_by_size: bool = False,
+) -> Iterator[_File]:
+    """Yield the paths of *paths* that belong to shard *index* of *count*.
+
+    Files are assigned by a stable hash of their path relative to
+    *project_root*, so every machine splits the same tree the same way and
+    the shards are disjoint and together cover all files.
+
+    Args:
+        paths: Paths or discovered files to split; the sizes of discovered
+            files are used as they are.
+        project_root: Root the hashed relative paths are computed from.
+        index: 1-based number of the shard to keep.
+        count: Total number of shards.
+        balance_by_size: Assign files greedily, largest first, to the shard
+            with the fewest bytes so far instead of by hash. This evens out
+            shard sizes but reads all paths before yielding the first one.
+
+    Yields:
+        The paths of the selected shard, in their original order.
+    """
+    if not 1 <= index <= count:
+        raise ValueError(f"Shard index must be between 1 and {count}, got {index}")
+
+    if balance_by_size:
+        yield from _balanced_shard(list(paths), project_root, index, count)
+        return
+
+    for file in paths:
+        if _shard_of(_shard_name(_path_of(file), project_root), count) == index - 1:
+            yield file
+
+
+def _shard_name(path: Path, project_root: Path) -> str:
+    """Return the machine-independent name of *path* used to assign its shard."""
+    try:
+        return path.relative_to(project_root).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+
+def _shard_of(name: str, count: int) -> int:
+    """Return the 0-based shard of *name*; stable across processes and machines."""
+    digest = hashlib.blake2b(name.encode("utf-8", "surrogateescape"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % count
+
+
+def _balanced_shard(paths: List[_File], project_root: Path, index: int, count: int) -> List[_File]:
+    """Return the paths that a greedy largest-first assignment puts in shard *index*."""
+    sized = []
+    for position, file in enumerate(paths):
+        path = _path_of(file)
+        size = file.size if isinstance(file, FileEntry) else None
+        if size is None:
+            try:
+                size = os.stat(path).st_size
+            except OSError:
+                size = 0
+        # Ties are broken by name, so every machine makes the same assignment
+        sized.append((-size, _shard_name(path, project_root), position))
+    sized.sort()
+
+    # Count every file as at least one byte, so empty files are spread too
+    loads = [(0, shard) for shard in range(count)]
+    mine: Set[int] = set()
+    for neg_size, _, position in sized:
+        load, shard = heapq.heappop(loads)
+        heapq.heappush(loads, (load + max(-neg_size, 1), shard))
+        if shard == index - 1:
+            mine.add(position)
+    return [file for position, file in enumerate(paths) if position in mine]
+
+
+def prefetch(paths: Iterable[Path], maxsize: int = DISCOVERY_QUEUE_SIZE) -> Iterator[Path]:
+    """Iterate *paths* on a background thread, keeping at most *maxsize* ahead.
+
+    The producer thread starts with the first ``next()`` call and stops
+    when the returned iterator is exhausted or closed. Errors raised while
+    iterating *paths* are re-raised to the consumer.
+
+    Args:
+        paths: Path iterator to run in the background, e.g. a directory walk.
+        maxsize: Maximum number of paths buffered ahead of the consumer.
+
+    Yields:
+        The paths of *paths*, in order.
+    """
+    buffer: queue.Queue[Union[Path, Exception, object]] = queue.Queue(maxsize)
+    stop = threading.Event()
+
+    def produce() -> None:
+        try:
+            for path in paths:
+                if not _put(buffer, path, stop):
+                    return
+        except Exception as e:
+            _put(buffer, e, stop)
+            return
+        _put(buffer, _DONE, stop)
+
+    producer = threading.Thread(target=produce, name="path-comment-discovery", daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield cast(Path, item)
+    finally:
+        stop.set()
+
+
+def _put(buffer: queue.Queue, item: object, stop: threading.Event) -> bool:
+    """Put *item* on *buffer* unless *stop* is set first; return whether it was put."""
+    while not stop.is_set():
+        try:
+            buffer.put(item, timeout=_PUT_TIMEOUT)
+            return True
+        except queue.Full:
+            continue
+    return False
@@ -8,15 +8,24 @@ to prevent data corruption.
 
 from __future__ import annotations
 
+import codecs
+import ctypes
+import errno
 import os
+import sys
 import tempfile
-from dataclasses import dataclass
+import threading
+import time
+from dataclasses import dataclass, field
 from enum import Enum
 from pathlib import Path
+from typing import Callable, Iterable, List, Sequence, Set, Tuple, Union
 
 import chardet
 from rich.console import Console
 
+from .config import Durability
+
 console = Console()
 
 
@@ -33,6 +42,115 @@ class FileHandlingError(Exception):
     pass
 
 
+def _load_syncfs() -> Callable[[int], int] | None:
+    """Return libc's syncfs() on Linux, or None where it is unavailable."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        return ctypes.CDLL(None, use_errno=True).syncfs
+    except (OSError, AttributeError):
+        return None
+
+
+_syncfs = _load_syncfs()
+
+
+class SyncPolicy:
+    """Apply a :class:`Durability` level to file writes and time the syncing.
+
+    A single policy is shared by every FileHandler of a run, possibly from
+    several threads. Under ``BATCH`` nothing is synced per file; call
+    :meth:`flush` once all files have been written.
+
+    Attributes:
+        durability: The durability level applied to writes.
+        sync_seconds: Total time spent syncing so far.
+    """
+
+    def __init__(self, durability: Durability = Durability.FSYNC) -> None:
+        """Initialize the policy.
+
+        Args:
+            durability: The durability level to apply.
+        """
+        self.durability = durability
+        self.sync_seconds = 0.0
+        self._written: Set[Path] = set()
+        self._lock = threading.Lock()
+
+    def file_written(self, fd: int, file_path: Path) -> None:
+        """Handle the fully written temporary file *fd* about to replace *file_path*."""
+        if self.durability is Durability.FSYNC:
+            start = time.perf_counter()
+            os.fsync(fd)
+            self._add_time(time.perf_counter() - start)
+        elif self.durability is Durability.BATCH:
+            with self._lock:
+                self._written.add(file_path)
+
+    def flush(self) -> None:
+        """Make every file written under ``BATCH`` durable.
+
+        Uses one syncfs() per touched filesystem on Linux, a system-wide
+        sync() on other POSIX systems, and per-file fsync() elsewhere.
+
+        Raises:
+            FileHandlingError: If syncing fails.
+        """
+        with self._lock:
+            written, self._written = self._written, set()
+        if not written:
+            return
+
+        start = time.perf_counter()
+        try:
+            if _syncfs is not None:
+                # One directory per filesystem is enough to name it
+                directories = {os.stat(path.parent).st_dev: path.parent for path in written}
+                for directory in directories.values():
+                    fd = os.open(directory, os.O_RDONLY)
+                    try:
+                        if _syncfs(fd) != 0:
+                            err = ctypes.get_errno()
+                            raise OSError(err, os.strerror(err), str(directory))
+                    finally:
+                        os.close(fd)
+            elif hasattr(os, "sync"):
+                os.sync()
+            else:
+                for path in written:
+                    fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+                    try:
+                        os.fsync(fd)
+                    finally:
+                        os.close(fd)
+        except OSError as e:
+            raise FileHandlingError(f"Failed to sync written files: {e}") from e
+        finally:
+            self._add_time(time.perf_counter() - start)
+
+    def drain(self) -> Tuple[float, Set[Path]]:
+        """Hand over the sync time and pending batched writes recorded so far.
+
+        Used by worker processes to report to the policy of the parent,
+        see :meth:`merge`.
+        """
+        with self._lock:
+            state = (self.sync_seconds, self._written)
+            self.sync_seconds, self._written = 0.0, set()
+        return state
+
+    def merge(self, seconds: float, written: Set[Path]) -> None:
+        """Take over the state drained from a worker process's policy."""
+        with self._lock:
+            self.sync_seconds += seconds
+            self._written |= written
+
+    def _add_time(self, seconds: float) -> None:
+        with self._lock:
+            self.sync_seconds += seconds
+
+
 @dataclass
 class FileInfo:
     """Information about a file's content, encoding, and line endings.
@@ -42,12 +160,271 @@ class FileInfo:
         encoding: The detected or used encoding.
         line_ending: The detected line ending type.
         original_path: The original file path.
+        raw: The undecoded bytes the content was decoded from.
     """
 
     content: str
     encoding: str
     line_ending: LineEnding
     original_path: Path
+    raw: bytes = field(default=b"", repr=False)
+
+
+@dataclass
+class RawFileInfo:
+    """Undecoded bytes of a file, or of its leading prefix, and their characteristics.
+
+    Attributes:
+        data: The file's bytes, or only a leading prefix of them.
+        encoding: The detected encoding of the bytes.
+        line_ending: The detected line ending type.
+        original_path: The original file path.
+        size: The size of the whole file in bytes.
+        complete: False when *data* is only a leading prefix of the file.
+    """
+
+    data: bytes = field(repr=False)
+    encoding: str
+    line_ending: LineEnding
+    original_path: Path
+    size: int
+    complete: bool = True
+
+
+# Number of leading bytes inspected when detecting line endings
+LINE_ENDING_SAMPLE_SIZE = 8192
+
+# Chunk size used when validating UTF-8 without decoding a whole file at once
+_UTF8_VALIDATION_CHUNK = 1 << 16
+
+# Most bytes handed to the encoding detector; chardet's run time grows with
+# its input, so it only sees a sample starting at the first non-UTF-8 byte
+ENCODING_SAMPLE_SIZE = 64 * 1024
+
+# Confidence an encoding detector must exceed before its guess is used
+_MIN_DETECTION_CONFIDENCE = 0.7
+
+# Byte order marks that identify an encoding outright (UTF-32 first, as the
+# UTF-32-LE mark starts with the UTF-16-LE one)
+_BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+# Guesses the encoding of a byte sample: returns the encoding name (None if
+# unknown) and a confidence between 0 and 1, like chardet.detect() does
+EncodingDetector = Callable[[bytes], Tuple[Union[str, None], float]]
+
+# Files at least this large are rewritten by streaming their unchanged tail
+# from disk (see FileHandler.write_bytes) instead of being read into memory
+STREAM_REWRITE_THRESHOLD = 8 * 1024 * 1024
+
+# Largest byte count passed to a single copy_file_range()/sendfile() call
+_KERNEL_COPY_MAX = 1 << 30
+
+# Buffer size of the read/write loop used when no kernel copy is available
+_COPY_CHUNK = 1 << 20
+
+# Errors meaning a kernel copy primitive does not support these descriptors
+_COPY_UNSUPPORTED_ERRNOS = {
+    errno.EXDEV,
+    errno.ENOSYS,
+    errno.EINVAL,
+    errno.EOPNOTSUPP,
+    errno.ENOTSUP,
+}
+
+# Prefix read by header checks: enough for a shebang plus a header
+# line, and matching the line ending sample so both reads agree on it
+HEAD_READ_SIZE = LINE_ENDING_SAMPLE_SIZE
+
+
+def is_ascii_compatible(encoding: str) -> bool:
+    """Return whether *encoding* writes shebangs and line breaks as plain ASCII bytes.
+
+    UTF-16 and UTF-32 are not, so their bytes cannot be searched for them directly.
+    """
+    try:
+        return codecs.encode("#!\r\n", encoding) == b"#!\r\n"
+    except (LookupError, UnicodeError):
+        return False
+
+
+def _line_ending_from_bytes(data: bytes, encoding: str = "utf-8") -> LineEnding:
+    """Detect the line ending type from the leading bytes of *data*."""
+    # Look for CRLF first (more specific); defaults to LF for empty data
+    # or data without any line endings
+    if is_ascii_compatible(encoding):
+        found = data.find(b"\r\n", 0, LINE_ENDING_SAMPLE_SIZE) != -1
+    else:
+        sample = data[:LINE_ENDING_SAMPLE_SIZE].decode(encoding, errors="ignore")
+        found = "\r\n" in sample
+    return LineEnding.CRLF if found else LineEnding.LF
+
+
+def _utf8_error_offset(
+    chunks: Iterable[Union[bytes, memoryview]], final: bool = True
+) -> int | None:
+    """Return the offset of the first byte that is not valid UTF-8, or None.
+
+    The bytes are validated chunk by chunk as they come, so a file can be
+    checked without holding it in memory. With *final* False, a multi-byte
+    sequence cut off at the end is accepted, as expected for a prefix of a
+    longer file.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    offset = 0
+    try:
+        for chunk in chunks:
+            decoder.decode(chunk)
+            offset += len(chunk)
+        decoder.decode(b"", final=final)
+    except UnicodeDecodeError as e:
+        # e.start indexes the bytes held back from earlier chunks plus this one
+        return offset - len(decoder.getstate()[0]) + e.start
+    return None
+
+
+def _split(data: bytes) -> Iterable[memoryview]:
+    """Yield *data* in validation-sized views without copying it."""
+    view = memoryview(data)
+    for start in range(0, len(view), _UTF8_VALIDATION_CHUNK):
+        yield view[start : start + _UTF8_VALIDATION_CHUNK]
+
+
+def _sample_start(error_offset: int, size: int) -> int:
+    """Return where the detection sample of a *size*-byte file starts.
+
+    The sample covers the first non-UTF-8 byte at *error_offset*, since an
+    ASCII-only stretch says nothing about the encoding, and is as long as the
+    file allows. It is aligned so UTF-16/32 code units are not split.
+    """
+    start = min(error_offset, max(size - ENCODING_SAMPLE_SIZE, 0))
+    return start - start % 4
+
+
+def _write_chunks(fd: int, chunks: Sequence[Union[bytes, memoryview]]) -> None:
+    """Write all *chunks* to *fd*, gathering them into writev() calls where available."""
+    views = [memoryview(chunk) for chunk in chunks if len(chunk)]
+    while views:
+        if hasattr(os, "writev"):
+            written = os.writev(fd, views)
+        else:  # Windows
+            written = os.write(fd, views[0])
+        # Drop fully written chunks and trim a partially written one
+        while views and written >= len(views[0]):
+            written -= len(views.pop(0))
+        if written:
+            views[0] = views[0][written:]
+
+
+def _copy_file_range(src_fd: int, dst_fd: int, offset: int, count: int) -> int:
+    return os.copy_file_range(src_fd, dst_fd, count, offset)
+
+
+def _sendfile(src_fd: int, dst_fd: int, offset: int, count: int) -> int:
+    return os.sendfile(dst_fd, src_fd, offset, count)
+
+
+# Kernel-level copy primitives, in order of preference
+_KERNEL_COPIES: List[Callable[[int, int, int, int], int]] = []
+if hasattr(os, "copy_file_range"):
+    _KERNEL_COPIES.append(_copy_file_range)
+if sys.platform.startswith("linux") and hasattr(os, "sendfile"):
+    # Only Linux accepts a regular file as the sendfile() destination
+    _KERNEL_COPIES.append(_sendfile)
+
+
+def _copy_tail(src_fd: int, dst_fd: int, offset: int) -> None:
+    """Copy *src_fd* from *offset* to its end onto *dst_fd* at its current position.
+
+    copy_file_range() or sendfile() keep the data inside the kernel; where
+    neither is usable a bounded read/write loop is used, so memory stays
+    constant however large the file is.
+    """
+    end = os.fstat(src_fd).st_size
+    for kernel_copy in _KERNEL_COPIES:
+        try:
+            while offset < end:
+                copied = kernel_copy(src_fd, dst_fd, offset, min(end - offset, _KERNEL_COPY_MAX))
+                if not copied:
+                    return  # the source shrank underneath us
+                offset += copied
+            return
+        except OSError as e:
+            if e.errno not in _COPY_UNSUPPORTED_ERRNOS:
+                raise
+            # Unsupported here; carry on from the current offset with the next method
+
+    os.lseek(src_fd, offset, os.SEEK_SET)
+    while chunk := os.read(src_fd, _COPY_CHUNK):
+        _write_chunks(dst_fd, [chunk])
+
+
+def chardet_detector(sample: bytes) -> Tuple[str | None, float]:
+    """Detect the encoding of *sample* with chardet (the default detector)."""
+    result = chardet.detect(sample)
+    return result["encoding"], result["confidence"]
+
+
+_encoding_detector: EncodingDetector = chardet_detector
+
+
+def set_encoding_detector(detector: EncodingDetector | None) -> None:
+    """Replace the detector used for files that are not UTF-8.
+
+    Faster backends (cchardet, charset-normalizer, ...) can be plugged in by
+    wrapping them in a function with the :data:`EncodingDetector` signature.
+
+    Args:
+        detector: The new detector, or None to restore chardet.
+    """
+    global _encoding_detector
+    _encoding_detector = detector or chardet_detector
+
+
+def _fallback_encoding(head: bytes, sample: bytes, file_path: Path) -> str:
+    """Guess the encoding of a file that is known not to be UTF-8.
+
+    Args:
+        head: The file's first bytes, checked for a byte order mark.
+        sample: A bounded sample of the file, see :func:`_sample_start`.
+        file_path: The file, named in warnings.
+    """
+    for bom, bom_encoding in _BOMS:
+        if head.startswith(bom):
+            return bom_encoding
+
+    try:
+        detected_encoding, confidence = _encoding_detector(sample)
+        if detected_encoding and confidence > _MIN_DETECTION_CONFIDENCE:
+            codecs.lookup(detected_encoding)
+            console.print(
+                f"[yellow]Warning:[/yellow] Using {detected_encoding} encoding "
+                f"for {file_path} (confidence: {confidence:.2f})"
+            )
+            return detected_encoding
+        else:
+            # Last resort - try latin-1 which can decode any byte sequence
+            console.print(
+                f"[yellow]Warning:[/yellow] Low confidence encoding detection "
+                f"for {file_path}, using latin-1 as fallback"
+            )
+            return "latin-1"
+    except Exception as e:
+        console.print(
+            f"[yellow]Warning:[/yellow] Encoding detection failed for {file_path}, "
+            f"using latin-1 as fallback: {e}"
+        )
+        return "latin-1"
+
+
+def _detect_in_bytes(data: bytes, error_offset: int, file_path: Path) -> str:
+    """Guess the encoding of *data* whose first non-UTF-8 byte is at *error_offset*."""
+    start = _sample_start(error_offset, len(data))
+    return _fallback_encoding(data[:4], data[start : start + ENCODING_SAMPLE_SIZE], file_path)
 
 
 def detect_line_ending(file_path: Path) -> LineEnding:
@@ -65,26 +442,19 @@ def detect_line_ending(file_path: Path) -> LineEnding:
     try:
         with file_path.open("rb") as f:
             # Read first chunk to detect line endings
-            chunk = f.read(8192)
-
-        if not chunk:
-            return LineEnding.LF  # Default for empty files
-
-        # Look for CRLF first (more specific)
-        if b"\r\n" in chunk:
-            return LineEnding.CRLF
-        elif b"\n" in chunk:
-            return LineEnding.LF
-        else:
-            return LineEnding.LF  # Default when no line endings found
-
+            chunk = f.read(LINE_ENDING_SAMPLE_SIZE)
     except OSError as e:
         raise FileHandlingError(f"Failed to detect line endings in {file_path}: {e}") from e
 
+    return _line_ending_from_bytes(chunk)
+
 
 def detect_encoding(file_path: Path) -> str:
     """Detect the encoding of a file with UTF-8 preference and chardet fallback.
 
+    The file is validated as UTF-8 while it is read in chunks; only a bounded
+    sample from the first invalid byte on is passed to the encoding detector.
+
     Args:
         file_path: Path to the file to analyze.
 
@@ -96,60 +466,47 @@ def detect_encoding(file_path: Path) -> str:
     """
     try:
         with file_path.open("rb") as f:
-            raw_data = f.read()
-
-        if not raw_data:
-            return "utf-8"  # Default for empty files
-
-        # First, try UTF-8
-        try:
-            raw_data.decode("utf-8")
-            return "utf-8"
-        except UnicodeDecodeError:
-            pass
-
-        # Fallback to chardet
-        try:
-            result = chardet.detect(raw_data)
-            if result and result["encoding"] and result["confidence"] > 0.7:
-                detected_encoding: str = result["encoding"]
-                console.print(
-                    f"[yellow]Warning:[/yellow] Using {detected_encoding} encoding "
-                    f"for {file_path} (confidence: {result['confidence']:.2f})"
-                )
-                return detected_encoding
-            else:
-                # Last resort - try latin-1 which can decode any byte sequence
-                console.print(
-                    f"[yellow]Warning:[/yellow] Low confidence encoding detection "
-                    f"for {file_path}, using latin-1 as fallback"
-                )
-                return "latin-1"
-        except Exception as e:
-            console.print(
-                f"[yellow]Warning:[/yellow] Chardet failed for {file_path}, "
-                f"using latin-1 as fallback: {e}"
-            )
-            return "latin-1"
-
+            error_offset = _utf8_error_offset(iter(lambda: f.read(_UTF8_VALIDATION_CHUNK), b""))
+            # Empty files and valid UTF-8 both report UTF-8
+            if error_offset is None:
+                return "utf-8"
+            f.seek(0)
+            head = f.read(4)
+            f.seek(_sample_start(error_offset, os.fstat(f.fileno()).st_size))
+            sample = f.read(ENCODING_SAMPLE_SIZE)
     except OSError as e:
         raise FileHandlingError(f"Failed to detect encoding for {file_path}: {e}") from e
 
+    return _fallback_encoding(head, sample, file_path)
+
 
 class FileHandler:
     """Handles safe file operations with encoding and line ending preservation.
 
     This class provides methods for reading and writing files while
     preserving their original encoding and line ending characteristics.
+
+    Attributes:
+        file_path: The resolved path of the file.
+        sync: Durability policy for writes.
+        encoding: The encoding found by the last read, reused by later reads
+            and writes so a file's encoding is only ever detected once.
     """
 
-    def __init__(self, file_path: Path) -> None:
+    def __init__(
+        self, file_path: Path, sync: SyncPolicy | None = None, resolved: bool = False
+    ) -> None:
         """Initialize the file handler.
 
         Args:
             file_path: Path to the file to handle.
+            sync: Durability policy for writes; every write is fsynced if None.
+            resolved: Whether *file_path* is already resolved, so writes
+                replace the file itself rather than a symlink to it.
         """
-        self.file_path = file_path.resolve()
+        self.file_path = file_path if resolved else file_path.resolve()
+        self.sync = sync
+        self.encoding: str | None = None
 
     def read(self) -> FileInfo:
         """Read the file and detect its characteristics.
@@ -160,36 +517,103 @@ class FileHandler:
         Raises:
             FileHandlingError: If the file cannot be read.
         """
-        if not self.file_path.exists():
-            raise FileHandlingError(f"Failed to read file: {self.file_path} does not exist")
+        # Single read: line endings, encoding and content all come from this buffer
+        raw_data, _ = self._read_bytes()
+        return self._info_from_complete_bytes(raw_data)
 
-        try:
-            # Detect characteristics first - this also validates file access
-            line_ending = detect_line_ending(self.file_path)
-            encoding = detect_encoding(self.file_path)
+    def read_raw(self, size: int = -1) -> RawFileInfo:
+        """Read the file's bytes without decoding them.
+
+        With a non-negative *size* only that many leading bytes are read,
+        which is enough to inspect a shebang and a header line without
+        paying for the rest of the file; ``complete`` is then False when the
+        file is longer. The encoding of a prefix that is not valid UTF-8 is
+        detected from the prefix alone.
+
+        Args:
+            size: Maximum number of bytes to read, or -1 for the whole file.
+
+        Returns:
+            RawFileInfo object with the bytes, encoding, and line ending information.
 
-            # Read content preserving original line endings
+        Raises:
+            FileHandlingError: If the file cannot be read.
+        """
+        raw_data, file_size = self._read_bytes(size)
+        complete = len(raw_data) == file_size
+        encoding = self._encoding_of(raw_data, complete)
+
+        return RawFileInfo(
+            data=raw_data,
+            encoding=encoding,
+            line_ending=_line_ending_from_bytes(raw_data, encoding),
+            original_path=self.file_path,
+            size=file_size,
+            complete=complete,
+        )
+
+    def _read_bytes(self, size: int = -1) -> Tuple[bytes, int]:
+        """Read up to *size* bytes (the whole file by default) in one open.
+
+        Returns the bytes read and the size of the whole file; the latter
+        costs an extra fstat() only when the read stopped short of the end.
+        """
+        try:
             with self.file_path.open("rb") as f:
-                raw_data = f.read()
+                raw_data = f.read(size)
+                if size < 0 or len(raw_data) < size:
+                    return raw_data, len(raw_data)
+                return raw_data, os.fstat(f.fileno()).st_size
+        except FileNotFoundError:
+            raise FileHandlingError(
+                f"Failed to read file: {self.file_path} does not exist"
+            ) from None
+        except OSError as e:
+            raise FileHandlingError(f"Failed to read file {self.file_path}: {e}") from e
 
-            # Decode with detected encoding
-            content = raw_data.decode(encoding)
+    def _encoding_of(self, raw_data: bytes, complete: bool) -> str:
+        """Return the encoding of *raw_data*, all or a prefix of the file, and remember it."""
+        error_offset = _utf8_error_offset(_split(raw_data), final=complete)
+        if error_offset is None:
+            encoding = "utf-8"
+        elif self.encoding not in (None, "utf-8"):
+            encoding = self.encoding  # detected by an earlier read of this file
+        else:
+            encoding = _detect_in_bytes(raw_data, error_offset, self.file_path)
+        self.encoding = encoding
+        return encoding
 
-            return FileInfo(
-                content=content,
-                encoding=encoding,
-                line_ending=line_ending,
-                original_path=self.file_path,
-            )
+    def _info_from_complete_bytes(self, raw_data: bytes) -> FileInfo:
+        """Build a FileInfo from the full contents of the file."""
+        encoding = self._encoding_of(raw_data, complete=True)
+        line_ending = _line_ending_from_bytes(raw_data, encoding)
 
-        except (OSError, UnicodeError) as e:
+        try:
+            try:
+                content = raw_data.decode(encoding)
+            except UnicodeDecodeError:
+                if encoding == "utf-8":
+                    raise
+                # The guess only saw a sample of the file
+                console.print(
+                    f"[yellow]Warning:[/yellow] {self.file_path} is not valid {encoding}, "
+                    f"using latin-1 as fallback"
+                )
+                encoding = self.encoding = "latin-1"
+                content = raw_data.decode(encoding)
+        except (LookupError, UnicodeError) as e:
             raise FileHandlingError(f"Failed to read file {self.file_path}: {e}") from e
-        except FileHandlingError:
-            # Re-raise our custom errors with better context
-            raise FileHandlingError(f"Failed to read file {self.file_path}") from None
 
-    def write(self, content: str, line_ending: LineEnding) -> None:
-        """Write content to the file atomically, preserving line endings.
+        return FileInfo(
+            content=content,
+            encoding=encoding,
+            line_ending=line_ending,
+            original_path=self.file_path,
+            raw=raw_data,
+        )
+
+    def write(self, content: str, line_ending: LineEnding, encoding: str | None = None) -> None:
+        """Write content to the file atomically, preserving line endings and encoding.
 
         This method uses atomic writes (temporary file + rename) to ensure
         data integrity even if the process is interrupted.
@@ -197,19 +621,50 @@ class FileHandler:
         Args:
             content: The content to write.
             line_ending: The line ending type to use.
+            encoding: The encoding to write; defaults to the encoding found
+                by the last read, or UTF-8 if the file was not read.
 
         Raises:
             FileHandlingError: If the file cannot be written.
         """
+        # Normalize line endings in content
+        normalized_content = self._normalize_line_endings(content, line_ending)
+        encoding = encoding or self.encoding or "utf-8"
         try:
-            # Normalize line endings in content
-            normalized_content = self._normalize_line_endings(content, line_ending)
+            data = normalized_content.encode(encoding)
+        except (LookupError, UnicodeError) as e:
+            raise FileHandlingError(f"Failed to write file {self.file_path}: {e}") from e
+        self.write_bytes([data])
+
+    def write_bytes(
+        self, chunks: Sequence[Union[bytes, memoryview]], tail_from: int | None = None
+    ) -> None:
+        """Atomically replace the file with the concatenation of *chunks*.
+
+        The chunks are written as-is, so slices of the original buffer can be
+        passed as memoryviews and reach the disk without being copied. With
+        *tail_from*, the file's current content from that offset on follows
+        the chunks; it is copied at kernel level, so rewriting a huge file
+        only needs its head in memory.
+
+        Args:
+            chunks: The byte chunks that make up the new content, in order.
+            tail_from: Offset in the current file from which to append its
+                remaining content after the chunks.
 
+        Raises:
+            FileHandlingError: If the file cannot be written.
+        """
+        try:
             # Create temporary file in the same directory for atomic operation
             temp_fd = None
             temp_path = None
+            src_fd = None
 
             try:
+                if tail_from is not None:
+                    src_fd = os.open(self.file_path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+
                 # Create temporary file
                 temp_fd, temp_path_str = tempfile.mkstemp(
                     suffix=".tmp",
@@ -218,12 +673,18 @@ class FileHandler:
                 )
                 temp_path = Path(temp_path_str)
 
-                # Write to temporary file in binary mode for precise line ending control
-                with os.fdopen(temp_fd, "wb") as f:
-                    f.write(normalized_content.encode("utf-8"))
-                    f.flush()
-                    os.fsync(f.fileno())
-                temp_fd = None  # Closed by context manager
+                # Write the chunks straight to the descriptor in a single gather
+                _write_chunks(temp_fd, chunks)
+                if src_fd is not None and tail_from is not None:
+                    _copy_tail(src_fd, temp_fd, tail_from)
+                    os.close(src_fd)
+                    src_fd = None
+                if self.sync is None:
+                    os.fsync(temp_fd)
+                else:
+                    self.sync.file_written(temp_fd, self.file_path)
+                os.close(temp_fd)
+                temp_fd = None
 
                 # Copy original file permissions if it exists
                 if self.file_path.exists():
@@ -241,6 +702,8 @@ class FileHandler:
 
             except Exception:
                 # Clean up temporary file on error
+                if src_fd is not None:
+                    os.close(src_fd)
                 if temp_fd is not None:
                     try:
                         os.close(temp_fd)
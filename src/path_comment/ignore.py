@@ -0,0 +1,259 @@
+# src/path_comment/ignore.py
+"""Match paths against ``.gitignore`` rules.
+
+Each ``.gitignore`` file is compiled once into a single regular expression
+covering all of its rules, so checking a path costs one regex match per
+ignore file that applies to it rather than one match per pattern. Discovery
+keeps the compiled rules of every directory on its walk stack, so each file
+is read only once, when its directory is listed.
+"""
+
+from __future__ import annotations
+
+import re
+import string
+from pathlib import Path
+from typing import Iterable, List, Tuple, Union
+
+# Name of the per-directory ignore file
+GITIGNORE = ".gitignore"
+
+# Regex set contents of the POSIX character classes allowed in "[...]"
+_POSIX_CLASSES = {
+    "alnum": "a-zA-Z0-9",
+    "alpha": "a-zA-Z",
+    "blank": " \\t",
+    "cntrl": "\\x00-\\x1f\\x7f",
+    "digit": "0-9",
+    "graph": "!-~",
+    "lower": "a-z",
+    "print": " -~",
+    "punct": "".join(re.escape(c) for c in string.punctuation),
+    "space": " \\t\\n\\r\\f\\v",
+    "upper": "A-Z",
+    "xdigit": "0-9A-Fa-f",
+}
+
+
+class IgnoreRules:
+    """The rules of one ignore file, compiled into a combined matcher.
+
+    Rules follow the ``.gitignore`` format: blank lines and ``#`` comments
+    are skipped, ``!`` re-includes what an earlier rule excluded, a trailing
+    ``/`` matches directories only, and a rule containing any other ``/`` is
+    anchored to the directory of the ignore file. ``*``, ``?`` and ``[...]``
+    do not match ``/``; ``**`` matches across directories. Later rules take
+    precedence over earlier ones. A rule that cannot be compiled is
+    skipped, as git skips a rule it cannot match.
+    """
+
+    def __init__(self, lines: Iterable[str]) -> None:
+        """Compile *lines* of an ignore file.
+
+        Args:
+            lines: Lines of the ignore file, with or without line endings.
+        """
+        # (regex, negated, directory only), in file order
+        rules: List[Tuple[str, bool, bool]] = []
+        for line in lines:
+            rule = _parse_rule(line)
+            if rule is None:
+                continue
+            try:
+                re.compile(rule[0], re.DOTALL)
+            except re.error:
+                continue  # one bad line must not disable the whole file
+            rules.append(rule)
+        self.rule_count = len(rules)
+        self._negated = [negated for _, negated, _ in reversed(rules)]
+        self._any = _combine([regex for regex, _, _ in reversed(rules)])
+        # Directory-only rules never match files; they stay in as never-matching
+        # alternatives, so group numbers line up with self._negated
+        self._files = _combine(
+            [regex if not dir_only else "(?!)" for regex, _, dir_only in reversed(rules)]
+        )
+
+    @classmethod
+    def from_file(cls, path: Path) -> Union[IgnoreRules, None]:
+        """Read and compile the ignore file at *path*.
+
+        Returns:
+            The compiled rules, or None if the file is unreadable or has none.
+        """
+        try:
+            text = path.read_text(encoding="utf-8", errors="surrogateescape")
+        except OSError:
+            return None
+        rules = cls(text.splitlines())
+        return rules if rules.rule_count else None
+
+    def match(self, relative_path: str, is_dir: bool) -> Union[bool, None]:
+        """Decide whether *relative_path* is ignored by these rules.
+
+        Args:
+            relative_path: Path relative to the ignore file's directory, with
+                ``/`` separators.
+            is_dir: Whether the path is a directory.
+
+        Returns:
+            True if the last matching rule ignores the path, False if it
+            re-includes it, None if no rule matches.
+        """
+        pattern = self._any if is_dir else self._files
+        if pattern is None:
+            return None
+        found = pattern.match(relative_path)
+        if found is None or found.lastindex is None:
+            return None
+        return not self._negated[found.lastindex - 1]
+
+
+# Rules that apply to a directory: the directory's path relative to the
+# project root, with a trailing "/" ("" for the root), and its compiled rules
+IgnoreChain = Tuple[Tuple[str, IgnoreRules], ...]
+
+
+def is_ignored(chain: IgnoreChain, relative_path: str, is_dir: bool) -> bool:
+    """Return whether *relative_path*, relative to the project root, is ignored by *chain*.
+
+    Rules of deeper directories take precedence, as in git.
+    """
+    for prefix, rules in reversed(chain):
+        decision = rules.match(relative_path[len(prefix) :], is_dir)
+        if decision is not None:
+            return decision
+    return False
+
+
+def _combine(regexes: List[str]) -> Union[re.Pattern, None]:
+    """Join *regexes* into one pattern; the first alternative to match sets ``lastindex``."""
+    if not regexes:
+        return None
+    alternatives = "|".join(f"({regex})" for regex in regexes)
+    return re.compile(f"(?:{alternatives})\\Z", re.DOTALL)
+
+
+def _parse_rule(line: str) -> Union[Tuple[str, bool, bool], None]:
+    """Turn one ignore-file line into ``(regex, negated, directory only)``, or None."""
+    line = line.rstrip("\r\n")
+    # Trailing spaces are ignored unless escaped
+    while line.endswith(" ") and not line.endswith("\\ "):
+        line = line[:-1]
+    if not line or line.startswith("#"):
+        return None
+
+    negated = line.startswith("!")
+    if negated:
+        line = line[1:]
+    elif line.startswith("\\!") or line.startswith("\\#"):
+        line = line[1:]
+
+    dir_only = line.endswith("/")
+    line = line.rstrip("/")
+    if not line:
+        return None
+
+    # A slash anywhere but at the end anchors the rule to its directory
+    anchored = "/" in line
+    line = line.lstrip("/")
+    regex = _translate(line)
+    if not anchored:
+        regex = "(?:.*/)?" + regex
+    return "(?:" + regex + ")", negated, dir_only
+
+
+def _translate(pattern: str) -> str:
+    """Translate a gitignore glob into a regex matching a whole relative path."""
+    parts: List[str] = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith("**/", i) and (i == 0 or pattern[i - 1] == "/"):
+            parts.append("(?:.*/)?")  # any number of leading directories
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == n:
+            parts.append("/.*")  # everything inside
+            i += 3
+        elif c == "*":
+            while i < n and pattern[i] == "*":
+                i += 1
+            parts.append("[^/]*")
+        elif c == "?":
+            parts.append("[^/]")
+            i += 1
+        elif c == "[":
+            translated = _translate_set(pattern, i + 1)
+            if translated is None:
+                parts.append(re.escape(c))  # no closing "]": a literal "["
+                i += 1
+            else:
+                regex, i = translated
+                parts.append(regex)
+        elif c == "\\" and i + 1 < n:
+            parts.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            parts.append(re.escape(c))
+            i += 1
+    return "".join(parts)
+
+
+def _translate_set(pattern: str, start: int) -> Union[Tuple[str, int], None]:
+    """Translate the ``[...]`` set whose body starts at *start* into a regex.
+
+    Every character is escaped, ranges are kept only if in order (a reversed
+    range matches nothing, as in git) and ``[:name:]`` classes are expanded.
+    The set never matches ``/``; an unknown class makes it match nothing.
+
+    Returns:
+        The regex and the offset just past the closing ``]``, or None if the
+        set is not closed.
+    """
+    i, n = start, len(pattern)
+    negated = i < n and pattern[i] in "!^"
+    if negated:
+        i += 1
+    items: List[str] = []
+    valid = True
+    first = True
+    while i < n and (first or pattern[i] != "]"):
+        first = False
+        if pattern.startswith("[:", i):
+            end = pattern.find(":]", i + 2)
+            if end != -1:
+                cls = _POSIX_CLASSES.get(pattern[i + 2 : end])
+                if cls is None:
+                    valid = False
+                else:
+                    items.append(cls)
+                i = end + 2
+                continue
+        low, i = _set_char(pattern, i)
+        if low is None:
+            return None
+        if pattern.startswith("-", i) and i + 1 < n and pattern[i + 1] != "]":
+            high, i = _set_char(pattern, i + 1)
+            if high is None:
+                return None
+            if low <= high:
+                items.append(f"{re.escape(low)}-{re.escape(high)}")
+        else:
+            items.append(re.escape(low))
+    if i >= n:
+        return None
+
+    body = "".join(items)
+    if not valid or not (body or negated):
+        return "(?!)", i + 1
+    if negated:
+        return f"[^/{body}]", i + 1
+    return f"(?!/)[{body}]", i + 1
+
+
+def _set_char(pattern: str, i: int) -> Tuple[Union[str, None], int]:
+    """Return the possibly backslash-escaped set character at *i* and the offset after it."""
+    if pattern[i] == "\\":
+        i += 1
+        if i >= len(pattern):
+            return None, i
+    return pattern[i], i + 1
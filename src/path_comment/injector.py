@@ -4,17 +4,32 @@
 Ensure every source file starts with a comment that contains its path
 relative to the project root.  Operates in two modes:  • check → just
 verify, no edits  • fix   → rewrite the file in-place if needed
+
+Files are handled as bytes: the header is encoded once in the file's own
+encoding and line ending, compared against the leading bytes, and written
+in front of the untouched original buffer.
 """
 
 from __future__ import annotations
 
+import dataclasses
 from enum import Enum, auto
 from pathlib import Path, PurePosixPath
+from typing import List, Union
 
-from identify.identify import tags_from_path
+from .detectors import comment_prefix, file_tags
+from .file_handler import (
+    HEAD_READ_SIZE,
+    STREAM_REWRITE_THRESHOLD,
+    FileHandler,
+    FileHandlingError,
+    RawFileInfo,
+    SyncPolicy,
+    is_ascii_compatible,
+)
 
-from .detectors import comment_prefix
-from .file_handler import FileHandler, FileHandlingError
+# A piece of new file content: fresh header bytes or a slice of the original
+Chunk = Union[bytes, memoryview]
 
 
 class Result(Enum):
@@ -26,13 +41,188 @@ class Result(Enum):
     REMOVED = auto()  # header was removed (for delete operations)
 
 
-def _has_shebang(first_line: str) -> bool:
-    return first_line.startswith("#!")  # e.g. "#!/usr/bin/env bash"
+def _has_shebang(data: bytes) -> bool:
+    return data.startswith(b"#!")  # e.g. "#!/usr/bin/env bash"
+
+
+def _is_permission_error(error: FileHandlingError) -> bool:
+    return isinstance(error.__cause__, PermissionError)
+
+
+def _read_file(handler: FileHandler, file_path: Path, head: bool = False) -> RawFileInfo | None:
+    """Read the whole file (or only its head), or None if it should be skipped.
+
+    Permission errors on supported files are re-raised so they get counted
+    as errors; other file handling issues mean the file is skipped. Files in
+    encodings that are not ASCII-compatible (UTF-16, UTF-32) are read whole
+    and transcoded to UTF-8 so the byte-level header logic applies to them
+    too; :func:`_write_plan` encodes them back.
+    """
+    try:
+        file_info = handler.read_raw(HEAD_READ_SIZE) if head else handler.read_raw()
+        if not is_ascii_compatible(file_info.encoding) and not file_info.complete:
+            file_info = handler.read_raw()
+    except FileHandlingError as e:
+        if _is_permission_error(e) and comment_prefix(file_path) is not None:
+            raise
+        return None
+
+    if is_ascii_compatible(file_info.encoding):
+        return file_info
+    try:
+        data = file_info.data.decode(file_info.encoding).encode("utf-8")
+    except (LookupError, UnicodeError):
+        return None
+    return dataclasses.replace(file_info, data=data, encoding="utf-8")
+
+
+def _encode_header(text: str, file_info: RawFileInfo) -> bytes | None:
+    """Encode header *text* in the file's encoding, or None if it cannot be represented."""
+    try:
+        return text.encode(file_info.encoding)
+    except UnicodeEncodeError:
+        return None
+
+
+def _line_end(data: bytes, start: int, complete: bool) -> int | None:
+    """Return the offset just past the line that starts at *start*.
+
+    Lines end at LF, CRLF or a lone CR; the last line of a complete
+    file may have no terminator at all. Returns None when the line runs
+    past the end of an incomplete prefix.
+    """
+    lf = data.find(b"\n", start)
+    cr = data.find(b"\r", start, lf if lf != -1 else len(data))
+    if cr != -1:
+        if cr + 1 == len(data) and not complete:
+            return None  # may be the first half of "\r\n"
+        return cr + 2 if data[cr + 1 : cr + 2] == b"\n" else cr + 1
+    if lf != -1:
+        return lf + 1
+    return len(data) if complete else None
+
+
+def _header_pos(file_info: RawFileInfo) -> int | None:
+    """Return the offset where the header line belongs.
+
+    That is right after a shebang line, or the start of the file. Returns
+    None when the shebang line runs past the end of an incomplete prefix.
+    """
+    if _has_shebang(file_info.data):
+        return _line_end(file_info.data, 0, file_info.complete)
+    return 0
+
+
+def _needs_header(file_info: RawFileInfo, header: bytes) -> bool | None:
+    """Return whether the header line is missing or wrong.
+
+    *header* is the encoded header text without a line ending; any line
+    ending after it is accepted. Returns None when *file_info* only holds a
+    prefix of the file that is too short to tell.
+    """
+    data = file_info.data
+    pos = _header_pos(file_info)
+    if pos is None:
+        return None
+
+    end = pos + len(header)
+    if data.startswith(header, pos) and data[end : end + 1] in (b"\n", b"\r"):
+        return False
+    if not file_info.complete and len(data) <= end and header.startswith(data[pos:]):
+        # The prefix ended inside a line that may still turn out to be the header
+        return None
+    return True
 
 
-def _is_path_comment(line: str, file_path: Path, project_root: Path) -> bool:
-    """Check if a line looks like a path comment for this file."""
-    prefix = comment_prefix(file_path)
+def _header_line(file_info: RawFileInfo, pos: int) -> str | None:
+    """Decode the complete line starting at *pos*, or None if there is none."""
+    end = _line_end(file_info.data, pos, file_info.complete)
+    if end is None or end == pos:
+        return None
+    try:
+        return file_info.data[pos:end].decode(file_info.encoding)
+    except UnicodeDecodeError:
+        return None
+
+
+def _has_header(
+    file_info: RawFileInfo, file_path: Path, project_root: Path, prefix: str
+) -> bool | None:
+    """Return whether a path comment header is present.
+
+    Returns None when *file_info* only holds a prefix of the file that is
+    too short to tell.
+    """
+    pos = _header_pos(file_info)
+    if pos is None:
+        return None
+
+    line = _header_line(file_info, pos)
+    if line is not None:
+        return _is_path_comment(line, file_path, project_root, prefix)
+    if file_info.complete:
+        return False
+
+    # Only part of the header candidate was read; a line that cannot start
+    # with the comment prefix is never a header
+    candidate = file_info.data[pos:].lstrip()
+    encoded_prefix = prefix.encode(file_info.encoding)
+    if candidate and not (
+        candidate.startswith(encoded_prefix) or encoded_prefix.startswith(candidate)
+    ):
+        return False
+    return None
+
+
+def _can_stream(file_info: RawFileInfo, pos: int, lines: int, header_text: str = "") -> bool:
+    """Return whether a rewrite may stream the file's tail instead of reading it.
+
+    That is the case for files of at least STREAM_REWRITE_THRESHOLD bytes
+    whose head holds the *lines* complete lines from *pos* that the rewrite
+    inspects. The encoding is only detected from the head, and the tail may
+    be in another one (an ASCII head and a Latin-1 tail), so the header text
+    written, *header_text*, must be ASCII to come out right either way.
+    """
+    if file_info.complete or file_info.size < STREAM_REWRITE_THRESHOLD:
+        return False
+    if not header_text.isascii():
+        return False
+    for _ in range(lines):
+        end = _line_end(file_info.data, pos, False)
+        if end is None:
+            return False
+        pos = end
+    return True
+
+
+def _write_plan(
+    handler: FileHandler, file_info: RawFileInfo, chunks: List[Chunk], tail_from: int
+) -> None:
+    """Write *chunks* followed by the original file from offset *tail_from*.
+
+    The tail comes from the in-memory buffer for complete reads and is
+    streamed from disk when only the head was read. Files transcoded by
+    :func:`_read_file` are written back in their original encoding.
+    """
+    if file_info.complete:
+        chunks = [*chunks, memoryview(file_info.data)[tail_from:]]
+        if handler.encoding and file_info.encoding != handler.encoding:
+            content = b"".join(chunks).decode(file_info.encoding)
+            chunks = [content.encode(handler.encoding)]
+        handler.write_bytes(chunks)
+    else:
+        handler.write_bytes(chunks, tail_from=tail_from)
+
+
+def _is_path_comment(
+    line: str, file_path: Path, project_root: Path, prefix: str | None = None
+) -> bool:
+    """Check if a line looks like a path comment for this file.
+
+    *prefix* may be passed when already known to avoid re-detecting it.
+    """
+    if prefix is None:
+        prefix = comment_prefix(file_path)
     if prefix is None:
         return False
 
@@ -53,72 +243,74 @@ def delete_header(
     file_path: Path,
     project_root: Path,
     mode: str = "fix",  # "check" | "fix"
+    sync: SyncPolicy | None = None,
+    resolved: bool = False,
 ) -> Result:
     """Remove path comment header from file_path if it exists.
 
     Returns a Result enum; in "check" mode we never modify files. Uses
     FileHandler for safe operations with encoding detection and atomic
-    writes.
+    writes, flushed to disk according to *sync*. Only the header bytes are
+    dropped; the rest of the file is written back untouched. With
+    *resolved*, both paths are taken as already resolved and *file_path* as
+    a regular file (see :func:`ensure_header`).
     """
     # Normalize paths
-    project_root = project_root.resolve()
-    if not file_path.is_absolute():
-        file_path = (project_root / file_path).resolve()
+    if not resolved:
+        project_root = project_root.resolve()
+        if not file_path.is_absolute():
+            file_path = (project_root / file_path).resolve()
 
     # Binary? bail early
-    if "binary" in tags_from_path(str(file_path)):
+    tags = file_tags(file_path, regular_file=resolved)
+    if "binary" in tags:
         return Result.SKIPPED
 
-    prefix = comment_prefix(file_path)
-    if prefix is None:
+    # Check the file's head first; most files are decided by their first
+    # lines, so only rewrites and inconclusive prefixes need the full file
+    handler = FileHandler(file_path, sync, resolved=resolved)
+    file_info = _read_file(handler, file_path, head=True)
+    if file_info is None:
         return Result.SKIPPED
 
-    # Use FileHandler for safe file operations
-    try:
-        handler = FileHandler(file_path)
-        file_info = handler.read()
-    except FileHandlingError as e:
-        if e.__cause__ and isinstance(e.__cause__, PermissionError):
-            raise
+    prefix = comment_prefix(file_path, head=file_info.data, tags=tags)
+    if prefix is None:
         return Result.SKIPPED
 
-    lines = file_info.content.splitlines(keepends=True)
-    if not lines:
-        return Result.OK  # Empty file, nothing to remove
-
-    first_line = lines[0]
-    header_removed = False
-    new_lines = lines.copy()
-
-    # Handle files that start with a shebang; header would be after it
-    if _has_shebang(first_line):
-        if len(lines) > 1 and _is_path_comment(lines[1], file_path, project_root):
-            # Remove the header line after shebang
-            if mode == "check":
-                return Result.REMOVED
-            new_lines.pop(1)
-            header_removed = True
-    else:
-        # Check if first line is a path comment
-        if _is_path_comment(first_line, file_path, project_root):
-            if mode == "check":
-                return Result.REMOVED
-            new_lines.pop(0)
-            # Also remove the blank line that typically follows if it exists
-            if new_lines and new_lines[0].strip() == "":
-                new_lines.pop(0)
-            header_removed = True
-
-    if not header_removed:
-        return Result.OK
+    has_header = _has_header(file_info, file_path, project_root, prefix)
+    # Without a shebang the blank line after the header goes too, so the
+    # line following the header must be visible when streaming
+    start = _header_pos(file_info)
+    if has_header is None or (
+        has_header
+        and mode == "fix"
+        and not file_info.complete
+        and not _can_stream(file_info, start or 0, 1 if start else 2)
+    ):
+        file_info = _read_file(handler, file_path)
+        if file_info is None:
+            return Result.SKIPPED
+        has_header = _has_header(file_info, file_path, project_root, prefix)
+        start = _header_pos(file_info)
 
+    if not has_header:
+        return Result.OK
     if mode == "check":
         return Result.REMOVED
 
+    data = file_info.data
+    start = start or 0
+    end = _line_end(data, start, file_info.complete) or len(data)
+
+    # Without a shebang, also remove the blank line that typically follows
+    if start == 0 and end < len(data):
+        blank_end = _line_end(data, end, file_info.complete) or len(data)
+        if not data[end:blank_end].strip():
+            end = blank_end
+
     # Write the modified content
     try:
-        new_content = "".join(new_lines)
-        handler.write(new_content, file_info.line_ending)
+        _write_plan(handler, file_info, [memoryview(data)[:start]], end)
         return Result.REMOVED
     except FileHandlingError as e:
         if e.__cause__ and isinstance(e.__cause__, PermissionError):
@@ -130,12 +322,22 @@ def ensure_header(
     file_path: Path,
     project_root: Path,
     mode: str = "fix",  # "check" | "fix"
+    sync: SyncPolicy | None = None,
+    resolved: bool = False,
 ) -> Result:
     """Ensure *file_path* contains the correct header.
 
     Returns a Result enum; in "check" mode we never modify files. Uses
     the new FileHandler for safe operations with CRLF preservation,
-    encoding detection, and atomic writes.
+    encoding detection, and atomic writes, flushed to disk according to
+    *sync*. The header is written in the
+    file's encoding and line ending and the rest of the file is left
+    byte-identical, including any mixed line endings.
+
+    *resolved* declares *file_path* and *project_root* already resolved and
+    *file_path* a regular file, as discovery guarantees: neither is resolved
+    again, and the file type comes from its name where possible, so no
+    metadata beyond what reading the file needs is looked up.
     """
     # ------------------------------------------------------------------ #
     # Normalize paths:                                                    #
@@ -143,90 +345,164 @@ def ensure_header(
     #  • We resolve both file_path and project_root so                   #
     #    `file_path.relative_to(project_root)` is always valid.          #
     # ------------------------------------------------------------------ #
-    project_root = project_root.resolve()
-    if not file_path.is_absolute():
-        file_path = (project_root / file_path).resolve()
+    if not resolved:
+        project_root = project_root.resolve()
+        if not file_path.is_absolute():
+            file_path = (project_root / file_path).resolve()
 
     # Binary?  bail early
-    if "binary" in tags_from_path(str(file_path)):
+    tags = file_tags(file_path, regular_file=resolved)
+    if "binary" in tags:
+        return Result.SKIPPED
+
+    # Check the file's head first; most files are decided by their first
+    # lines, so only rewrites and inconclusive prefixes need the full file
+    handler = FileHandler(file_path, sync, resolved=resolved)
+    file_info = _read_file(handler, file_path, head=True)
+    if file_info is None:
         return Result.SKIPPED
 
-    prefix = comment_prefix(file_path)
+    prefix = comment_prefix(file_path, head=file_info.data, tags=tags)
     if prefix is None:
         return Result.SKIPPED
 
     rel = PurePosixPath(file_path.relative_to(project_root))
-    expected_line = f"{prefix} {rel}\n"
+    expected_text = f"{prefix} {rel}"
+
+    header = _encode_header(expected_text, file_info)
+    if header is None:
+        return Result.SKIPPED
+    needs_change = _needs_header(file_info, header)
+    # After a shebang an existing header line is replaced, so that line must
+    # be visible when streaming
+    pos = _header_pos(file_info)
+    if needs_change is None or (
+        needs_change
+        and mode == "fix"
+        and not file_info.complete
+        and not _can_stream(file_info, pos or 0, 1 if pos else 0, expected_text)
+    ):
+        file_info = _read_file(handler, file_path)
+        if file_info is None:
+            return Result.SKIPPED
+        header = _encode_header(expected_text, file_info)
+        if header is None:
+            return Result.SKIPPED
+        needs_change = _needs_header(file_info, header)
+        pos = _header_pos(file_info)
+
+    if not needs_change:
+        return Result.OK
+    if mode == "check":
+        return Result.CHANGED
+
+    # --- rewrite: header bytes spliced into the untouched original buffer ---
+    data = file_info.data
+    view = memoryview(data)
+    eol = file_info.line_ending.value.encode("ascii")
+    header_line = header + eol
+    chunks: List[Chunk]
+
+    if not data:
+        # Empty file - the header is the whole content
+        chunks, tail_from = [header_line], 0
+    elif not pos:
+        # Prepend header and a blank line for readability
+        chunks, tail_from = [header_line, eol], 0
+    else:
+        # Header must go *after* the shebang
+        chunks, tail_from = [view[:pos]], pos
+        if not data[:pos].endswith((b"\n", b"\r")):
+            chunks.append(eol)  # shebang-only file without a final newline
+
+        line = _header_line(file_info, pos)
+        if line is not None and _is_path_comment(line, file_path, project_root, prefix):
+            # Replace existing header
+            tail_from = _line_end(data, pos, file_info.complete) or len(data)
+        chunks.append(header_line)
 
-    # Use the new FileHandler for safe file operations
     try:
-        handler = FileHandler(file_path)
-        file_info = handler.read()
+        _write_plan(handler, file_info, chunks, tail_from)
+        return Result.CHANGED
+
     except FileHandlingError as e:
         # Check the underlying cause of the FileHandlingError
         if e.__cause__ and isinstance(e.__cause__, PermissionError):
             # Re-raise permission errors so they get counted as errors
             raise
-        # For other file handling issues, skip the file
+        # If write fails for other reasons, return SKIPPED to avoid breaking the workflow
         return Result.SKIPPED
 
-    lines = file_info.content.splitlines(keepends=True)
-    if not lines:
-        # Empty file - add the header
-        if mode == "check":
-            return Result.CHANGED
-        try:
-            handler.write(expected_line, file_info.line_ending)
-            return Result.CHANGED
-        except FileHandlingError:
+
+def update_header(
+    file_path: Path,
+    project_root: Path,
+    mode: str = "fix",  # "check" | "fix"
+    sync: SyncPolicy | None = None,
+    resolved: bool = False,
+) -> Result:
+    """Rewrite an existing path comment header of *file_path* to its current path.
+
+    Meant for files that were moved: the stale header line is replaced in
+    place rather than a second header being added. Files without a path
+    comment header are left alone and reported SKIPPED; use
+    :func:`ensure_header` to add one. Returns a Result enum; in "check" mode
+    we never modify files. *resolved* is as for :func:`ensure_header`.
+    """
+    if not resolved:
+        project_root = project_root.resolve()
+        if not file_path.is_absolute():
+            file_path = (project_root / file_path).resolve()
+
+    # Binary? bail early
+    tags = file_tags(file_path, regular_file=resolved)
+    if "binary" in tags:
+        return Result.SKIPPED
+
+    handler = FileHandler(file_path, sync, resolved=resolved)
+    file_info = _read_file(handler, file_path, head=True)
+    if file_info is None:
+        return Result.SKIPPED
+
+    prefix = comment_prefix(file_path, head=file_info.data, tags=tags)
+    if prefix is None:
+        return Result.SKIPPED
+
+    rel = PurePosixPath(file_path.relative_to(project_root))
+    expected_text = f"{prefix} {rel}"
+
+    # A rewrite from the head alone needs the whole header line in it and a
+    # file large enough to stream its tail
+    pos = _header_pos(file_info)
+    if pos is None or (
+        not file_info.complete and not _can_stream(file_info, pos, 1, expected_text)
+    ):
+        file_info = _read_file(handler, file_path)
+        if file_info is None:
             return Result.SKIPPED
+        pos = _header_pos(file_info) or 0
 
-    first_line = lines[0]
-
-    # Handle files that start with a shebang; header must go *after* it
-    if _has_shebang(first_line):
-        header_pos = 1
-        if len(lines) > 1:
-            present_header = lines[1]
-            needs_change = present_header != expected_line
-        else:
-            # File only has shebang, need to add header
-            needs_change = True
-    else:
-        header_pos = 0
-        needs_change = first_line != expected_line
+    line = _header_line(file_info, pos)
+    if line is None or not _is_path_comment(line, file_path, project_root, prefix):
+        return Result.SKIPPED
 
-    if not needs_change:
+    header = _encode_header(expected_text, file_info)
+    if header is None:
+        return Result.SKIPPED
+    if _needs_header(file_info, header) is False:
         return Result.OK
     if mode == "check":
         return Result.CHANGED
 
-    # --- rewrite with safe file handling and line ending preservation ---
+    data = file_info.data
+    end = _line_end(data, pos, file_info.complete) or len(data)
+    # Keep the line ending the old header had
+    eol = data[pos + len(data[pos:end].rstrip(b"\r\n")) : end]
+
     try:
-        new_lines = lines.copy()
-
-        if header_pos == 1:  # Insert after shebang
-            if len(new_lines) > 1 and _is_path_comment(new_lines[1], file_path, project_root):
-                new_lines[1] = expected_line  # Replace existing header
-            else:
-                new_lines.insert(1, expected_line)  # Insert header after shebang
-        else:  # Insert at beginning
-            # Prepend header, keep original first line, and add blank line
-            original_first = new_lines[0]
-            new_lines[0] = expected_line
-            # Ensure a blank line after header for readability
-            blank = file_info.line_ending.value
-            new_lines.insert(1, blank)
-            new_lines.insert(2, original_first)
-
-        new_content = "".join(new_lines)
-        handler.write(new_content, file_info.line_ending)
+        _write_plan(handler, file_info, [memoryview(data)[:pos], header, eol], end)
         return Result.CHANGED
-
     except FileHandlingError as e:
-        # Check the underlying cause of the FileHandlingError
         if e.__cause__ and isinstance(e.__cause__, PermissionError):
-            # Re-raise permission errors so they get counted as errors
             raise
-        # If write fails for other reasons, return SKIPPED to avoid breaking the workflow
         return Result.SKIPPED
@@ -3,21 +3,57 @@
 
 Processing multiple files concurrently significantly improves
 performance on large codebases, especially when the I/O bound operations
-dominate runtime.
+dominate runtime. CPU-bound work (encoding detection, decoding) can instead
+run in worker processes via :class:`ProcessPoolExecutor`, and asyncio
+applications can stream results with :func:`process_files_async`.
 """
 
 from __future__ import annotations
 
+import asyncio
+import heapq
 import os
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import pickle
+import queue
+import threading
+import time
+import weakref
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
+from contextlib import closing, contextmanager
 from dataclasses import dataclass
+from enum import Enum
+from itertools import islice
 from pathlib import Path
-from typing import Dict, List, Union
+from typing import (
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Generator,
+    Iterable,
+    Iterator,
+    List,
+    Set,
+    Sized,
+    Tuple,
+    Union,
+)
 
 from rich.console import Console
-from rich.progress import Progress, TaskID
+from rich.progress import Progress
 
-from .injector import Result, delete_header, ensure_header
+from .cache import ResultCache
+from .config import CacheMode, Durability
+from .file_handler import SyncPolicy
+from .injector import Result, delete_header, ensure_header, update_header
 
 console = Console()
 
@@ -28,6 +64,52 @@ class ProcessingError(Exception):
     pass
 
 
+class FileTimeoutError(ProcessingError):
+    """Raised when processing a file takes longer than its time budget."""
+
+    pass
+
+
+class ExecutorKind(Enum):
+    """Kind of pool used to process files in parallel."""
+
+    THREAD = "thread"  # shared memory, low overhead; bound by the GIL
+    PROCESS = "process"  # one interpreter per worker; scales CPU-bound work
+
+
+# Upper bound on the files handed to a worker per task; batches stay small
+# enough to balance load and report progress
+_MAX_BATCH_SIZE = 256
+
+# Number of batches each worker gets, for load balancing
+_BATCHES_PER_WORKER = 4
+
+# Files per task when streaming, where the total is not known up front
+_STREAM_BATCH_SIZE = 32
+
+# Tasks in flight per worker when streaming; also bounds the reorder buffer
+_STREAM_BATCHES_PER_WORKER = 2
+
+# Value of ``workers`` that picks the worker count from the workload
+AUTO_WORKERS = "auto"
+
+# Largest run that autotuning processes inline; a pool costs more than the work
+_INLINE_MAX_FILES = 32
+
+# Most threads autotuning will grow to, e.g. for high-latency network storage
+_AUTO_MAX_WORKERS = 64
+
+# How long autotuning measures throughput before changing the thread count
+_PROBE_SECONDS = 0.2
+
+# Relative throughput gain needed to keep growing or shrinking the pool
+_MIN_GAIN = 0.1
+
+# Longest a run waits, before its final sync, for helper threads still
+# working on files that timed out
+_ABANDONED_GRACE_SECONDS = 5.0
+
+
 @dataclass
 class ProcessingResult:
     """Result of processing a single file.
@@ -36,23 +118,45 @@ class ProcessingResult:
         file_path: Path to the processed file.
         result: The processing result (OK, CHANGED, SKIPPED).
         error: Any exception that occurred during processing, or None.
+        duration: Seconds spent processing the file.
     """
 
     file_path: Path
     result: Result
     error: Union[Exception, None] = None
+    duration: float = 0.0
 
 
 class FileProcessor:
     """Handles processing of individual files with error handling."""
 
-    def __init__(self, project_root: Path) -> None:
+    def __init__(
+        self,
+        project_root: Path,
+        sync: Union[SyncPolicy, None] = None,
+        cache: Union[ResultCache, None] = None,
+        timeout: Union[float, None] = None,
+        resolved_paths: bool = False,
+    ) -> None:
         """Initialize the file processor.
 
         Args:
             project_root: Root directory for relative path computation.
+            sync: Durability policy applied to rewritten files.
+            cache: Cache of known-good files; unchanged files found in it
+                are reported OK without being read.
+            timeout: Seconds a single file may take. Slower files are
+                abandoned and reported SKIPPED with a FileTimeoutError.
+            resolved_paths: Whether files are passed as resolved paths of
+                regular files, as discovery yields them, so they need not be
+                resolved or stat'ed again (see :func:`ensure_header`).
         """
         self.project_root = project_root.resolve()
+        self.sync = sync
+        self.cache = cache
+        self.timeout = timeout
+        self.resolved_paths = resolved_paths
+        self._runners = threading.local()
 
     def process_file(
         self, file_path: Path, mode: str = "fix", operation: str = "ensure"
@@ -62,39 +166,171 @@ class FileProcessor:
         Args:
             file_path: Path to the file to process.
             mode: Processing mode ("fix" or "check").
-            operation: Operation type ("ensure" or "delete").
+            operation: Operation type ("ensure", "delete" or "sync").
 
         Returns:
             ProcessingResult with the outcome and any errors.
         """
+        start = time.perf_counter()
+        if self.timeout is None:
+            result = self._process(file_path, mode, operation)
+        else:
+            result = self._process_with_timeout(file_path, mode, operation, self.timeout)
+        result.duration = time.perf_counter() - start
+        return result
+
+    def _process_with_timeout(
+        self, file_path: Path, mode: str, operation: str, timeout: float
+    ) -> ProcessingResult:
+        """Process a file on this thread's helper thread, giving up after *timeout*."""
+        runner = getattr(self._runners, "runner", None)
+        if runner is None:
+            runner = self._runners.runner = _DeadlineRunner()
         try:
+            return runner.call(lambda: self._process(file_path, mode, operation), timeout)
+        except FileTimeoutError as e:
+            return ProcessingResult(file_path=file_path, result=Result.SKIPPED, error=e)
+
+    def _process(self, file_path: Path, mode: str, operation: str) -> ProcessingResult:
+        """Process a file without a time limit."""
+        try:
+            # Stat before reading, so a change made meanwhile invalidates the entry
+            resolved = self.resolved_paths
+            entry = self.cache.entry_for(file_path, resolved) if self.cache is not None else None
+            if entry is not None and self.cache is not None and self.cache.is_known_good(entry):
+                return ProcessingResult(file_path=file_path, result=Result.OK, error=None)
+
             if operation == "delete":
-                result = delete_header(file_path, self.project_root, mode=mode)
+                process = delete_header
+            elif operation == "sync":
+                process = update_header
             else:
-                result = ensure_header(file_path, self.project_root, mode=mode)
+                process = ensure_header
+            result = process(
+                file_path, self.project_root, mode=mode, sync=self.sync, resolved=resolved
+            )
+
+            if entry is not None and self.cache is not None:
+                if result is Result.OK:
+                    self.cache.record(entry)
+                else:
+                    self.cache.forget(entry)
             return ProcessingResult(file_path=file_path, result=result, error=None)
         except Exception as e:
             # Log the error but don't let it break the entire processing
             return ProcessingResult(file_path=file_path, result=Result.SKIPPED, error=e)
 
 
+class _DeadlineRunner:
+    """Run calls on a helper thread, so the caller can stop waiting for a stuck one.
+
+    Python threads cannot be killed: a call that overruns its deadline keeps
+    its helper thread, which is abandoned, and later calls go to a new one.
+    An abandoned call may still rewrite its file. Runs wait up to
+    ``_ABANDONED_GRACE_SECONDS`` for such calls before their final sync (see
+    :func:`_wait_for_abandoned`); a call still stuck after that may write
+    after the sync, and, as helper threads are daemons, may be cut short at
+    interpreter exit, leaving its temporary file behind. Helper threads exit
+    once their runner is collected.
+    """
+
+    def __init__(self) -> None:
+        self._start()
+
+    def _start(self) -> None:
+        calls: queue.SimpleQueue = queue.SimpleQueue()
+        self._calls = calls
+        self._thread = threading.Thread(
+            target=_serve_calls, args=(calls,), name="path-comment-timeout", daemon=True
+        )
+        self._thread.start()
+        # Ends the helper when the worker thread owning this runner is gone
+        self._finalizer = weakref.finalize(self, calls.put, None)
+
+    def call(self, fn: Callable[[], ProcessingResult], timeout: float) -> ProcessingResult:
+        """Return ``fn()``, or raise FileTimeoutError if it takes over *timeout* seconds."""
+        reply: queue.SimpleQueue = queue.SimpleQueue()
+        self._calls.put((fn, reply))
+        try:
+            ok, value = reply.get(timeout=timeout)
+        except queue.Empty:
+            # Let the stuck helper exit if it ever finishes, and replace it
+            self._finalizer()
+            with _abandoned_lock:
+                _abandoned.add(self._thread)
+            self._start()
+            raise FileTimeoutError(f"Timed out after {timeout:g}s") from None
+        if not ok:
+            raise value
+        result: ProcessingResult = value
+        return result
+
+
+# Helper threads of timed-out calls that may still be writing a file
+_abandoned: Set[threading.Thread] = set()
+_abandoned_lock = threading.Lock()
+
+
+def _wait_for_abandoned() -> None:
+    """Give helper threads abandoned by timeouts ``_ABANDONED_GRACE_SECONDS`` to finish."""
+    with _abandoned_lock:
+        threads = list(_abandoned)
+    if not threads:
+        return
+    deadline = time.monotonic() + _ABANDONED_GRACE_SECONDS
+    for thread in threads:
+        thread.join(max(0.0, deadline - time.monotonic()))
+    with _abandoned_lock:
+        _abandoned.difference_update(thread for thread in threads if not thread.is_alive())
+
+
+def _serve_calls(calls: queue.SimpleQueue) -> None:
+    """Run the calls put on *calls*, replying to each, until None is put."""
+    while True:
+        item = calls.get()
+        if item is None:
+            return
+        fn, reply = item
+        try:
+            reply.put((True, fn()))
+        except BaseException as e:
+            reply.put((False, e))
+
+
 def process_files_parallel(
     files: List[Path],
     project_root: Path,
     mode: str = "fix",
-    workers: Union[int, None] = None,
+    workers: Union[int, str, None] = None,
     show_progress: bool = False,
     operation: str = "ensure",
+    sync: Union[SyncPolicy, None] = None,
+    cache: Union[ResultCache, None] = None,
+    executor: ExecutorKind = ExecutorKind.THREAD,
+    timeout: Union[float, None] = None,
+    resolved_paths: bool = False,
 ) -> List[ProcessingResult]:
-    """Process multiple files in parallel using ThreadPoolExecutor.
+    """Process multiple files in parallel using a thread or process pool.
 
     Args:
         files: List of file paths to process.
         project_root: Root directory for relative path computation.
         mode: Processing mode ("fix" or "check").
         workers: Number of worker threads. Defaults to os.cpu_count().
+            ``AUTO_WORKERS`` processes small runs inline and tunes the
+            thread count of larger ones to the measured throughput.
         show_progress: Whether to show a progress bar.
-        operation: Operation type ("ensure" or "delete").
+        operation: Operation type ("ensure", "delete" or "sync").
+        sync: Durability policy for rewritten files; flushed once all files
+            are processed.
+        cache: Cache of known-good files to consult and update; saved once
+            all files are processed.
+        executor: Whether to process files in worker threads or processes.
+        timeout: Seconds a single file may take before it is abandoned and
+            reported as timed out; None waits indefinitely.
+        resolved_paths: Whether *files* are resolved paths of regular files,
+            as :func:`path_comment.discovery.discover_files` yields them;
+            workers then skip resolving and stat'ing each file again.
 
     Returns:
         List of ProcessingResult objects in the same order as input files.
@@ -105,24 +341,40 @@ def process_files_parallel(
     if not files:
         return []
 
-    if workers is None:
-        workers = os.cpu_count() or 1
+    workers, autotune = _resolve_workers(workers)
 
     # Ensure we don't use more workers than files
     workers = min(workers, len(files))
 
-    processor = FileProcessor(project_root)
+    processor = FileProcessor(project_root, sync, cache, timeout, resolved_paths)
     results: List[Union[ProcessingResult, None]] = [None] * len(files)
 
     try:
-        if show_progress:
-            with Progress() as progress:
-                task = progress.add_task("Processing files...", total=len(files))
-                _process_with_progress(
-                    files, processor, mode, workers, results, progress, task, operation
-                )
-        else:
-            _process_without_progress(files, processor, mode, workers, results, operation)
+        with _progress_reporter(show_progress, len(files)) as advance:
+            if autotune and len(files) <= _INLINE_MAX_FILES:
+                _process_batch(processor, files, 0, len(files), mode, operation, results)
+                if advance is not None:
+                    advance(len(files))
+            elif executor is ExecutorKind.PROCESS:
+                _process_in_processes(files, processor, mode, workers, results, operation, advance)
+            elif autotune:
+                tuner = _WorkerTuner(workers, min(_AUTO_MAX_WORKERS, len(files)))
+                start = 0
+                for batch in _stream_batches(
+                    files, processor, mode, operation, workers, executor, True, tuner
+                ):
+                    results[start : start + len(batch)] = batch
+                    start += len(batch)
+                    if advance is not None:
+                        advance(len(batch))
+            else:
+                _process_in_threads(files, processor, mode, workers, results, operation, advance)
+
+        _wait_for_abandoned()
+        if sync is not None:
+            sync.flush()
+        if cache is not None:
+            cache.save()
 
     except Exception as e:
         raise ProcessingError(f"Failed to process files in parallel: {e}") from e
@@ -131,81 +383,576 @@ def process_files_parallel(
     return [r for r in results if r is not None]
 
 
-def _process_with_progress(
+def _resolve_workers(workers: Union[int, str, None]) -> Tuple[int, bool]:
+    """Return the worker count to start with and whether to autotune it."""
+    autotune = workers == AUTO_WORKERS
+    if isinstance(workers, str) and not autotune:
+        raise ValueError(f"workers must be a positive integer or {AUTO_WORKERS!r}")
+    if workers is None or isinstance(workers, str):
+        return os.cpu_count() or 1, autotune
+    return workers, autotune
+
+
+@contextmanager
+def _progress_reporter(show: bool, total: int) -> Iterator[Union[Callable[[int], None], None]]:
+    """Yield a callback advancing a progress bar by a file count, or None if hidden."""
+    if not show:
+        yield None
+        return
+    with Progress() as progress:
+        task = progress.add_task("Processing files...", total=total)
+        yield lambda count: progress.advance(task, count)
+
+
+def _batches(total: int, workers: int) -> List[Tuple[int, int]]:
+    """Split *total* files into ``(start, stop)`` index ranges, one per task.
+
+    Batches grow with the number of files per worker, so huge runs pay the
+    scheduling cost once per batch rather than once per file, while every
+    worker still gets several batches to balance uneven files.
+    """
+    size = max(1, min(_MAX_BATCH_SIZE, total // (workers * _BATCHES_PER_WORKER)))
+    return [(start, min(start + size, total)) for start in range(0, total, size)]
+
+
+def _process_batch(
+    processor: FileProcessor,
+    files: List[Path],
+    start: int,
+    stop: int,
+    mode: str,
+    operation: str,
+    results: List[Union[ProcessingResult, None]],
+) -> None:
+    """Process ``files[start:stop]``, writing results straight into *results*."""
+    for index in range(start, stop):
+        try:
+            results[index] = processor.process_file(files[index], mode, operation)
+        except Exception as e:
+            # This should not happen since process_file handles exceptions
+            # But we include it for extra safety
+            results[index] = ProcessingResult(
+                file_path=files[index], result=Result.SKIPPED, error=e
+            )
+
+
+def _process_in_threads(
     files: List[Path],
     processor: FileProcessor,
     mode: str,
     workers: int,
     results: List[Union[ProcessingResult, None]],
-    progress: Progress,
-    task: TaskID,
     operation: str = "ensure",
+    advance: Union[Callable[[int], None], None] = None,
 ) -> None:
-    """Process files with progress bar display."""
+    """Process files in batches on a pool of worker threads."""
     with ThreadPoolExecutor(max_workers=workers) as executor:
-        # Submit all tasks and keep track of their index
-        future_to_index = {
-            executor.submit(processor.process_file, file_path, mode, operation): i
-            for i, file_path in enumerate(files)
+        future_to_batch = {
+            executor.submit(
+                _process_batch, processor, files, start, stop, mode, operation, results
+            ): (start, stop)
+            for start, stop in _batches(len(files), workers)
         }
 
-        # Collect results as they complete
-        for future in as_completed(future_to_index):
-            index = future_to_index[future]
+        # Wait for batches to complete; their results are already in place
+        for future in as_completed(future_to_batch):
+            future.result()
+            if advance is not None:
+                start, stop = future_to_batch[future]
+                advance(stop - start)
+
+
+class _WorkerTuner:
+    """Hill-climb the number of worker threads on measured throughput.
+
+    Starting from the CPU count, the thread count doubles while each step
+    gains at least ``_MIN_GAIN`` files/sec; if the first doubling does not
+    pay off it halves instead. Once a step stops improving throughput the
+    tuner settles on the best count seen.
+    """
+
+    def __init__(self, start: int, limit: int) -> None:
+        self.workers = max(1, min(start, limit))
+        self.limit = limit
+        self.settled = False
+        self._start = self.workers
+        self._best_workers = self.workers
+        self._best_rate = 0.0
+        self._growing = True
+
+    def observe(self, files: int, seconds: float) -> None:
+        """Record the throughput of the current thread count and pick the next one."""
+        if self.settled or seconds <= 0:
+            return
+        rate = files / seconds
+        if rate > self._best_rate * (1 + _MIN_GAIN):
+            self._best_workers, self._best_rate = self.workers, rate
+        elif self._growing and self._best_workers == self._start:
+            # Going up did not help; probe the other direction from the best count
+            self._growing = False
+        else:
+            self._settle()
+            return
+
+        candidate = self._best_workers * 2 if self._growing else self._best_workers // 2
+        if candidate < 1 or candidate > self.limit:
+            self._settle()
+            return
+        self.workers = candidate
+
+    def _settle(self) -> None:
+        self.workers = self._best_workers
+        self.settled = True
+
+
+# Per-process state of pool workers, set once by _init_worker
+_worker_processor: Union[FileProcessor, None] = None
+_worker_mode = "fix"
+_worker_operation = "ensure"
+
+# What a worker process reports for one file: the result, the error, if any,
+# and the seconds it took
+_CompactResult = Tuple[Result, Union[Exception, None], float]
+
+
+def _init_worker(
+    project_root: Path,
+    mode: str,
+    operation: str,
+    durability: Union[Durability, None],
+    cache_settings: Union[Tuple[str, CacheMode], None],
+    timeout: Union[float, None] = None,
+    resolved_paths: bool = False,
+) -> None:
+    """Set up a worker process once, instead of pickling this state per task."""
+    global _worker_processor, _worker_mode, _worker_operation
+    sync = SyncPolicy(durability) if durability is not None else None
+    cache = None
+    if cache_settings is not None:
+        key, cache_mode = cache_settings
+        cache = ResultCache(project_root, operation, key, cache_mode)
+    _worker_processor = FileProcessor(project_root, sync, cache, timeout, resolved_paths)
+    _worker_mode, _worker_operation = mode, operation
+
+
+def _process_chunk(
+    paths: List[Path],
+) -> Tuple[List[_CompactResult], Tuple[float, Set[Path]], Tuple[Dict, Set[str]]]:
+    """Process a batch of files in a worker process.
+
+    Returns the compact results, in the order of *paths*, together with the
+    sync and cache state accumulated by the worker, for the parent to merge.
+    """
+    processor = _worker_processor
+    if processor is None:
+        raise ProcessingError("Worker process was not initialized")
+
+    compact: List[_CompactResult] = []
+    for file_path in paths:
+        result = processor.process_file(file_path, _worker_mode, _worker_operation)
+        error = result.error
+        if error is not None:
             try:
-                result = future.result()
-                results[index] = result
-            except Exception as e:
-                # This should not happen since process_file handles exceptions
-                # But we include it for extra safety
-                results[index] = ProcessingResult(
-                    file_path=files[index], result=Result.SKIPPED, error=e
-                )
+                pickle.dumps(error)
+            except Exception:
+                error = ProcessingError(f"{type(error).__name__}: {error}")
+        compact.append((result.result, error, result.duration))
+
+    # Hand over what timed-out files wrote meanwhile, too
+    _wait_for_abandoned()
+    sync_state = processor.sync.drain() if processor.sync is not None else (0.0, set())
+    cache_state = processor.cache.drain() if processor.cache is not None else ({}, set())
+    return compact, sync_state, cache_state
+
+
+def _worker_initargs(processor: FileProcessor, mode: str, operation: str) -> Tuple:
+    """Return the arguments :func:`_init_worker` needs to mirror *processor*."""
+    sync, cache = processor.sync, processor.cache
+    return (
+        processor.project_root,
+        mode,
+        operation,
+        sync.durability if sync is not None else None,
+        (cache.key, cache.mode) if cache is not None else None,
+        processor.timeout,
+        processor.resolved_paths,
+    )
+
+
+def _unpack_chunk(
+    paths: List[Path],
+    future: Future,
+    sync: Union[SyncPolicy, None],
+    cache: Union[ResultCache, None],
+) -> List[ProcessingResult]:
+    """Turn a finished :func:`_process_chunk` future into results, merging worker state."""
+    try:
+        compact, sync_state, cache_state = future.result()
+    except Exception as e:
+        # A worker died or the batch could not be transferred
+        return [ProcessingResult(file_path, Result.SKIPPED, e) for file_path in paths]
 
-            progress.advance(task)
+    if sync is not None:
+        sync.merge(*sync_state)
+    if cache is not None:
+        cache.merge(*cache_state)
+    return [
+        ProcessingResult(file_path, result, error, duration)
+        for file_path, (result, error, duration) in zip(paths, compact)
+    ]
 
 
-def _process_without_progress(
+def _process_in_processes(
     files: List[Path],
     processor: FileProcessor,
     mode: str,
     workers: int,
     results: List[Union[ProcessingResult, None]],
     operation: str = "ensure",
+    advance: Union[Callable[[int], None], None] = None,
 ) -> None:
-    """Process files without progress bar display."""
-    with ThreadPoolExecutor(max_workers=workers) as executor:
-        # Submit all tasks and keep track of their index
-        future_to_index = {
-            executor.submit(processor.process_file, file_path, mode, operation): i
-            for i, file_path in enumerate(files)
+    """Process files in batches on a pool of worker processes set up like *processor*."""
+    initargs = _worker_initargs(processor, mode, operation)
+    sync, cache = processor.sync, processor.cache
+
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=initargs
+    ) as executor:
+        future_to_batch = {
+            executor.submit(_process_chunk, files[start:stop]): (start, stop)
+            for start, stop in _batches(len(files), workers)
         }
 
         # Collect results as they complete
-        for future in as_completed(future_to_index):
-            index = future_to_index[future]
-            try:
-                result = future.result()
+        for future in as_completed(future_to_batch):
+            start, stop = future_to_batch[future]
+            chunk = _unpack_chunk(files[start:stop], future, sync, cache)
+            for index, result in enumerate(chunk, start):
                 results[index] = result
-            except Exception as e:
-                # This should not happen since process_file handles exceptions
-                # But we include it for extra safety
-                results[index] = ProcessingResult(
-                    file_path=files[index], result=Result.SKIPPED, error=e
-                )
 
+            if advance is not None:
+                advance(stop - start)
 
-def collect_processing_statistics(results: List[ProcessingResult]) -> Dict:
+
+def process_files_iter(
+    files: Iterable[Path],
+    project_root: Path,
+    mode: str = "fix",
+    workers: Union[int, str, None] = None,
+    operation: str = "ensure",
+    sync: Union[SyncPolicy, None] = None,
+    cache: Union[ResultCache, None] = None,
+    executor: ExecutorKind = ExecutorKind.THREAD,
+    ordered: bool = False,
+    timeout: Union[float, None] = None,
+    resolved_paths: bool = False,
+) -> Generator[ProcessingResult, None, None]:
+    """Process files in parallel, yielding each result as soon as it is available.
+
+    Unlike :func:`process_files_parallel`, *files* is consumed lazily and no
+    result is kept once yielded, so memory stays constant however many
+    paths are processed. Closing the generator early cancels queued batches
+    and stops worker threads after their current file; worker processes
+    finish their current batch, whose files are still synced and cached.
+
+    Args:
+        files: Paths to process; any iterable, including a generator.
+        project_root: Root directory for relative path computation.
+        mode: Processing mode ("fix" or "check").
+        workers: Number of worker threads or processes. Defaults to
+            os.cpu_count(). ``AUTO_WORKERS`` behaves as in
+            :func:`process_files_parallel`; only sized inputs can be
+            recognised as small enough to process inline.
+        operation: Operation type ("ensure", "delete" or "sync").
+        sync: Durability policy for rewritten files; flushed once all files
+            are processed.
+        cache: Cache of known-good files to consult and update; saved once
+            all files are processed.
+        executor: Whether to process files in worker threads or processes.
+        ordered: Yield results in input order. Batches finishing early wait
+            in a reorder buffer; buffered and running batches together never
+            exceed ``workers * _STREAM_BATCHES_PER_WORKER``.
+        timeout: Seconds a single file may take before it is abandoned and
+            reported as timed out; None waits indefinitely.
+        resolved_paths: Whether *files* are resolved paths of regular files,
+            as :func:`path_comment.discovery.discover_files` yields them;
+            workers then skip resolving and stat'ing each file again.
+
+    Yields:
+        ProcessingResult objects, in completion order unless *ordered*.
+
+    Raises:
+        ProcessingError: If there's a critical error in parallel processing setup.
+    """
+    workers, autotune = _resolve_workers(workers)
+    processor = FileProcessor(project_root, sync, cache, timeout, resolved_paths)
+
+    try:
+        try:
+            if autotune and isinstance(files, Sized) and len(files) <= _INLINE_MAX_FILES:
+                for file_path in files:
+                    yield processor.process_file(file_path, mode, operation)
+            else:
+                tuner = None
+                if autotune and executor is ExecutorKind.THREAD:
+                    tuner = _WorkerTuner(workers, _AUTO_MAX_WORKERS)
+                with closing(
+                    _stream_batches(
+                        files, processor, mode, operation, workers, executor, ordered, tuner
+                    )
+                ) as batches:
+                    for batch in batches:
+                        yield from batch
+        finally:
+            # Also on early close, so files rewritten so far are synced and cached
+            _wait_for_abandoned()
+            if sync is not None:
+                sync.flush()
+            if cache is not None:
+                cache.save()
+
+    except Exception as e:
+        raise ProcessingError(f"Failed to process files in parallel: {e}") from e
+
+
+def _stream_batches(
+    files: Iterable[Path],
+    processor: FileProcessor,
+    mode: str,
+    operation: str,
+    workers: int,
+    executor: ExecutorKind,
+    ordered: bool,
+    tuner: Union[_WorkerTuner, None] = None,
+) -> Generator[List[ProcessingResult], None, None]:
+    """Process *files* in batches on a new pool, yielding the results of each batch.
+
+    At most ``workers * _STREAM_BATCHES_PER_WORKER`` batches are running or
+    waiting in the reorder buffer. With a *tuner*, the thread pool may grow
+    to ``tuner.limit`` threads, but only ``tuner.workers`` batches are in
+    flight, so idle threads are never started; throughput is measured over
+    windows of ``_PROBE_SECONDS``.
+    """
+    source = iter(files)
+    sync, cache = processor.sync, processor.cache
+    pool: Executor
+    if executor is ExecutorKind.PROCESS:
+        initargs = _worker_initargs(processor, mode, operation)
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs)
+    else:
+        pool = ThreadPoolExecutor(max_workers=tuner.limit if tuner is not None else workers)
+
+    running: Dict[Future, Tuple[int, List[Path]]] = {}
+    finished: Dict[int, List[ProcessingResult]] = {}  # reorder buffer
+    future: Future
+    stop = threading.Event()
+    submitted = next_to_yield = 0
+    exhausted = False
+    window_files, window_start = 0, time.perf_counter()
+    try:
+        while True:
+            limit = tuner.workers if tuner is not None else workers * _STREAM_BATCHES_PER_WORKER
+            while not exhausted and len(running) + len(finished) < limit:
+                paths = list(islice(source, _STREAM_BATCH_SIZE))
+                if not paths:
+                    exhausted = True
+                    break
+                if executor is ExecutorKind.PROCESS:
+                    future = pool.submit(_process_chunk, paths)
+                else:
+                    future = pool.submit(_process_paths, processor, paths, mode, operation, stop)
+                running[future] = (submitted, paths)
+                submitted += 1
+
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, paths = running.pop(future)
+                if executor is ExecutorKind.PROCESS:
+                    finished[index] = _unpack_chunk(paths, future, sync, cache)
+                else:
+                    finished[index] = future.result()
+                window_files += len(paths)
+
+            if ordered:
+                while next_to_yield in finished:
+                    yield finished.pop(next_to_yield)
+                    next_to_yield += 1
+            else:
+                for index in list(finished):
+                    yield finished.pop(index)
+
+            elapsed = time.perf_counter() - window_start
+            if tuner is not None and not tuner.settled and elapsed >= _PROBE_SECONDS:
+                tuner.observe(window_files, elapsed)
+                window_files, window_start = 0, time.perf_counter()
+    finally:
+        # Also reached when the caller stops iterating early
+        stop.set()
+        started = [future for future in running if not future.cancel()]
+        if executor is ExecutorKind.PROCESS:
+            # Worker processes cannot be interrupted, so started batches still
+            # rewrite files; take over their sync and cache state all the same
+            for future in started:
+                _unpack_chunk(running[future][1], future, sync, cache)
+        pool.shutdown()
+
+
+def _process_paths(
+    processor: FileProcessor,
+    paths: List[Path],
+    mode: str,
+    operation: str,
+    stop: threading.Event,
+) -> List[ProcessingResult]:
+    """Process one streamed batch in a worker thread, until *stop* is set."""
+    results: List[Union[ProcessingResult, None]] = [None] * len(paths)
+    for index in range(len(paths)):
+        if stop.is_set():
+            break
+        _process_batch(processor, paths, index, index + 1, mode, operation, results)
+    return [result for result in results if result is not None]
+
+
+async def process_files_async(
+    files: Union[AsyncIterable[Path], Iterable[Path]],
+    project_root: Path,
+    mode: str = "fix",
+    operation: str = "ensure",
+    concurrency: Union[int, None] = None,
+    executor: Union[Executor, None] = None,
+    sync: Union[SyncPolicy, None] = None,
+    cache: Union[ResultCache, None] = None,
+    timeout: Union[float, None] = None,
+    resolved_paths: bool = False,
+) -> AsyncIterator[ProcessingResult]:
+    """Process files from an asyncio application, yielding results as they complete.
+
+    File I/O runs on *executor*, so the event loop is never blocked. Passing
+    one long-lived executor to every call lets concurrent callers (for
+    example, one per incoming review request) share a single warm pool.
+
+    Args:
+        files: Paths to process; consumed lazily, so paths may still be
+            produced while earlier files are processed.
+        project_root: Root directory for relative path computation.
+        mode: Processing mode ("fix" or "check").
+        operation: Operation type ("ensure", "delete" or "sync").
+        concurrency: Maximum number of files in flight for this call.
+            Defaults to os.cpu_count().
+        executor: Executor running the file I/O. Defaults to the event
+            loop's default executor.
+        sync: Durability policy for rewritten files; flushed once all files
+            are processed, or once the files in flight are done when the
+            caller stops early.
+        cache: Cache of known-good files to consult and update; saved like
+            *sync* is flushed.
+        timeout: Seconds a single file may take before it is abandoned and
+            reported as timed out; None waits indefinitely.
+        resolved_paths: Whether *files* are resolved paths of regular files,
+            as :func:`path_comment.discovery.discover_files` yields them;
+            workers then skip resolving and stat'ing each file again.
+
+    Yields:
+        ProcessingResult objects in completion order, not input order. When
+        the caller stops early, files not yet started are left alone.
+
+    Raises:
+        ProcessingError: If flushing the sync policy or saving the cache fails.
+    """
+    loop = asyncio.get_running_loop()
+    processor = FileProcessor(project_root, sync, cache, timeout, resolved_paths)
+    semaphore = asyncio.Semaphore(concurrency or os.cpu_count() or 1)
+    # Completed results, plus a sentinel once every path has been submitted
+    done: asyncio.Queue[Union[ProcessingResult, Exception, None]] = asyncio.Queue()
+    submitted = 0
+    stop = threading.Event()
+
+    def process(file_path: Path) -> Union[ProcessingResult, None]:
+        # Files still queued in the executor when the caller stops are skipped
+        if stop.is_set():
+            return None
+        return processor.process_file(file_path, mode, operation)
+
+    async def run(file_path: Path) -> None:
+        result: Union[ProcessingResult, None]
+        try:
+            result = await loop.run_in_executor(executor, process, file_path)
+        except Exception as e:
+            result = ProcessingResult(file_path=file_path, result=Result.SKIPPED, error=e)
+        finally:
+            semaphore.release()
+        if result is not None:
+            done.put_nowait(result)
+
+    async def feed() -> None:
+        nonlocal submitted
+        try:
+            async for file_path in _aiter_paths(files):
+                await semaphore.acquire()
+                task = loop.create_task(run(file_path))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                submitted += 1
+        except Exception as e:
+            done.put_nowait(e)
+        else:
+            done.put_nowait(None)
+
+    tasks: Set[asyncio.Task] = set()
+    feeder = loop.create_task(feed())
+    yielded = 0
+    fed = False
+    try:
+        while not fed or yielded < submitted:
+            item = await done.get()
+            if item is None:
+                fed = True
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                yielded += 1
+                yield item
+    finally:
+        # Reached on completion as well as when the caller stops early. Files
+        # being processed cannot be interrupted, so they are waited for, and
+        # what they wrote is synced and cached like everything before them
+        feeder.cancel()
+        stop.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        try:
+            await loop.run_in_executor(executor, _wait_for_abandoned)
+            if sync is not None:
+                await loop.run_in_executor(executor, sync.flush)
+            if cache is not None:
+                await loop.run_in_executor(executor, cache.save)
+        except Exception as e:
+            raise ProcessingError(f"Failed to finish processing files: {e}") from e
+
+
+async def _aiter_paths(files: Union[AsyncIterable[Path], Iterable[Path]]) -> AsyncIterator[Path]:
+    """Iterate *files* asynchronously, whether it is a sync or an async iterable."""
+    if isinstance(files, AsyncIterable):
+        async for file_path in files:
+            yield file_path
+    else:
+        for file_path in files:
+            yield file_path
+
+
+def collect_processing_statistics(results: Iterable[ProcessingResult]) -> Dict:
     """Collect statistics from processing results.
 
     Args:
-        results: List of processing results.
+        results: Processing results; any iterable, including a result stream.
 
     Returns:
         Dictionary with processing statistics.
     """
     stats = {
-        "total": len(results),
+        "total": 0,
         "ok": 0,
         "changed": 0,
         "skipped": 0,
@@ -214,23 +961,67 @@ def collect_processing_statistics(results: List[ProcessingResult]) -> Dict:
     }
 
     for result in results:
-        if result.result == Result.OK:
-            stats["ok"] += 1
-        elif result.result == Result.CHANGED:
-            stats["changed"] += 1
-        elif result.result == Result.REMOVED:
-            stats["removed"] += 1
-        elif result.result == Result.SKIPPED:
-            stats["skipped"] += 1
-
-        if result.error is not None:
-            stats["errors"] += 1
+        update_processing_statistics(stats, result)
 
     return stats
 
 
+def update_processing_statistics(stats: Dict, result: ProcessingResult) -> None:
+    """Count one more result into *stats*, as returned by collect_processing_statistics.
+
+    Args:
+        stats: Statistics dictionary to update in place.
+        result: Processing result to count.
+    """
+    stats["total"] += 1
+    if result.result == Result.OK:
+        stats["ok"] += 1
+    elif result.result == Result.CHANGED:
+        stats["changed"] += 1
+    elif result.result == Result.REMOVED:
+        stats["removed"] += 1
+    elif result.result == Result.SKIPPED:
+        stats["skipped"] += 1
+
+    if result.error is not None:
+        stats["errors"] += 1
+
+
+class SlowestFiles:
+    """Keep the slowest results of a stream, in memory bounded by their number."""
+
+    def __init__(self, count: int) -> None:
+        """Initialize the tracker.
+
+        Args:
+            count: Number of slowest results to keep; 0 keeps none.
+        """
+        self.count = count
+        self._heap: List[Tuple[float, int, ProcessingResult]] = []
+        self._seen = 0
+
+    def add(self, result: ProcessingResult) -> None:
+        """Consider *result*, keeping it if it is among the slowest so far."""
+        if self.count <= 0:
+            return
+        # The counter breaks ties, so results themselves are never compared
+        item = (result.duration, self._seen, result)
+        self._seen += 1
+        if len(self._heap) < self.count:
+            heapq.heappush(self._heap, item)
+        else:
+            heapq.heappushpop(self._heap, item)
+
+    def results(self) -> List[ProcessingResult]:
+        """Return the kept results, slowest first."""
+        return [result for _, _, result in sorted(self._heap, key=lambda item: -item[0])]
+
+
 def print_processing_summary(
-    results: List[ProcessingResult], mode: str, show_details: bool = False
+    results: List[ProcessingResult],
+    mode: str,
+    show_details: bool = False,
+    sync_seconds: Union[float, None] = None,
 ) -> None:
     """Print a summary of processing results.
 
@@ -238,9 +1029,26 @@ def print_processing_summary(
         results: List of processing results.
         mode: Processing mode that was used.
         show_details: Whether to show detailed file-by-file results.
+        sync_seconds: Time spent syncing rewritten files to disk, if tracked.
     """
-    stats = collect_processing_statistics(results)
+    print_statistics(collect_processing_statistics(results), mode, sync_seconds)
+
+    if show_details:
+        console.print("\n[bold]Details:[/bold]")
+        for result in results:
+            print_result_detail(result)
+
+    console.print()
 
+
+def print_statistics(stats: Dict, mode: str, sync_seconds: Union[float, None] = None) -> None:
+    """Print the counts of a statistics dictionary.
+
+    Args:
+        stats: Statistics as returned by collect_processing_statistics.
+        mode: Processing mode that was used.
+        sync_seconds: Time spent syncing rewritten files to disk, if tracked.
+    """
     console.print(f"\n[bold]Processing Summary ({mode} mode)[/bold]")
     console.print(f"Total files: {stats['total']}")
     console.print(f"[green]OK (no changes needed): {stats['ok']}[/green]")
@@ -251,20 +1059,39 @@ def print_processing_summary(
     if stats["errors"] > 0:
         console.print(f"[red]Errors: {stats['errors']}[/red]")
 
-    if show_details:
-        console.print("\n[bold]Details:[/bold]")
-        for result in results:
-            status_color = {
-                Result.OK: "green",
-                Result.CHANGED: "yellow",
-                Result.REMOVED: "red",
-                Result.SKIPPED: "blue",
-            }.get(result.result, "white")
+    if sync_seconds is not None:
+        console.print(f"Time syncing to disk: {sync_seconds:.3f}s")
 
-            status_text = result.result.name
-            if result.error:
-                status_text += f" (Error: {result.error})"
 
-            console.print(f"  [{status_color}]{status_text}[/{status_color}]: {result.file_path}")
+def print_slowest_files(results: List[ProcessingResult]) -> None:
+    """Print the duration and path of each result, e.g. as kept by SlowestFiles.
 
-    console.print()
+    Args:
+        results: Processing results, in the order to print them.
+    """
+    if not results:
+        return
+    console.print(f"\n[bold]Slowest {len(results)} files:[/bold]")
+    for result in results:
+        note = " [red](timed out)[/red]" if isinstance(result.error, FileTimeoutError) else ""
+        console.print(f"  {result.duration:8.3f}s  {result.file_path}{note}")
+
+
+def print_result_detail(result: ProcessingResult) -> None:
+    """Print the status line of a single file.
+
+    Args:
+        result: Processing result to print.
+    """
+    status_color = {
+        Result.OK: "green",
+        Result.CHANGED: "yellow",
+        Result.REMOVED: "red",
+        Result.SKIPPED: "blue",
+    }.get(result.result, "white")
+
+    status_text = result.result.name
+    if result.error:
+        status_text += f" (Error: {result.error})"
+
+    console.print(f"  [{status_color}]{status_text}[/{status_color}]: {result.file_path}")
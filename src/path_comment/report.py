@@ -0,0 +1,177 @@
+# src/path_comment/report.py
+"""Write run reports and merge the reports of sharded runs.
+
+A run started with ``--report`` records its statistics and every file that
+did not come out OK. When a large check is split across CI nodes with
+``--shard``, the reports of all shards merge into the outcome of one full
+run, which ``path-comment-hook merge-reports`` prints and gates on.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+
+from .injector import Result
+from .processor import ProcessingResult, collect_processing_statistics
+
+# Version of the report file layout
+REPORT_FORMAT = 1
+
+
+class ReportError(Exception):
+    """Raised when a report cannot be written, read or merged."""
+
+    pass
+
+
+@dataclass
+class ReportedFile:
+    """A file that did not come out OK in a reported run.
+
+    Attributes:
+        path: Path relative to the project root, in POSIX form.
+        result: Name of the :class:`~path_comment.injector.Result`.
+        error: Error message, if processing failed.
+    """
+
+    path: str
+    result: str
+    error: Union[str, None] = None
+
+
+@dataclass
+class RunReport:
+    """Outcome of a run, or of one shard of it.
+
+    Attributes:
+        mode: Processing mode ("fix" or "check").
+        operation: Operation type ("ensure", "delete" or "sync").
+        shard: ``(index, count)`` of a sharded run, or None.
+        stats: Statistics as returned by collect_processing_statistics.
+        files: Files that were changed, removed, skipped or failed.
+    """
+
+    mode: str
+    operation: str
+    shard: Union[Tuple[int, int], None]
+    stats: Dict[str, int]
+    files: List[ReportedFile] = field(default_factory=list)
+
+    def add(self, result: ProcessingResult, project_root: Path) -> None:
+        """Record *result* unless its file came out OK without errors."""
+        if result.result is Result.OK and result.error is None:
+            return
+        try:
+            path = result.file_path.relative_to(project_root).as_posix()
+        except ValueError:
+            path = result.file_path.as_posix()
+        error = str(result.error) if result.error is not None else None
+        self.files.append(ReportedFile(path, result.result.name, error))
+
+    @property
+    def failed(self) -> bool:
+        """Whether the run should fail: any error, or any change in check mode."""
+        if self.stats.get("errors", 0):
+            return True
+        return self.mode == "check" and bool(
+            self.stats.get("changed", 0) or self.stats.get("removed", 0)
+        )
+
+
+def write_report(report: RunReport, path: Path) -> None:
+    """Write *report* to *path* as JSON.
+
+    Raises:
+        ReportError: If the file cannot be written.
+    """
+    data = {
+        "format": REPORT_FORMAT,
+        "mode": report.mode,
+        "operation": report.operation,
+        "shard": list(report.shard) if report.shard is not None else None,
+        "stats": report.stats,
+        "files": [[f.path, f.result, f.error] for f in report.files],
+    }
+    try:
+        path.write_text(json.dumps(data, indent=1) + "\n", encoding="utf-8")
+    except OSError as e:
+        raise ReportError(f"Failed to write report {path}: {e}") from e
+
+
+def read_report(path: Path) -> RunReport:
+    """Read a report written by :func:`write_report`.
+
+    Raises:
+        ReportError: If the file cannot be read or is not a report.
+    """
+    try:
+        text = path.read_text(encoding="utf-8")
+    except OSError as e:
+        raise ReportError(f"Failed to read report {path}: {e}") from e
+    try:
+        data = json.loads(text)
+        if data["format"] != REPORT_FORMAT:
+            raise ReportError(f"Unsupported report format {data['format']} in {path}")
+        shard = data["shard"]
+        return RunReport(
+            mode=str(data["mode"]),
+            operation=str(data["operation"]),
+            shard=(int(shard[0]), int(shard[1])) if shard is not None else None,
+            stats={key: int(value) for key, value in data["stats"].items()},
+            files=[ReportedFile(str(p), str(r), e) for p, r, e in data["files"]],
+        )
+    except ReportError:
+        raise
+    except (ValueError, TypeError, KeyError, IndexError) as e:
+        raise ReportError(f"{path} is not a valid report: {e}") from e
+
+
+def merge_reports(reports: List[RunReport]) -> RunReport:
+    """Combine the reports of the shards of one run.
+
+    Args:
+        reports: Reports of the same mode and operation. Sharded reports
+            must cover every shard of the same count exactly once.
+
+    Returns:
+        An unsharded report with the summed statistics and all files.
+
+    Raises:
+        ReportError: If the reports do not belong to one run.
+    """
+    if not reports:
+        raise ReportError("No reports to merge")
+
+    first = reports[0]
+    for report in reports[1:]:
+        if (report.mode, report.operation) != (first.mode, first.operation):
+            raise ReportError(
+                f"Cannot merge a {report.operation}/{report.mode} report "
+                f"with a {first.operation}/{first.mode} report"
+            )
+
+    shards = [report.shard for report in reports]
+    if any(shard is not None for shard in shards):
+        counts = {shard[1] for shard in shards if shard is not None}
+        if None in shards or len(counts) != 1:
+            raise ReportError("Reports come from differently sharded runs")
+        count = counts.pop()
+        indices = sorted(shard[0] for shard in shards if shard is not None)
+        if indices != list(range(1, count + 1)):
+            missing = sorted(set(range(1, count + 1)) - set(indices))
+            if missing:
+                names = ", ".join(f"{index}/{count}" for index in missing)
+                raise ReportError(f"Missing shard reports: {names}")
+            raise ReportError("Some shards are reported more than once")
+
+    stats: Dict[str, int] = collect_processing_statistics([])
+    files: List[ReportedFile] = []
+    for report in reports:
+        for key, value in report.stats.items():
+            stats[key] = stats.get(key, 0) + value
+        files.extend(report.files)
+    files.sort(key=lambda f: f.path)
+    return RunReport(first.mode, first.operation, None, stats, files)
@@ -0,0 +1,261 @@
+# tests/test_cache.py
+"""Test the persistent result cache."""
+
+import json
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from path_comment.cache import (
+    CACHE_DIR_NAME,
+    CacheError,
+    CacheMode,
+    ResultCache,
+    cache_key,
+    export_cache,
+    import_cache,
+)
+from path_comment.config import Config
+
+
+def _old_file(path: Path, content: str = "# a.py\n") -> Path:
+    """Write *path* with an mtime well outside the racy window."""
+    path.write_text(content, encoding="utf-8")
+    os.utime(path, (1_000_000_000, 1_000_000_000))
+    return path
+
+
+class TestResultCache:
+    """Test recording, persisting and invalidating known-good files."""
+
+    def test_recorded_entry_survives_save_and_load(self, tmp_path: Path) -> None:
+        """Test that a recorded file is known good in the next run."""
+        target = _old_file(tmp_path / "a.py")
+        cache = ResultCache.for_run(tmp_path, Config(), "ensure")
+        entry = cache.entry_for(target)
+        assert entry is not None
+        assert not cache.is_known_good(entry)
+
+        cache.record(entry)
+        cache.save()
+
+        reloaded = ResultCache.for_run(tmp_path, Config(), "ensure")
+        assert reloaded.is_known_good(entry)
+        assert (tmp_path / CACHE_DIR_NAME / ".gitignore").read_text().endswith("*\n")
+
+    def test_changed_signature_is_not_known_good(self, tmp_path: Path) -> None:
+        """Test that modifying a file invalidates its entry."""
+        target = _old_file(tmp_path / "a.py")
+        cache = ResultCache.for_run(tmp_path, Config(), "ensure")
+        entry = cache.entry_for(target)
+        assert entry is not None
+        cache.record(entry)
+
+        _old_file(target, "print('changed')\n")
+
+        changed = cache.entry_for(target)
+        assert changed is not None
+        assert not cache.is_known_good(changed)
+
+    def test_recently_modified_file_is_not_recorded(self, tmp_path: Path) -> None:
+        """Test that files within the racy window are not trusted."""
+        target = tmp_path / "a.py"
+        target.write_text("# a.py\n", encoding="utf-8")
+        cache = ResultCache.for_run(tmp_path, Config(), "ensure")
+        entry = cache.entry_for(target)
+        assert entry is not None
+
+        cache.record(entry)
+
+        assert not cache.is_known_good(entry)
+
+    def test_config_change_discards_cache(self, tmp_path: Path) -> None:
+        """Test that entries do not carry over to a different configuration."""
+        target = _old_file(tmp_path / "a.py")
+        cache = ResultCache.for_run(tmp_path, Config(), "ensure")
+        entry = cache.entry_for(target)
+        assert entry is not None
+        cache.record(entry)
+        cache.save()
+
+        other = ResultCache.for_run(tmp_path, Config(exclude_globs=["*.md"]), "ensure")
+        assert not other.is_known_good(entry)
+        delete = ResultCache.for_run(tmp_path, Config(), "delete")
+        assert not delete.is_known_good(entry)
+
+    def test_save_evicts_deleted_files(self, tmp_path: Path) -> None:
+        """Test that entries of files that no longer exist are dropped."""
+        kept = _old_file(tmp_path / "kept.py")
+        gone = _old_file(tmp_path / "gone.py")
+        cache = ResultCache.for_run(tmp_path, Config(), "ensure")
+        for path in (kept, gone):
+            entry = cache.entry_for(path)
+            assert entry is not None
+            cache.record(entry)
+        cache.save()
+
+        gone.unlink()
+        ResultCache.for_run(tmp_path, Config(), "ensure").save()
+
+        saved = json.loads((tmp_path / CACHE_DIR_NAME / "ensure.json").read_text())
+        assert list(saved["entries"]) == ["kept.py"]
+
+    def test_concurrent_runs_keep_each_others_updates(self, tmp_path: Path) -> None:
+        """Test that saving merges with what another run saved since loading."""
+        first, second, dropped = (_old_file(tmp_path / n) for n in ("a.py", "b.py", "c.py"))
+        setup = ResultCache.for_run(tmp_path, Config(), "ensure")
+        dropped_entry = setup.entry_for(dropped)
+        assert dropped_entry is not None
+        setup.record(dropped_entry)
+        setup.save()
+
+        one = ResultCache.for_run(tmp_path, Config(), "ensure")
+        two = ResultCache.for_run(tmp_path, Config(), "ensure")
+        entries = [one.entry_for(first), two.entry_for(second)]
+        assert entries[0] is not None and entries[1] is not None
+        one.record(entries[0])
+        one.forget(dropped_entry)
+        one.save()
+        two.record(entries[1])
+        two.save()
+
+        reloaded = ResultCache.for_run(tmp_path, Config(), "ensure")
+        assert reloaded.is_known_good(entries[0])
+        assert reloaded.is_known_good(entries[1])
+        assert not reloaded.is_known_good(dropped_entry)
+
+    def test_corrupt_cache_is_ignored(self, tmp_path: Path) -> None:
+        """Test that an unreadable cache file behaves like an empty cache."""
+        (tmp_path / CACHE_DIR_NAME).mkdir()
+        (tmp_path / CACHE_DIR_NAME / "ensure.json").write_text("{not json", encoding="utf-8")
+        target = _old_file(tmp_path / "a.py")
+
+        cache = ResultCache.for_run(tmp_path, Config(), "ensure")
+        entry = cache.entry_for(target)
+
+        assert entry is not None
+        assert not cache.is_known_good(entry)
+
+    def test_entry_for_file_outside_project_root(self, tmp_path: Path) -> None:
+        """Test that files outside the project root are not cached."""
+        root = tmp_path / "project"
+        root.mkdir()
+        outside = _old_file(tmp_path / "a.py")
+
+        cache = ResultCache.for_run(root, Config(), "ensure")
+
+        assert cache.entry_for(outside) is None
+        assert cache.entry_for(root / "missing.py") is None
+
+    def test_settings_without_effect_keep_the_cache(self) -> None:
+        """Test that durability and cache mode are not part of the fingerprint."""
+        assert cache_key(Config(), "ensure") == cache_key(
+            Config(durability="none", cache_mode="content"), "ensure"
+        )
+        assert cache_key(Config(), "ensure") != cache_key(Config(), "delete")
+
+
+class TestContentCache:
+    """Test the content-hash cache mode and cache artifacts."""
+
+    def _record(self, root: Path, *names: str) -> None:
+        cache = ResultCache.for_run(root, Config(), "ensure", CacheMode.CONTENT)
+        for name in names:
+            entry = cache.entry_for(root / name)
+            assert entry is not None
+            cache.record(entry)
+        cache.save()
+
+    def test_fresh_checkout_recognised_by_content(self, tmp_path: Path) -> None:
+        """Test that a rewritten file with identical bytes is still known good."""
+        target = tmp_path / "a.py"
+        target.write_text("# a.py\n", encoding="utf-8")  # mtime "now", as after a clone
+        self._record(tmp_path, "a.py")
+
+        target.unlink()
+        _old_file(target)
+        cache = ResultCache.for_run(tmp_path, Config(), "ensure", CacheMode.CONTENT)
+        entry = cache.entry_for(target)
+
+        assert entry is not None
+        assert cache.is_known_good(entry)
+        stat_cache = ResultCache.for_run(tmp_path, Config(), "ensure", CacheMode.STAT)
+        stat_entry = stat_cache.entry_for(target)
+        assert stat_entry is not None
+        assert not stat_cache.is_known_good(stat_entry)
+
+    def test_changed_content_is_not_known_good(self, tmp_path: Path) -> None:
+        """Test that a file with other bytes is not matched by its digest."""
+        target = _old_file(tmp_path / "a.py")
+        self._record(tmp_path, "a.py")
+
+        _old_file(target, "print('changed')\n")
+        cache = ResultCache.for_run(tmp_path, Config(), "ensure", CacheMode.CONTENT)
+        entry = cache.entry_for(target)
+
+        assert entry is not None
+        assert not cache.is_known_good(entry)
+
+    def test_unchanged_signature_skips_hashing(self, tmp_path: Path) -> None:
+        """Test that files with a known signature are not hashed again."""
+        _old_file(tmp_path / "a.py")
+        self._record(tmp_path, "a.py")
+
+        cache = ResultCache.for_run(tmp_path, Config(), "ensure", CacheMode.CONTENT)
+        with patch("path_comment.cache.file_digest") as mock_digest:
+            entry = cache.entry_for(tmp_path / "a.py")
+
+        mock_digest.assert_not_called()
+
+        assert entry is not None
+        assert cache.is_known_good(entry)
+
+    def test_export_import_warms_another_checkout(self, tmp_path: Path) -> None:
+        """Test that exported digests make files known good on another machine."""
+        main, pr = tmp_path / "main", tmp_path / "pr"
+        for root in (main, pr):
+            root.mkdir()
+            (root / "a.py").write_text("# a.py\n", encoding="utf-8")
+            (root / "b.py").write_text("# b.py\n", encoding="utf-8")
+        (pr / "b.py").write_text("# b.py\nprint('new')\n", encoding="utf-8")
+        self._record(main, "a.py", "b.py")
+        artifact = tmp_path / "cache.gz"
+
+        assert export_cache(main, artifact) == 2
+        assert import_cache(pr, artifact) == 2
+
+        cache = ResultCache.for_run(pr, Config(), "ensure", CacheMode.CONTENT)
+        entry_a, entry_b = cache.entry_for(pr / "a.py"), cache.entry_for(pr / "b.py")
+        assert entry_a is not None and entry_b is not None
+        assert cache.is_known_good(entry_a)
+        assert not cache.is_known_good(entry_b)
+
+    def test_content_mode_fills_in_digests_of_stat_entries(self, tmp_path: Path) -> None:
+        """Test that a content run after a stat run hashes known files, so they export."""
+        _old_file(tmp_path / "a.py")
+        stat_cache = ResultCache.for_run(tmp_path, Config(), "ensure", CacheMode.STAT)
+        entry = stat_cache.entry_for(tmp_path / "a.py")
+        assert entry is not None and entry.digest is None
+        stat_cache.record(entry)
+        stat_cache.save()
+        assert export_cache(tmp_path, tmp_path / "stat.gz") == 0
+
+        cache = ResultCache.for_run(tmp_path, Config(), "ensure", CacheMode.CONTENT)
+        entry = cache.entry_for(tmp_path / "a.py")
+        assert entry is not None and entry.digest is not None
+        assert cache.is_known_good(entry)
+        cache.save()
+
+        assert export_cache(tmp_path, tmp_path / "content.gz") == 1
+
+    def test_import_rejects_invalid_artifact(self, tmp_path: Path) -> None:
+        """Test that importing something that is not a cache export fails cleanly."""
+        artifact = tmp_path / "cache.gz"
+        artifact.write_bytes(b"not gzip")
+
+        with pytest.raises(CacheError, match="not a valid cache export"):
+            import_cache(tmp_path, artifact)
+        with pytest.raises(CacheError, match="Failed to import"):
+            import_cache(tmp_path, tmp_path / "missing.gz")
@@ -1,13 +1,20 @@
 # tests/test_cli.py
 """Test the CLI interface for path-comment-hook."""
 
+import os
+import shutil
+import subprocess
+import threading
 from pathlib import Path
 from unittest.mock import patch
 
 import pytest
+from rich.console import Console
 from typer.testing import CliRunner
 
 from path_comment.cli import app
+from path_comment.file_handler import Durability
+from path_comment.injector import Result
 
 
 class TestRunCommand:
@@ -191,6 +198,27 @@ class TestRunCommand:
         assert result.exit_code == 0
         assert test_file.read_text().startswith("# test.py\n")
 
+    def test_run_with_auto_workers(self, runner, tmp_path: Path) -> None:
+        """Test that --workers auto is passed through to the processor."""
+        test_file = tmp_path / "test.py"
+        test_file.write_text("print('hello')\n", encoding="utf-8")
+
+        with patch("path_comment.cli.process_files_iter", return_value=(r for r in [])) as process:
+            result = runner.invoke(
+                app,
+                ["run", "--workers", "auto", str(test_file), "--project-root", str(tmp_path)],
+            )
+
+        assert result.exit_code == 0
+        assert process.call_args.kwargs["workers"] == "auto"
+
+        result = runner.invoke(
+            app,
+            ["run", "--workers", "0", str(test_file), "--project-root", str(tmp_path)],
+        )
+        assert result.exit_code == 2
+        assert "positive integer" in result.output
+
     def test_run_with_nested_project_structure(self, runner, tmp_path: Path) -> None:
         """Test with nested directory structure."""
         # Create nested structure
@@ -217,6 +245,269 @@ class TestRunCommand:
         assert result.exit_code == 1
         assert "Configuration Error" in result.output
 
+    @pytest.mark.parametrize("durability", ["fsync", "batch", "none"])
+    def test_run_durability_option(self, runner, tmp_path: Path, durability: str) -> None:
+        """Test each --durability level rewrites the file."""
+        test_file = tmp_path / "test.py"
+        test_file.write_text("print('hello')\n", encoding="utf-8")
+
+        result = runner.invoke(
+            app,
+            [
+                "run",
+                "--durability",
+                durability,
+                str(test_file),
+                "--project-root",
+                str(tmp_path),
+            ],
+        )
+
+        assert result.exit_code == 0
+        assert test_file.read_text().startswith("# test.py\n")
+
+    @pytest.mark.parametrize(
+        ("args", "header", "reported"),
+        [
+            (["--durability", "fsync"], "", True),
+            (["--durability", "batch"], "", True),
+            (["--durability", "none"], "", False),
+            (["--durability", "fsync"], "# test.py\n", False),
+            (["--check"], "", False),
+        ],
+    )
+    def test_run_reports_sync_time_only_when_files_were_synced(
+        self, runner, tmp_path: Path, args: list, header: str, reported: bool
+    ) -> None:
+        """Test the sync time line is left out when nothing was written or synced."""
+        test_file = tmp_path / "test.py"
+        test_file.write_text(f"{header}print('hello')\n", encoding="utf-8")
+
+        result = runner.invoke(
+            app, ["run", "--verbose", *args, str(test_file), "--project-root", str(tmp_path)]
+        )
+
+        assert "Processing Summary" in result.output
+        assert ("Time syncing to disk" in result.output) is reported
+
+    def test_run_durability_from_config(self, runner, tmp_path: Path) -> None:
+        """Test the durability setting is taken from config without --all."""
+        (tmp_path / "pyproject.toml").write_text(
+            '[tool.path-comment-hook]\ndurability = "batch"\n', encoding="utf-8"
+        )
+        test_file = tmp_path / "test.py"
+        test_file.write_text("print('hello')\n", encoding="utf-8")
+
+        with patch("path_comment.cli.process_files_iter", return_value=(r for r in [])) as process:
+            runner.invoke(app, ["run", str(test_file), "--project-root", str(tmp_path)])
+
+        assert process.call_args.kwargs["sync"].durability is Durability.BATCH
+
+    def test_run_skips_unchanged_files_on_next_run(self, runner, tmp_path: Path) -> None:
+        """Test that a second check of an unchanged tree does not read files."""
+        test_file = tmp_path / "test.py"
+        test_file.write_text("# test.py\nprint('hello')\n", encoding="utf-8")
+        os.utime(test_file, (1_000_000_000, 1_000_000_000))
+        args = ["run", "--check", "--all", "--project-root", str(tmp_path)]
+
+        assert runner.invoke(app, args).exit_code == 0
+        with patch("path_comment.processor.ensure_header") as mock_ensure_header:
+            assert runner.invoke(app, args).exit_code == 0
+            mock_ensure_header.assert_not_called()
+
+            assert runner.invoke(app, [*args, "--no-cache"]).exit_code == 0
+            mock_ensure_header.assert_called_once()
+
+    def test_run_with_process_executor(self, runner, tmp_path: Path) -> None:
+        """Test processing files in worker processes."""
+        files = []
+        for i in range(3):
+            f = tmp_path / f"file{i}.py"
+            f.write_text(f"print('{i}')\n", encoding="utf-8")
+            files.append(str(f))
+
+        result = runner.invoke(
+            app,
+            ["run", "--executor", "process", "--project-root", str(tmp_path), *files],
+        )
+
+        assert result.exit_code == 0
+        for i in range(3):
+            assert (tmp_path / f"file{i}.py").read_text().startswith(f"# file{i}.py\n")
+
+    def test_run_check_fail_fast_stops_at_first_failure(self, runner, tmp_path: Path) -> None:
+        """Test that --fail-fast reports one failing file and exits 1."""
+        files = []
+        for i in range(3):
+            file_path = tmp_path / f"file{i}.py"
+            file_path.write_text("print('hello')\n", encoding="utf-8")
+            files.append(str(file_path))
+
+        result = runner.invoke(
+            app,
+            ["run", "--check", "--fail-fast", "--all", "--project-root", str(tmp_path)],
+        )
+
+        assert result.exit_code == 1
+        assert result.output.count("Would update") == 1
+        assert "--fail-fast" in result.output
+
+        # Without failures, --fail-fast changes nothing
+        result = runner.invoke(app, ["run", "--fail-fast", "--project-root", str(tmp_path), *files])
+        assert result.exit_code == 0
+        assert result.output.count("Updated") == 3
+
+    def test_run_with_schedule(self, runner, tmp_path: Path) -> None:
+        """Test that scheduled runs process every file."""
+        for i in range(3):
+            (tmp_path / f"file{i}.py").write_text("x = 1\n" * (i + 1), encoding="utf-8")
+
+        for schedule in ("locality", "largest-first"):
+            args = ["run", "--check", "--all", "--schedule", schedule]
+            result = runner.invoke(app, [*args, "--project-root", str(tmp_path)])
+
+            assert result.exit_code == 1
+            assert "Would update 3 files." in result.output
+
+    def test_sharded_check_reports_merge(self, runner, tmp_path: Path) -> None:
+        """Test that shard reports merge into the result of a full run."""
+        project = tmp_path / "project"
+        project.mkdir()
+        for i in range(12):
+            (project / f"file{i}.py").write_text("x = 1\n", encoding="utf-8")
+        reports = []
+        for index in (1, 2, 3):
+            report = tmp_path / f"shard{index}.json"
+            args = ["run", "--check", "--all", "--shard", f"{index}/3", "--report", str(report)]
+            runner.invoke(app, [*args, "--project-root", str(project)])
+            reports.append(str(report))
+
+        merged = tmp_path / "merged.json"
+        result = runner.invoke(app, ["merge-reports", *reports, "--output", str(merged)])
+
+        assert result.exit_code == 1
+        assert "Total files: 12" in result.output
+        assert "CHANGED: file11.py" in result.output
+        assert merged.exists()
+
+        result = runner.invoke(app, ["merge-reports", *reports[:2]])
+        assert result.exit_code == 1
+        assert "Missing shard reports: 3/3" in result.output
+
+        result = runner.invoke(app, ["run", "--shard", "4/3", "--project-root", str(project)])
+        assert result.exit_code == 2
+
+    def test_run_all_skips_symlinked_files(self, runner, tmp_path: Path) -> None:
+        """Test that --all neither reports nor counts symlinks to files."""
+        (tmp_path / "real.py").write_text("x = 1\n", encoding="utf-8")
+        (tmp_path / "link.py").symlink_to(tmp_path / "real.py")
+
+        args = ["run", "--all", "--check", "--verbose", "--discovery", "walk"]
+        result = runner.invoke(app, [*args, "--project-root", str(tmp_path)])
+
+        assert "Total files: 1" in result.output
+        assert "link.py" not in result.output
+        assert (tmp_path / "link.py").is_symlink()
+
+    def test_run_parallel_walk(self, runner, tmp_path: Path) -> None:
+        """Test that --walk-threads walks the tree on several threads."""
+        for name in ("a/one.py", "b/two.py", "three.py"):
+            (tmp_path / name).parent.mkdir(exist_ok=True)
+            (tmp_path / name).write_text("x = 1\n", encoding="utf-8")
+
+        args = ["run", "--all", "--discovery", "walk", "--walk-threads", "4"]
+        result = runner.invoke(app, [*args, "--project-root", str(tmp_path)])
+
+        assert result.exit_code == 0
+        assert (tmp_path / "b" / "two.py").read_text().startswith("# b/two.py\n")
+        assert runner.invoke(app, [*args, "--walk-threads", "0"]).exit_code == 2
+
+    def test_run_git_discovery_outside_repository(self, runner, tmp_path: Path) -> None:
+        """Test that --discovery git fails cleanly where git cannot list an index."""
+        (tmp_path / "main.py").write_text("x = 1\n", encoding="utf-8")
+
+        args = ["run", "--all", "--discovery", "git", "--project-root", str(tmp_path)]
+        with patch("path_comment.discovery.shutil.which", return_value=None):
+            result = runner.invoke(app, args)
+
+        assert result.exit_code == 1
+        assert "Discovery Error" in result.output
+        assert "git is not installed" in result.output
+
+    @pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+    def test_run_staged(self, runner, tmp_path: Path) -> None:
+        """Test that --staged processes only the files staged in git."""
+        for name in ("staged.py", "unstaged.py"):
+            (tmp_path / name).write_text("x = 1\n", encoding="utf-8")
+        subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+        subprocess.run(["git", "add", "staged.py"], cwd=tmp_path, check=True)
+
+        result = runner.invoke(app, ["run", "--staged", "--project-root", str(tmp_path)])
+
+        assert result.exit_code == 0
+        assert (tmp_path / "staged.py").read_text().startswith("# staged.py\n")
+        assert (tmp_path / "unstaged.py").read_text() == "x = 1\n"
+
+        args = ["run", "--staged", "--since", "main", "--project-root", str(tmp_path)]
+        assert runner.invoke(app, args).exit_code == 2
+        args = ["run", "--staged", "--all", "--project-root", str(tmp_path)]
+        assert runner.invoke(app, args).exit_code == 2
+
+    @pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+    def test_sync_renames(self, runner, tmp_path: Path) -> None:
+        """Test that sync-renames rewrites the stale header of a renamed file."""
+        identity = ["-c", "user.name=Test", "-c", "user.email=test@example.com"]
+        (tmp_path / "old.py").write_text("# old.py\nx = 1\n", encoding="utf-8")
+        (tmp_path / "same.py").write_text("# same.py\ny = 1\n", encoding="utf-8")
+        for args in (["init", "-q"], ["add", "."], ["commit", "-q", "-m", "base"]):
+            subprocess.run(["git", *identity, *args], cwd=tmp_path, check=True)
+        subprocess.run(["git", "mv", "old.py", "new.py"], cwd=tmp_path, check=True)
+
+        args = ["sync-renames", "--staged", "--project-root", str(tmp_path)]
+        result = runner.invoke(app, [*args, "--check"])
+        assert result.exit_code == 1
+        assert "Would update" in result.output
+
+        result = runner.invoke(app, args)
+        assert result.exit_code == 0
+        assert (tmp_path / "new.py").read_text() == "# new.py\nx = 1\n"
+        assert runner.invoke(app, [*args, "--check"]).exit_code == 0
+
+        result = runner.invoke(app, ["sync-renames", "--project-root", str(tmp_path)])
+        assert result.exit_code == 2
+
+    def test_run_timeout_and_slowest(self, runner, tmp_path: Path) -> None:
+        """Test that a stuck file times out and is listed among the slowest files."""
+        files = []
+        for name in ("a.py", "stuck.py", "b.py"):
+            (tmp_path / name).write_text("x = 1\n", encoding="utf-8")
+            files.append(str(tmp_path / name))
+        release = threading.Event()
+
+        def ensure_header(file_path: Path, *args, **kwargs) -> Result:
+            if file_path.name == "stuck.py":
+                release.wait(5)
+            return Result.OK
+
+        args = ["run", "--timeout", "0.1", "--slowest", "2", "--project-root", str(tmp_path)]
+        # A fixed width, so long tmp paths are not wrapped whatever the terminal;
+        # no grace period, as the stuck file is only released afterwards
+        with patch("path_comment.processor.ensure_header", side_effect=ensure_header), patch(
+            "path_comment.processor.console", Console(width=200)
+        ), patch("path_comment.processor._ABANDONED_GRACE_SECONDS", 0):
+            try:
+                result = runner.invoke(app, [*args, *files])
+            finally:
+                release.set()
+
+        assert result.exit_code == 1
+        assert "Errors: 1" in result.output
+        slowest = result.output.split("Slowest 2 files:")[1]
+        assert "stuck.py (timed out)" in slowest.splitlines()[1]
+
+        result = runner.invoke(app, ["run", "--timeout", "0", *files])
+        assert result.exit_code == 2
+
     def test_run_relative_paths(self, runner, tmp_path: Path) -> None:
         """Test with relative file paths (as pre-commit provides)."""
         # Create test file
@@ -299,6 +590,47 @@ default_mode = "folder"
         assert "Unexpected error" in result.output
 
 
+class TestCacheCommand:
+    """Test the cache export/import commands."""
+
+    @pytest.fixture
+    def runner(self):
+        """Create a CLI runner for testing."""
+        return CliRunner()
+
+    def test_cache_export_import_round_trip(self, runner, tmp_path: Path) -> None:
+        """Test that a content cache exported in one checkout warms another."""
+        main, pr = tmp_path / "main", tmp_path / "pr"
+        for root in (main, pr):
+            root.mkdir()
+            (root / "test.py").write_text("# test.py\nprint('hello')\n", encoding="utf-8")
+        artifact = tmp_path / "cache.gz"
+        check = ["run", "--check", "--all", "--cache-mode", "content", "--project-root"]
+
+        assert runner.invoke(app, [*check, str(main)]).exit_code == 0
+        result = runner.invoke(app, ["cache", "export", str(artifact), "--project-root", str(main)])
+        assert result.exit_code == 0
+        assert "Exported 1 cache entries" in result.output
+        result = runner.invoke(app, ["cache", "import", str(artifact), "--project-root", str(pr)])
+        assert result.exit_code == 0
+
+        with patch("path_comment.processor.ensure_header") as mock_ensure_header:
+            assert runner.invoke(app, [*check, str(pr)]).exit_code == 0
+            mock_ensure_header.assert_not_called()
+
+    def test_cache_import_invalid_file(self, runner, tmp_path: Path) -> None:
+        """Test that a broken artifact is reported as an error."""
+        artifact = tmp_path / "cache.gz"
+        artifact.write_text("garbage", encoding="utf-8")
+
+        result = runner.invoke(
+            app, ["cache", "import", str(artifact), "--project-root", str(tmp_path)]
+        )
+
+        assert result.exit_code == 1
+        assert "Cache Error" in result.output
+
+
 class TestPreCommitCompatibility:
     """Test pre-commit hook compatibility features."""
 
@@ -1,5 +1,8 @@
 # tests/test_config.py
 
+import os
+import subprocess
+import sys
 from pathlib import Path
 
 import pytest
@@ -95,6 +98,49 @@ custom_comment_map = ["not", "a", "dict"]
         with pytest.raises(ConfigError, match="custom_comment_map must be a dict"):
             load_config(tmp_path)
 
+    def test_load_config_reads_durability(self, tmp_path: Path) -> None:
+        """Test that the durability level is read from pyproject.toml."""
+        pyproject_file = tmp_path / "pyproject.toml"
+        pyproject_file.write_text('[tool.path-comment-hook]\ndurability = "batch"\n')
+
+        assert load_config(tmp_path).durability == "batch"
+
+    def test_load_config_validates_durability(self, tmp_path: Path) -> None:
+        """Test validation of durability values."""
+        pyproject_file = tmp_path / "pyproject.toml"
+        pyproject_file.write_text('[tool.path-comment-hook]\ndurability = "sometimes"\n')
+
+        with pytest.raises(ConfigError, match="Invalid durability"):
+            load_config(tmp_path)
+
+    def test_load_config_validates_discovery(self, tmp_path: Path) -> None:
+        """Test validation of discovery values."""
+        pyproject_file = tmp_path / "pyproject.toml"
+        pyproject_file.write_text('[tool.path-comment-hook]\ndiscovery = "find"\n')
+
+        with pytest.raises(ConfigError, match="Invalid discovery"):
+            load_config(tmp_path)
+
+    def test_load_config_validates_walk_threads(self, tmp_path: Path) -> None:
+        """Test validation of walk_threads values."""
+        pyproject_file = tmp_path / "pyproject.toml"
+        pyproject_file.write_text("[tool.path-comment-hook]\nwalk_threads = 0\n")
+
+        with pytest.raises(ConfigError, match="Invalid walk_threads"):
+            load_config(tmp_path)
+
+        pyproject_file.write_text('[tool.path-comment-hook]\nwalk_threads = "8"\n')
+        with pytest.raises(ConfigError, match="walk_threads must be an integer"):
+            load_config(tmp_path)
+
+    def test_load_config_validates_cache_mode(self, tmp_path: Path) -> None:
+        """Test validation of cache_mode values."""
+        pyproject_file = tmp_path / "pyproject.toml"
+        pyproject_file.write_text('[tool.path-comment-hook]\ncache_mode = "mtime"\n')
+
+        with pytest.raises(ConfigError, match="Invalid cache_mode"):
+            load_config(tmp_path)
+
 
 class TestConfigClass:
     """Test the Config dataclass functionality."""
@@ -140,6 +186,17 @@ class TestConfigClass:
         assert config.should_exclude(cache_file, tmp_path) is True  # Should be ignored
         assert config.should_exclude(regular_file, tmp_path) is False  # Should not be ignored
 
+    def test_config_should_prune_directory(self, tmp_path: Path) -> None:
+        """Test that only directories excluded as a whole are pruned."""
+        config = Config(exclude_globs=["generated/*", "src/*.py"])
+
+        assert config.should_prune(tmp_path / "node_modules", tmp_path) is True
+        assert config.should_prune(tmp_path / "generated", tmp_path) is True
+        assert config.should_prune(tmp_path / "generated" / "deep", tmp_path) is True
+        # Only the .py files of src are excluded, so it must still be walked
+        assert config.should_prune(tmp_path / "src", tmp_path) is False
+        assert config.should_prune(tmp_path / "lib" / "node_modules", tmp_path) is False
+
     def test_config_get_comment_prefix(self) -> None:
         """Test getting comment prefix from custom map."""
         config = Config(custom_comment_map={".py": "# {_path_}", ".js": "// {_path_}"})
@@ -174,3 +231,17 @@ class TestConfigClass:
         assert "default_ignore_patterns" in result
         assert isinstance(result["default_ignore_patterns"], list)
         assert len(result["default_ignore_patterns"]) > 0  # Should have patterns
+
+    def test_loading_config_does_not_import_the_modules_it_configures(self) -> None:
+        """Test that the setting enums live in config, not in the modules using them."""
+        code = (
+            "import sys, path_comment.config; "
+            "print(sorted(m for m in sys.modules if m.startswith('path_comment.')))"
+        )
+        env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+
+        completed = subprocess.run(
+            [sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True
+        )
+
+        assert completed.stdout.strip() == "['path_comment.__about__', 'path_comment.config']"
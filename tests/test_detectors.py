@@ -2,10 +2,17 @@
 """Tests for the detectors module."""
 
 from pathlib import Path
+from unittest.mock import patch
 
 import pytest
 
-from path_comment.detectors import COMMENT_PREFIXES, _get_shebang_tag, comment_prefix
+from path_comment.detectors import (
+    COMMENT_PREFIXES,
+    _get_shebang_tag,
+    comment_prefix,
+    file_tags,
+    is_supported,
+)
 
 
 class TestCommentPrefix:
@@ -252,6 +259,15 @@ class TestShebangDetection:
         result = _get_shebang_tag(script)
         assert result is None
 
+    def test_shebang_from_head_does_not_open_file(self) -> None:
+        """Test that supplied leading bytes are used instead of reading the file."""
+        missing = Path("/nonexistent/script")
+
+        assert _get_shebang_tag(missing, b"#!/usr/bin/env python3\nprint(1)\n") == "python"
+        assert _get_shebang_tag(missing, b"#!/bin/bash\n") == "shell"
+        assert _get_shebang_tag(missing, b"print(1)\n") is None
+        assert _get_shebang_tag(missing, b"#!\xff\xfe\n") is None
+
 
 class TestCommentPrefixesMapping:
     """Test the COMMENT_PREFIXES mapping."""
@@ -325,6 +341,38 @@ class TestShebangPriority:
         assert result == "#"
 
 
+class TestNameOnlyDetection:
+    """Test deciding the type of known regular files without touching them."""
+
+    def test_regular_file_tags_come_from_name(self) -> None:
+        """Test that a telling name needs no stat, while other files still get one."""
+        with patch("path_comment.detectors.tags_from_path", side_effect=AssertionError):
+            assert "python" in file_tags(Path("/nowhere/main.py"), regular_file=True)
+            assert is_supported(Path("/nowhere/main.py"), regular_file=True)
+            assert not is_supported(Path("/nowhere/logo.png"), regular_file=True)
+
+            # Without an encoding tag in the name, the content decides
+            with pytest.raises(AssertionError):
+                file_tags(Path("/nowhere/data.plist"), regular_file=True)
+            with pytest.raises(AssertionError):
+                file_tags(Path("/nowhere/main.py"))
+
+    def test_shebang_still_counts_for_unsupported_names(self, tmp_path: Path) -> None:
+        """Test that name-only detection agrees with comment_prefix on shebang scripts."""
+        script = tmp_path / "notes.md"
+        script.write_text("#!/bin/sh\necho hi\n", encoding="utf-8")
+        plain = tmp_path / "readme.md"
+        plain.write_text("# Title\n", encoding="utf-8")
+        tool = tmp_path / "tool"
+        tool.write_text("#!/usr/bin/env python\n", encoding="utf-8")
+
+        for path in (script, plain, tool):
+            expected = comment_prefix(path) is not None
+            assert is_supported(path, regular_file=True) is expected
+        assert is_supported(script, regular_file=True)
+        assert not is_supported(plain, regular_file=True)
+
+
 class TestEdgeCases:
     """Test edge cases and error handling."""
 
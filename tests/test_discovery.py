@@ -0,0 +1,506 @@
+# tests/test_discovery.py
+"""Test lazy file discovery, scheduling and background prefetching."""
+
+import os
+import shutil
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Iterator
+from unittest.mock import Mock, patch
+
+import pytest
+
+from path_comment import discovery
+from path_comment.config import Config
+from path_comment.discovery import (
+    DiscoveryError,
+    DiscoverySource,
+    FileEntry,
+    Schedule,
+    changed_files,
+    discover_file_entries,
+    discover_files,
+    prefetch,
+    renamed_files,
+    schedule_files,
+    shard_files,
+)
+
+
+class TestDiscoverFiles:
+    """Test walking the project tree."""
+
+    def test_yields_supported_non_excluded_files(self, tmp_path: Path) -> None:
+        """Test that only supported files outside excluded paths are found."""
+        (tmp_path / "src").mkdir()
+        (tmp_path / "src" / "main.py").write_text("x = 1\n", encoding="utf-8")
+        (tmp_path / "image.png").write_bytes(b"\x89PNG\r\n")
+        (tmp_path / "build").mkdir()
+        (tmp_path / "build" / "gen.py").write_text("x = 1\n", encoding="utf-8")
+
+        found = discover_files(tmp_path, Config(exclude_globs=["build/*"]))
+
+        assert not isinstance(found, list)
+        assert list(found) == [tmp_path / "src" / "main.py"]
+
+    def test_excluded_directories_are_not_listed(self, tmp_path: Path) -> None:
+        """Test that the walk prunes excluded subtrees instead of filtering their files."""
+        modules = tmp_path / "node_modules" / "pkg"
+        modules.mkdir(parents=True)
+        (modules / "index.js").write_text("x = 1\n", encoding="utf-8")
+        (tmp_path / "app.js").write_text("x = 1\n", encoding="utf-8")
+
+        with patch("path_comment.discovery.os.scandir", wraps=os.scandir) as scandir:
+            found = list(discover_files(tmp_path, Config()))
+
+        assert found == [tmp_path / "app.js"]
+        assert [call.args[0] for call in scandir.call_args_list] == [tmp_path]
+
+    def test_walk_order_is_stable(self, tmp_path: Path) -> None:
+        """Test that files come in name order, each directory before its subdirectories."""
+        for name in ("b/z.py", "b/a.py", "a/c/x.py", "a/y.py", "m.py"):
+            path = tmp_path / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text("x = 1\n", encoding="utf-8")
+
+        found = [p.relative_to(tmp_path).as_posix() for p in discover_files(tmp_path, Config())]
+
+        assert found == ["m.py", "a/y.py", "a/c/x.py", "b/a.py", "b/z.py"]
+
+    def test_gitignore_rules_are_applied_per_directory(self, tmp_path: Path) -> None:
+        """Test that nested .gitignore files prune ignored trees and re-include files."""
+        files = ["main.py", "debug.py", "generated/gen.py", "pkg/a.py", "pkg/debug.py", "pkg/x.py"]
+        for name in files:
+            path = tmp_path / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text("x = 1\n", encoding="utf-8")
+        (tmp_path / ".gitignore").write_text("debug.py\n/generated/\n", encoding="utf-8")
+        (tmp_path / "pkg" / ".gitignore").write_text("*.py\n!a.py\n", encoding="utf-8")
+
+        with patch("path_comment.discovery.os.scandir", wraps=os.scandir) as scandir:
+            found = [p.relative_to(tmp_path).as_posix() for p in discover_files(tmp_path, Config())]
+
+        assert found == ["main.py", "pkg/a.py"]
+        assert tmp_path / "generated" not in [call.args[0] for call in scandir.call_args_list]
+
+        unfiltered = discover_files(tmp_path, Config(use_gitignore=False))
+        assert len(list(unfiltered)) == len(files)
+
+    def test_files_are_not_stat_or_opened(self, tmp_path: Path) -> None:
+        """Test that the walk takes file types from the listing and support from names."""
+        (tmp_path / "pkg").mkdir()
+        for name in ("main.py", "pkg/util.js", "logo.png"):
+            (tmp_path / name).write_bytes(b"x = 1\n")
+        (tmp_path / "link.py").symlink_to(tmp_path / "main.py")
+
+        with patch("path_comment.detectors.tags_from_path", side_effect=AssertionError), patch(
+            "path_comment.detectors._get_shebang_tag", side_effect=AssertionError
+        ):
+            found = list(discover_files(tmp_path, Config(), DiscoverySource.WALK))
+
+        assert found == [tmp_path / "main.py", tmp_path / "pkg" / "util.js"]
+
+    @pytest.mark.parametrize("walk_threads", [1, 4])
+    def test_symlinked_files_are_not_listed(self, tmp_path: Path, walk_threads: int) -> None:
+        """Test that symlinks to files are left out, as identify never gave them a type."""
+        (tmp_path / "real.py").write_text("x = 1\n", encoding="utf-8")
+        (tmp_path / "link.py").symlink_to(tmp_path / "real.py")
+        (tmp_path / "dangling.py").symlink_to(tmp_path / "missing.py")
+
+        found = discover_files(tmp_path, Config(), DiscoverySource.WALK, walk_threads)
+
+        assert list(found) == [tmp_path / "real.py"]
+
+    @pytest.mark.parametrize("walk_threads", [1, 4])
+    def test_entries_carry_inode_and_size_from_listing(
+        self, tmp_path: Path, walk_threads: int
+    ) -> None:
+        """Test that inode numbers and sizes come from the listing, without a stat call."""
+        (tmp_path / "pkg").mkdir()
+        for name, size in (("main.py", 10), ("pkg/util.js", 300)):
+            (tmp_path / name).write_bytes(b"x" * size)
+        expected = [
+            FileEntry(path, os.stat(path).st_ino, os.stat(path).st_size)
+            for path in (tmp_path / "main.py", tmp_path / "pkg" / "util.js")
+        ]
+
+        with patch("path_comment.discovery.os.stat", side_effect=AssertionError):
+            found = discover_file_entries(
+                tmp_path, Config(), DiscoverySource.WALK, walk_threads, inodes=True, sizes=True
+            )
+            entries = list(found)
+
+        assert entries == expected
+        plain = discover_file_entries(tmp_path, Config(), DiscoverySource.WALK, walk_threads)
+        assert [entry.inode for entry in plain] == [None, None]
+
+    def test_parallel_walk_matches_serial_walk(self, tmp_path: Path) -> None:
+        """Test that listing directories on threads finds the same files in the same order."""
+        for top in range(6):
+            for sub in range(5):
+                for name in ("b.py", "a.py", "skip.py"):
+                    path = tmp_path / f"d{top}" / f"s{sub}" / name
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    path.write_text("x = 1\n", encoding="utf-8")
+        (tmp_path / "d2" / ".gitignore").write_text("skip.py\n", encoding="utf-8")
+        (tmp_path / "node_modules" / "pkg").mkdir(parents=True)
+        (tmp_path / "node_modules" / "pkg" / "index.js").write_text("x = 1\n", encoding="utf-8")
+        config = Config(exclude_globs=["d4/*"])
+
+        serial = list(discover_files(tmp_path, config, DiscoverySource.WALK))
+        with patch("path_comment.discovery.os.scandir", wraps=os.scandir) as scandir:
+            parallel = list(discover_files(tmp_path, config, DiscoverySource.WALK, walk_threads=4))
+
+        assert parallel == serial
+        assert len(serial) == 5 * 5 * 3 - 5
+        listed = [call.args[0] for call in scandir.call_args_list]
+        assert tmp_path / "node_modules" not in listed
+        assert tmp_path / "d4" not in listed
+
+    def test_parallel_walk_can_be_closed_early(self, tmp_path: Path) -> None:
+        """Test that closing a parallel walk stops its listing threads."""
+        for top in range(50):
+            (tmp_path / f"d{top:02}").mkdir()
+            (tmp_path / f"d{top:02}" / "a.py").write_text("x = 1\n", encoding="utf-8")
+
+        found = discover_files(tmp_path, Config(), DiscoverySource.WALK, walk_threads=2)
+        assert next(found) == tmp_path / "d00" / "a.py"
+        found.close()
+
+        walkers = [t for t in threading.enumerate() if t.name.startswith("path-comment-walk")]
+        assert walkers == []
+
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+class TestGitIndexDiscovery:
+    """Test listing files from the git index."""
+
+    @staticmethod
+    def _repo(root: Path) -> None:
+        for name in ("src/main.py", "src/gone.py", "docs/conf.js", "image.png"):
+            path = root / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(b"x = 1\n")
+        subprocess.run(["git", "init", "-q"], cwd=root, check=True)
+        subprocess.run(["git", "add", "."], cwd=root, check=True)
+        (root / "src" / "gone.py").unlink()
+        (root / "src" / "untracked.py").write_text("x = 1\n", encoding="utf-8")
+
+    def test_lists_tracked_files_on_disk(self, tmp_path: Path) -> None:
+        """Test that untracked, deleted and unsupported files are not found."""
+        self._repo(tmp_path)
+
+        found = discover_files(tmp_path, Config(), DiscoverySource.GIT)
+
+        assert list(found) == [tmp_path / "docs" / "conf.js", tmp_path / "src" / "main.py"]
+
+    def test_entries_carry_inode_and_size_from_index(self, tmp_path: Path) -> None:
+        """Test that inode numbers and sizes are read from the index, not stat'ed."""
+        self._repo(tmp_path)
+        (tmp_path / "src" / "with space.py").write_bytes(b"x" * 300)
+        subprocess.run(["git", "add", "src/with space.py"], cwd=tmp_path, check=True)
+        paths = [
+            tmp_path / "docs" / "conf.js",
+            tmp_path / "src" / "main.py",
+            tmp_path / "src" / "with space.py",
+        ]
+        expected = [FileEntry(p, os.stat(p).st_ino, os.stat(p).st_size) for p in paths]
+
+        found = discover_file_entries(
+            tmp_path, Config(), DiscoverySource.GIT, inodes=True, sizes=True
+        )
+        with patch("path_comment.discovery.os.stat", side_effect=AssertionError):
+            entries = list(found)
+
+        assert entries == expected
+
+    @pytest.mark.parametrize("parsed", [0, 3])
+    def test_unparsable_debug_output_falls_back_to_plain_listing(
+        self, tmp_path: Path, parsed: int
+    ) -> None:
+        """Test that a changed --debug format leaves entries to be stat'ed instead of failing."""
+        self._repo(tmp_path)
+        (tmp_path / "src" / "z.py").write_bytes(b"x = 1\n")
+        subprocess.run(["git", "add", "src/z.py"], cwd=tmp_path, check=True)
+        paths = [
+            tmp_path / "docs" / "conf.js",
+            tmp_path / "src" / "main.py",
+            tmp_path / "src" / "z.py",
+        ]
+        real = discovery._GIT_DEBUG
+        # Parse the stat data of the first *parsed* records, then none
+        matches = iter([True] * parsed)
+        debug = Mock()
+        debug.match.side_effect = lambda data: real.match(data) if next(matches, False) else None
+
+        with patch("path_comment.discovery._GIT_DEBUG", debug):
+            found = list(
+                discover_file_entries(tmp_path, Config(), DiscoverySource.GIT, inodes=True)
+            )
+
+        assert [entry.path for entry in found] == paths
+        # Three parsed records are enough to list the first file before the failure
+        assert [entry.inode is not None for entry in found] == [bool(parsed), False, False]
+
+    def test_auto_uses_git_only_in_repositories(self, tmp_path: Path) -> None:
+        """Test that auto discovery lists the index of a repository and walks otherwise."""
+        repo, plain = tmp_path / "repo", tmp_path / "plain"
+        repo.mkdir()
+        plain.mkdir()
+        self._repo(repo)
+        (plain / "main.py").write_text("x = 1\n", encoding="utf-8")
+
+        assert repo / "src" / "untracked.py" not in list(discover_files(repo, Config()))
+        assert list(discover_files(plain, Config())) == [plain / "main.py"]
+
+    def test_git_outside_repository(self, tmp_path: Path) -> None:
+        """Test that git discovery fails up front, while auto falls back to a walk."""
+        (tmp_path / ".git").mkdir()  # not a valid repository
+        (tmp_path / "main.py").write_text("x = 1\n", encoding="utf-8")
+
+        with pytest.raises(DiscoveryError, match="git ls-files failed"):
+            discover_files(tmp_path, Config(), DiscoverySource.GIT)
+        assert list(discover_files(tmp_path, Config())) == [tmp_path / "main.py"]
+
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+class TestChangedFiles:
+    """Test selecting the files git reports as changed."""
+
+    @staticmethod
+    def _git(root: Path, *args: str) -> None:
+        identity = ["-c", "user.name=Test", "-c", "user.email=test@example.com"]
+        subprocess.run(["git", *identity, *args], cwd=root, check=True, capture_output=True)
+
+    def _branch(self, root: Path) -> None:
+        """Commit a base on main, then rename and modify files on a feature branch."""
+        for name in ("a.py", "b.py", "c.py", "d.py", "skip/e.py"):
+            path = root / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(f"{name} = 1\n", encoding="utf-8")
+        self._git(root, "init", "-q", "-b", "main")
+        self._git(root, "add", ".")
+        self._git(root, "commit", "-q", "-m", "base")
+        self._git(root, "checkout", "-q", "-b", "feature")
+        self._git(root, "mv", "a.py", "renamed.py")
+        (root / "b.py").write_text("b = 2\n", encoding="utf-8")
+        (root / "skip" / "e.py").write_text("e = 2\n", encoding="utf-8")
+        self._git(root, "commit", "-q", "-am", "change")
+
+    def test_since_ref(self, tmp_path: Path) -> None:
+        """Test that committed and uncommitted changes since the merge base are found."""
+        self._branch(tmp_path)
+        (tmp_path / "c.py").write_text("c = 2\n", encoding="utf-8")  # uncommitted
+        self._git(tmp_path, "rm", "-q", "d.py")  # deletions are left out
+
+        found = changed_files(tmp_path, Config(exclude_globs=["skip/*"]), since="main")
+
+        assert found == [tmp_path / "b.py", tmp_path / "c.py", tmp_path / "renamed.py"]
+
+    def test_staged(self, tmp_path: Path) -> None:
+        """Test that only files changed in the index are found."""
+        self._branch(tmp_path)
+        (tmp_path / "new.py").write_text("n = 1\n", encoding="utf-8")
+        (tmp_path / "c.py").write_text("c = 2\n", encoding="utf-8")
+        self._git(tmp_path, "add", "new.py")
+
+        assert changed_files(tmp_path, Config(), staged=True) == [tmp_path / "new.py"]
+
+    def test_unknown_ref(self, tmp_path: Path) -> None:
+        """Test that an unknown ref is reported as a discovery error."""
+        self._branch(tmp_path)
+
+        with pytest.raises(DiscoveryError, match="merge-base failed"):
+            changed_files(tmp_path, Config(), since="no-such-branch")
+
+    def test_renamed_files(self, tmp_path: Path) -> None:
+        """Test that renames since the merge base are paired with their old paths."""
+        self._branch(tmp_path)
+        self._git(tmp_path, "mv", "c.py", "moved.py")  # staged, not committed
+
+        found = renamed_files(tmp_path, Config(), since="main")
+
+        assert found == [
+            (tmp_path / "c.py", tmp_path / "moved.py"),
+            (tmp_path / "a.py", tmp_path / "renamed.py"),
+        ]
+        assert renamed_files(tmp_path, Config(), staged=True) == [
+            (tmp_path / "c.py", tmp_path / "moved.py")
+        ]
+
+
+class TestScheduleFiles:
+    """Test reordering files for disk locality or size."""
+
+    @staticmethod
+    def _tree(root: Path) -> list:
+        paths = []
+        for directory, sizes in (("b", (10, 300, 20)), ("a", (5, 1000))):
+            (root / directory).mkdir()
+            for i, size in enumerate(sizes):
+                path = root / directory / f"f{i}.py"
+                path.write_bytes(b"x" * size)
+                paths.append(path)
+        return paths
+
+    def test_input_order_is_kept(self, tmp_path: Path) -> None:
+        """Test that the input schedule passes paths through untouched."""
+        paths = self._tree(tmp_path)
+
+        assert list(schedule_files(paths, Schedule.INPUT)) == paths
+
+    def test_locality_groups_by_directory_then_inode(self, tmp_path: Path) -> None:
+        """Test that locality order follows directory, then inode number."""
+        paths = self._tree(tmp_path)
+        expected = sorted(paths, key=lambda p: (str(p.parent), os.stat(p).st_ino))
+
+        scheduled = list(schedule_files(reversed(paths), Schedule.LOCALITY))
+
+        assert scheduled == expected
+        assert [p.parent.name for p in scheduled] == ["a", "a", "b", "b", "b"]
+
+    def test_largest_first(self, tmp_path: Path) -> None:
+        """Test that the biggest files are scheduled first."""
+        paths = self._tree(tmp_path)
+
+        scheduled = list(schedule_files(paths, Schedule.LARGEST_FIRST))
+
+        assert [p.stat().st_size for p in scheduled] == [1000, 300, 20, 10, 5]
+
+    def test_window_bounds_reordering(self, tmp_path: Path) -> None:
+        """Test that a window only reorders paths within each chunk."""
+        paths = self._tree(tmp_path)
+
+        scheduled = list(schedule_files(paths, Schedule.LARGEST_FIRST, window=3))
+
+        assert [p.stat().st_size for p in scheduled] == [300, 20, 10, 1000, 5]
+
+    def test_discovered_files_are_not_stat(self, tmp_path: Path) -> None:
+        """Test that the inode numbers and sizes of discovered files are used as they are."""
+        paths = self._tree(tmp_path)
+        entries = [FileEntry(p, inode, p.stat().st_size) for inode, p in enumerate(reversed(paths))]
+
+        with patch("path_comment.discovery.os.stat", side_effect=AssertionError):
+            local = list(schedule_files(entries, Schedule.LOCALITY))
+            largest = list(schedule_files(entries, Schedule.LARGEST_FIRST))
+
+        assert local == [paths[4], paths[3], paths[2], paths[1], paths[0]]
+        assert [p.stat().st_size for p in largest] == [1000, 300, 20, 10, 5]
+
+    def test_missing_file_goes_last_in_its_directory(self, tmp_path: Path) -> None:
+        """Test that files that cannot be stat'ed are scheduled after their neighbours."""
+        paths = self._tree(tmp_path)
+        missing = tmp_path / "a" / "gone.py"
+
+        scheduled = list(schedule_files([missing, *paths], Schedule.LOCALITY))
+
+        assert sorted(scheduled) == sorted([*paths, missing])
+        assert scheduled[2] == missing
+
+
+class TestShardFiles:
+    """Test splitting files deterministically across shards."""
+
+    def test_shards_are_disjoint_and_complete(self, tmp_path: Path) -> None:
+        """Test that every file lands in exactly one shard."""
+        paths = [tmp_path / "pkg" / f"mod{i}.py" for i in range(200)]
+
+        shards = [list(shard_files(paths, tmp_path, index, 4)) for index in range(1, 5)]
+
+        assert sorted(p for shard in shards for p in shard) == sorted(paths)
+        assert all(shards)
+
+    def test_assignment_depends_only_on_relative_path(self, tmp_path: Path) -> None:
+        """Test that two checkouts at different locations split identically."""
+        names = [f"src/mod{i}.py" for i in range(50)]
+        here = [tmp_path / "a" / name for name in names]
+        there = [tmp_path / "b" / name for name in names]
+
+        for index in (1, 2, 3):
+            mine = shard_files(here, tmp_path / "a", index, 3)
+            theirs = shard_files(there, tmp_path / "b", index, 3)
+            assert [p.relative_to(tmp_path / "a") for p in mine] == [
+                p.relative_to(tmp_path / "b") for p in theirs
+            ]
+
+    def test_balanced_shards_have_similar_sizes(self, tmp_path: Path) -> None:
+        """Test that size balancing evens out the bytes per shard."""
+        paths = []
+        for i, size in enumerate([900, 500, 400, 300, 300, 200, 100, 100]):
+            path = tmp_path / f"f{i}.py"
+            path.write_bytes(b"x" * size)
+            paths.append(path)
+
+        shards = [
+            list(shard_files(paths, tmp_path, index, 2, balance_by_size=True)) for index in (1, 2)
+        ]
+        sizes = [sum(p.stat().st_size for p in shard) for shard in shards]
+
+        assert sorted(p for shard in shards for p in shard) == sorted(paths)
+        assert sizes == [1400, 1400]
+        assert shards[0] == [p for p in paths if p in shards[0]]
+
+    def test_invalid_index(self, tmp_path: Path) -> None:
+        """Test that shard indices are 1-based and bounded by the count."""
+        with pytest.raises(ValueError, match="between 1 and 2"):
+            list(shard_files([], tmp_path, 0, 2))
+
+
+class TestPrefetch:
+    """Test running discovery on a background thread."""
+
+    def test_preserves_order(self) -> None:
+        """Test that paths come out in the order they were produced."""
+        paths = [Path(f"f{i}.py") for i in range(1000)]
+
+        assert list(prefetch(iter(paths), maxsize=16)) == paths
+
+    def test_producer_stays_within_bound(self) -> None:
+        """Test that the producer never runs more than maxsize paths ahead."""
+        produced = 0
+
+        def paths() -> Iterator[Path]:
+            nonlocal produced
+            for i in range(10_000):
+                produced += 1
+                yield Path(f"f{i}.py")
+
+        stream = prefetch(paths(), maxsize=8)
+        next(stream)
+        time.sleep(0.05)
+
+        assert produced <= 1 + 8 + 1
+        stream.close()
+
+    def test_close_stops_producer(self) -> None:
+        """Test that closing the iterator ends the background thread."""
+
+        def paths() -> Iterator[Path]:
+            while True:
+                yield Path("f.py")
+
+        stream = prefetch(paths(), maxsize=4)
+        next(stream)
+        stream.close()
+
+        deadline = time.monotonic() + 2
+        while time.monotonic() < deadline:
+            if not any(t.name == "path-comment-discovery" for t in threading.enumerate()):
+                break
+            time.sleep(0.01)
+        assert not any(t.name == "path-comment-discovery" for t in threading.enumerate())
+
+    def test_producer_error_is_reraised(self) -> None:
+        """Test that an error raised during the walk reaches the consumer."""
+
+        def paths() -> Iterator[Path]:
+            yield Path("a.py")
+            raise PermissionError("walk failed")
+
+        stream = prefetch(paths())
+
+        assert next(stream) == Path("a.py")
+        with pytest.raises(PermissionError, match="walk failed"):
+            next(stream)
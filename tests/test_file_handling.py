@@ -1,18 +1,24 @@
 # tests/test_file_handling.py
 """Including CRLF preservation, encoding detection, and atomic writes."""
 
+import errno
 import os
 from pathlib import Path
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
 import pytest
 
+from path_comment import file_handler
 from path_comment.file_handler import (
+    ENCODING_SAMPLE_SIZE,
+    Durability,
     FileHandler,
     FileHandlingError,
     LineEnding,
+    SyncPolicy,
     detect_encoding,
     detect_line_ending,
+    set_encoding_detector,
 )
 
 
@@ -100,6 +106,43 @@ class TestEncodingDetection:
         assert encoding is not None
         assert encoding != "utf-8"
 
+    def test_detect_encoding_samples_from_first_non_utf8_byte(self, tmp_path: Path) -> None:
+        """Test that the detector sees a bounded sample holding the non-UTF-8 bytes."""
+        file_path = tmp_path / "legacy.txt"
+        file_path.write_bytes(b"a" * 200_000 + "naïve façade\n".encode("cp1252") * 10_000)
+        detector = Mock(return_value=("windows-1252", 0.9))
+
+        with patch.object(file_handler, "_encoding_detector", detector):
+            encoding = detect_encoding(file_path)
+
+        (sample,) = detector.call_args.args
+        assert encoding == "windows-1252"
+        assert len(sample) == ENCODING_SAMPLE_SIZE
+        assert b"\xef" in sample
+
+    @pytest.mark.parametrize("encoding", ["utf-16", "utf-32"])
+    def test_detect_encoding_from_bom(self, tmp_path: Path, encoding: str) -> None:
+        """Test that a UTF-16/32 byte order mark decides without running the detector."""
+        file_path = tmp_path / "wide.txt"
+        file_path.write_bytes("print('hi')\n".encode(encoding))
+
+        with patch.object(file_handler, "_encoding_detector") as detector:
+            assert detect_encoding(file_path) == encoding
+
+        detector.assert_not_called()
+
+    def test_set_encoding_detector(self, tmp_path: Path) -> None:
+        """Test that a custom detector can be plugged in and removed again."""
+        file_path = tmp_path / "legacy.txt"
+        file_path.write_bytes("naïve\n".encode("cp1252"))
+
+        set_encoding_detector(lambda sample: ("cp1252", 1.0))
+        try:
+            assert detect_encoding(file_path) == "cp1252"
+        finally:
+            set_encoding_detector(None)
+        assert file_handler._encoding_detector is file_handler.chardet_detector
+
     def test_detect_encoding_handles_empty_file(self, tmp_path: Path) -> None:
         """Test encoding detection on empty file."""
         file_path = tmp_path / "test_empty.txt"
@@ -160,6 +203,181 @@ class TestFileHandler:
         assert result.encoding == "latin-1"
         mock_detect.assert_called_once()
 
+    def test_read_opens_file_once(self, tmp_path: Path) -> None:
+        """Test that read derives everything from a single read of the file."""
+        content = "#!/bin/sh\r\necho hi\r\n"
+        file_path = tmp_path / "script.sh"
+        file_path.write_bytes(content.encode("utf-8"))
+
+        handler = FileHandler(file_path)
+        with patch.object(Path, "open", autospec=True, side_effect=Path.open) as mock_open:
+            result = handler.read()
+
+        assert mock_open.call_count == 1
+        assert result.raw == content.encode("utf-8")
+        assert result.content == content
+        assert result.line_ending == LineEnding.CRLF
+
+    def test_read_raw_of_small_file_is_complete(self, tmp_path: Path) -> None:
+        """Test that a file shorter than the prefix is read completely."""
+        file_path = tmp_path / "test.py"
+        file_path.write_bytes(b"# test.py\r\nprint('hi')\r\n")
+
+        result = FileHandler(file_path).read_raw(64)
+
+        assert result.complete
+        assert result.data == b"# test.py\r\nprint('hi')\r\n"
+        assert result.encoding == "utf-8"
+        assert result.line_ending == LineEnding.CRLF
+
+    def test_read_raw_stops_at_prefix(self, tmp_path: Path) -> None:
+        """Test that only the requested prefix is read."""
+        file_path = tmp_path / "test.py"
+        # A multi-byte character straddles the prefix boundary
+        file_path.write_bytes(b"# test.py\n" + "é".encode() * 100)
+
+        result = FileHandler(file_path).read_raw(13)
+
+        assert not result.complete
+        assert result.data == file_path.read_bytes()[:13]
+        assert result.encoding == "utf-8"
+
+    def test_read_raw_detects_encoding_of_non_utf8_prefix(self, tmp_path: Path) -> None:
+        """Test that the encoding of a non-UTF-8 prefix is detected from the prefix."""
+        file_path = tmp_path / "test.py"
+        file_path.write_bytes("# héllo wørld\n".encode("latin-1") * 50)
+
+        result = FileHandler(file_path).read_raw(16)
+
+        assert not result.complete
+        assert result.data == file_path.read_bytes()[:16]
+        assert result.encoding != "utf-8"
+
+    def test_encoding_detected_once_per_handler(self, tmp_path: Path) -> None:
+        """Test that a full read after a prefix read reuses the detected encoding."""
+        file_path = tmp_path / "test.py"
+        file_path.write_bytes("# héllo wørld\n".encode("latin-1") * 50)
+        detector = Mock(return_value=("ISO-8859-1", 0.9))
+
+        with patch.object(file_handler, "_encoding_detector", detector):
+            handler = FileHandler(file_path)
+            handler.read_raw(16)
+            result = handler.read()
+
+        detector.assert_called_once()
+        assert result.encoding == "ISO-8859-1"
+        assert result.content == file_path.read_bytes().decode("latin-1")
+
+    def test_write_reuses_encoding_of_read(self, tmp_path: Path) -> None:
+        """Test that content is written back in the encoding it was read in."""
+        file_path = tmp_path / "test.py"
+        file_path.write_bytes("# café\n".encode("latin-1"))
+
+        with patch.object(file_handler, "_encoding_detector", return_value=("latin-1", 0.9)):
+            handler = FileHandler(file_path)
+            info = handler.read()
+        handler.write("# path.py\n" + info.content, info.line_ending)
+
+        assert file_path.read_bytes() == "# path.py\n# café\n".encode("latin-1")
+
+    def test_write_unread_file_as_utf8(self, tmp_path: Path) -> None:
+        """Test that a handler that has not read its file writes UTF-8."""
+        file_path = tmp_path / "test.py"
+
+        FileHandler(file_path).write("# café\n", LineEnding.LF)
+
+        assert file_path.read_bytes() == "# café\n".encode()
+
+    def test_write_bytes_joins_chunks(self, tmp_path: Path) -> None:
+        """Test that write_bytes writes the chunks verbatim and in order."""
+        file_path = tmp_path / "test.py"
+        original = b"a\r\nb\nc\r"
+        file_path.write_bytes(original)
+
+        view = memoryview(original)
+        FileHandler(file_path).write_bytes([b"# test.py\n", view[:3], b"", view[3:]])
+
+        assert file_path.read_bytes() == b"# test.py\n" + original
+
+    @pytest.mark.parametrize("copies", ["default", "none", "unsupported"])
+    def test_write_bytes_streams_tail(self, tmp_path: Path, copies: str) -> None:
+        """Test that the original tail is copied after the chunks by every copy path."""
+
+        def unsupported(src_fd: int, dst_fd: int, offset: int, count: int) -> int:
+            raise OSError(errno.EXDEV, "cross-device")
+
+        file_path = tmp_path / "dump.sql"
+        original = b"#!/bin/sh\n" + bytes(range(256)) * 4096
+        file_path.write_bytes(original)
+
+        kernel_copies = {
+            "default": file_handler._KERNEL_COPIES,
+            "none": [],
+            "unsupported": [unsupported],
+        }[copies]
+        with patch.object(file_handler, "_KERNEL_COPIES", kernel_copies):
+            FileHandler(file_path).write_bytes([original[:10], b"# dump.sql\n"], tail_from=10)
+
+        assert file_path.read_bytes() == original[:10] + b"# dump.sql\n" + original[10:]
+        assert list(tmp_path.iterdir()) == [file_path]
+
+    def test_fsync_policy_syncs_each_write(self, tmp_path: Path) -> None:
+        """The default policy fsyncs every file and accounts for the time."""
+        sync = SyncPolicy(Durability.FSYNC)
+        test_file = tmp_path / "test.py"
+        test_file.write_text("x\n")
+
+        with patch("path_comment.file_handler.os.fsync") as fsync:
+            FileHandler(test_file, sync).write("y\n", LineEnding.LF)
+
+        fsync.assert_called_once()
+        assert sync.sync_seconds > 0
+        assert test_file.read_text() == "y\n"
+
+    def test_batch_policy_defers_sync_to_flush(self, tmp_path: Path) -> None:
+        """Batched writes are not fsynced individually but synced on flush."""
+        sync = SyncPolicy(Durability.BATCH)
+        files = [tmp_path / f"f{i}.py" for i in range(3)]
+
+        with patch("path_comment.file_handler.os.fsync") as fsync:
+            for f in files:
+                FileHandler(f, sync).write("x\n", LineEnding.LF)
+        fsync.assert_not_called()
+
+        with patch("path_comment.file_handler._syncfs", None), patch(
+            "path_comment.file_handler.os.sync", create=True
+        ) as os_sync:
+            sync.flush()
+            sync.flush()
+
+        os_sync.assert_called_once()
+        assert sync.sync_seconds > 0
+
+    @pytest.mark.skipif(file_handler._syncfs is None, reason="syncfs() not available")
+    def test_batch_flush_uses_syncfs(self, tmp_path: Path) -> None:
+        """On Linux the flush issues one syncfs() for the touched filesystem."""
+        sync = SyncPolicy(Durability.BATCH)
+        for i in range(3):
+            FileHandler(tmp_path / f"f{i}.py", sync).write("x\n", LineEnding.LF)
+
+        with patch("path_comment.file_handler._syncfs", return_value=0) as syncfs:
+            sync.flush()
+
+        syncfs.assert_called_once()
+
+    def test_none_policy_never_syncs(self, tmp_path: Path) -> None:
+        """Durability NONE leaves flushing to the operating system."""
+        sync = SyncPolicy(Durability.NONE)
+        test_file = tmp_path / "test.py"
+
+        with patch("path_comment.file_handler.os.fsync") as fsync:
+            FileHandler(test_file, sync).write("x\n", LineEnding.LF)
+            sync.flush()
+
+        fsync.assert_not_called()
+        assert sync.sync_seconds == 0
+        assert test_file.read_text() == "x\n"
+
     def test_write_file_preserves_line_endings(self, tmp_path: Path) -> None:
         """Test that writing preserves original line endings."""
         original_content = "line1\r\nline2\r\nline3\r\n"
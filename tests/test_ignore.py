@@ -0,0 +1,105 @@
+# tests/test_ignore.py
+"""Test matching paths against .gitignore rules."""
+
+import warnings
+from pathlib import Path
+
+import pytest
+
+from path_comment.ignore import IgnoreRules, is_ignored
+
+
+class TestIgnoreRules:
+    """Test compiling and matching the rules of one ignore file."""
+
+    @pytest.mark.parametrize(
+        ("rules", "path", "is_dir", "expected"),
+        [
+            (["*.log"], "debug.log", False, True),
+            (["*.log"], "a/b/debug.log", False, True),
+            (["*.log"], "debug.py", False, None),
+            (["*.log", "!keep.log"], "logs/keep.log", False, False),
+            (["!keep.log", "*.log"], "keep.log", False, True),
+            (["build/"], "build", True, True),
+            (["build/"], "build", False, None),
+            (["build/"], "src/build", True, True),
+            (["/root.txt"], "root.txt", False, True),
+            (["/root.txt"], "sub/root.txt", False, None),
+            (["docs/*.md"], "docs/a.md", False, True),
+            (["docs/*.md"], "docs/sub/a.md", False, None),
+            (["docs/*.md"], "sub/docs/a.md", False, None),
+            (["**/gen"], "a/b/gen", True, True),
+            (["a/**/b"], "a/b", False, True),
+            (["a/**/b"], "a/x/y/b", False, True),
+            (["a/**"], "a/x/y", False, True),
+            (["a/**"], "a", True, None),
+            (["file?.py"], "file1.py", False, True),
+            (["file?.py"], "file10.py", False, None),
+            (["[!a]*.py"], "b.py", False, True),
+            (["[!a]*.py"], "a.py", False, None),
+            (["\\#hash", "\\!bang"], "#hash", False, True),
+            (["\\#hash", "\\!bang"], "!bang", False, True),
+            (["# comment", "", "trailing   "], "trailing", False, True),
+            (["# comment"], "# comment", False, None),
+            (["[[:alpha:]]x.py"], "ax.py", False, True),
+            (["[[:alpha:]]x.py"], "1x.py", False, None),
+            (["[[:digit:][:upper:]]"], "7", False, True),
+            (["[[:nope:]]"], "a", False, None),
+            (["a[]]b"], "a]b", False, True),
+            (["a[\\]x]b"], "a]b", False, True),
+            (["a[[]b"], "a[b", False, True),
+            (["a[!x]b", "a[/]b"], "a/b", False, None),
+            (["a[b"], "a[b", False, True),
+        ],
+    )
+    def test_match(self, rules, path: str, is_dir: bool, expected) -> None:
+        """Test gitignore pattern semantics, including negation and anchoring."""
+        assert IgnoreRules(rules).match(path, is_dir) is expected
+
+    def test_invalid_range_is_skipped(self) -> None:
+        """Test that a reversed range matches nothing and leaves the other rules working."""
+        rules = IgnoreRules(["foo[z-a]", "*.log", "bar[z-a0-9]"])
+
+        assert rules.match("fooa", False) is None
+        assert rules.match("debug.log", False) is True
+        assert rules.match("bar5", False) is True
+
+    def test_bracket_sets_compile_without_warnings(self) -> None:
+        """Test that sets are translated, not copied, so re never sees a nested set."""
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            rules = IgnoreRules(["[[:alpha:]]", "[[]", "[a&&b]", "[a--b]", "[^~]"])
+
+        assert rules.rule_count == 5
+        assert rules.match("&", False) is True
+
+    def test_from_file(self, tmp_path: Path) -> None:
+        """Test reading rules from a file, and that empty or missing files give None."""
+        (tmp_path / ".gitignore").write_text("# only a comment\n*.tmp\n", encoding="utf-8")
+        (tmp_path / "empty").write_text("# nothing\n\n", encoding="utf-8")
+
+        rules = IgnoreRules.from_file(tmp_path / ".gitignore")
+
+        assert rules is not None and rules.rule_count == 1
+        assert IgnoreRules.from_file(tmp_path / "empty") is None
+        assert IgnoreRules.from_file(tmp_path / "missing") is None
+
+
+class TestIsIgnored:
+    """Test combining the rules of nested directories."""
+
+    def test_deeper_rules_take_precedence(self) -> None:
+        """Test that a subdirectory's rules override those of its parents."""
+        chain = (("", IgnoreRules(["*.gen.py"])), ("pkg/", IgnoreRules(["!keep.gen.py"])))
+
+        assert is_ignored(chain, "pkg/keep.gen.py", False) is False
+        assert is_ignored(chain, "pkg/other.gen.py", False) is True
+        assert is_ignored(chain, "keep.gen.py", False) is True
+        assert is_ignored(chain, "pkg/main.py", False) is False
+
+    def test_rules_are_relative_to_their_directory(self) -> None:
+        """Test that anchored rules in a subdirectory apply below that directory only."""
+        chain = (("pkg/", IgnoreRules(["/out"])),)
+
+        assert is_ignored(chain, "pkg/out", True) is True
+        assert is_ignored(chain, "pkg/sub/out", True) is False
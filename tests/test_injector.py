@@ -1,8 +1,10 @@
 # tests/test_injector.py
 
 from pathlib import Path
+from unittest.mock import patch
 
-from path_comment.injector import Result, ensure_header
+from path_comment.file_handler import HEAD_READ_SIZE, FileHandler
+from path_comment.injector import Result, delete_header, ensure_header, update_header
 
 
 def test_fix_plain_python(tmp_path: Path) -> None:
@@ -55,3 +57,180 @@ def test_fix_c_file(tmp_path: Path) -> None:
     lines = content.splitlines()
     assert lines[0] == "// src/main.c"
     assert "#include <stdio.h>" in content
+
+
+def _head_reads_only():
+    """Patch FileHandler.read_raw so that full reads fail the test."""
+
+    def read_raw(self, size=-1):
+        assert size == HEAD_READ_SIZE, "full read"
+        return original(self, size)
+
+    original = FileHandler.read_raw
+    return patch.object(FileHandler, "read_raw", read_raw)
+
+
+def test_check_large_file_reads_only_head(tmp_path: Path) -> None:
+    data = tmp_path / "data.json"
+    data.write_bytes(b"// data.json\n" + b'{"k": 1}\n' * 100_000)
+
+    with _head_reads_only():
+        assert ensure_header(data, tmp_path, mode="check") is Result.OK
+        assert delete_header(data, tmp_path, mode="check") is Result.REMOVED
+
+
+def test_check_single_line_file_decided_from_head(tmp_path: Path) -> None:
+    data = tmp_path / "data.json"
+    data.write_bytes(b'{"k": "' + b"x" * 100_000 + b'"}')
+
+    with _head_reads_only():
+        assert ensure_header(data, tmp_path, mode="check") is Result.CHANGED
+        assert delete_header(data, tmp_path, mode="check") is Result.OK
+
+
+def test_check_falls_back_to_full_read_when_head_inconclusive(tmp_path: Path) -> None:
+    script = tmp_path / "run.sh"
+    long_shebang = b"#!/bin/sh " + b"-x " * 5000 + b"\n"
+    script.write_bytes(long_shebang + b"# run.sh\necho hi\n")
+
+    assert ensure_header(script, tmp_path, mode="check") is Result.OK
+    assert delete_header(script, tmp_path, mode="check") is Result.REMOVED
+
+
+def test_fix_large_file_rewrites_whole_file(tmp_path: Path) -> None:
+    data = tmp_path / "data.yaml"
+    body = b"key: value\n" * 100_000
+    data.write_bytes(body)
+
+    assert ensure_header(data, tmp_path, mode="fix") is Result.CHANGED
+    assert data.read_bytes() == b"# data.yaml\n\n" + body
+
+
+def test_fix_leaves_mixed_line_endings_untouched(tmp_path: Path) -> None:
+    target = tmp_path / "mixed.py"
+    body = b"a = 1\r\nb = 2\nc = 3\r\n"
+    target.write_bytes(body)
+
+    assert ensure_header(target, tmp_path, mode="fix") is Result.CHANGED
+    assert target.read_bytes() == b"# mixed.py\r\n\r\n" + body
+    assert ensure_header(target, tmp_path, mode="check") is Result.OK
+
+    assert delete_header(target, tmp_path, mode="fix") is Result.REMOVED
+    assert target.read_bytes() == body
+
+
+def test_fix_keeps_legacy_encoding(tmp_path: Path) -> None:
+    target = tmp_path / "legacy.py"
+    body = "s = 'héllo wørld, ñoël'\n".encode("latin-1") * 20
+    target.write_bytes(body)
+
+    assert ensure_header(target, tmp_path, mode="fix") is Result.CHANGED
+    assert target.read_bytes() == b"# legacy.py\n\n" + body
+
+
+def test_fix_keeps_utf16_encoding(tmp_path: Path) -> None:
+    target = tmp_path / "wide.py"
+    body = "print('hi')\r\nprint('ñoël')\r\n"
+    target.write_bytes(body.encode("utf-16"))
+
+    assert ensure_header(target, tmp_path, mode="fix") is Result.CHANGED
+    assert target.read_bytes() == f"# wide.py\r\n\r\n{body}".encode("utf-16")
+    assert ensure_header(target, tmp_path, mode="check") is Result.OK
+
+
+def test_fix_shebang_replaces_stale_header(tmp_path: Path) -> None:
+    sh = tmp_path / "bin" / "tool"
+    sh.parent.mkdir()
+    sh.write_bytes(b"#!/bin/sh\n# old/tool\necho hi\n")
+
+    assert ensure_header(sh, tmp_path, mode="fix") is Result.CHANGED
+    assert sh.read_bytes() == b"#!/bin/sh\n# bin/tool\necho hi\n"
+
+
+def test_fix_shebang_only_file_without_newline(tmp_path: Path) -> None:
+    sh = tmp_path / "tool.sh"
+    sh.write_bytes(b"#!/bin/sh")
+
+    assert ensure_header(sh, tmp_path, mode="fix") is Result.CHANGED
+    assert sh.read_bytes() == b"#!/bin/sh\n# tool.sh\n"
+
+
+def test_fix_streams_large_files_from_head(tmp_path: Path) -> None:
+    sh = tmp_path / "big.sh"
+    body = b"echo hi\r\n" * 10_000
+    sh.write_bytes(b"#!/bin/sh\r\n# old/big.sh\r\n" + body)
+
+    with patch("path_comment.injector.STREAM_REWRITE_THRESHOLD", 1024), _head_reads_only():
+        assert ensure_header(sh, tmp_path, mode="fix") is Result.CHANGED
+        assert sh.read_bytes() == b"#!/bin/sh\r\n# big.sh\r\n" + body
+
+        assert delete_header(sh, tmp_path, mode="fix") is Result.REMOVED
+        assert sh.read_bytes() == b"#!/bin/sh\r\n" + body
+
+
+def test_fix_streams_large_files_without_shebang(tmp_path: Path) -> None:
+    data = tmp_path / "data.json"
+    body = b'{"k": "' + b"x" * 100_000 + b'"}'
+    data.write_bytes(body)
+
+    with patch("path_comment.injector.STREAM_REWRITE_THRESHOLD", 1024), _head_reads_only():
+        assert ensure_header(data, tmp_path, mode="fix") is Result.CHANGED
+        assert data.read_bytes() == b"// data.json\n\n" + body
+
+        assert delete_header(data, tmp_path, mode="fix") is Result.REMOVED
+        assert data.read_bytes() == body
+
+
+def test_non_ascii_header_is_not_streamed_into_a_file_of_unknown_encoding(
+    tmp_path: Path,
+) -> None:
+    # An ASCII head decodes as UTF-8, but the Latin-1 tail decides the encoding
+    target = tmp_path / "données" / "big.py"
+    target.parent.mkdir()
+    body = b"x = 1\n" * (HEAD_READ_SIZE // 6 + 1) + "s = 'café'\n".encode("latin-1") * 100
+    target.write_bytes(body)
+
+    with patch("path_comment.injector.STREAM_REWRITE_THRESHOLD", 1024):
+        assert ensure_header(target, tmp_path, mode="fix") is Result.CHANGED
+        assert target.read_bytes() == "# données/big.py\n\n".encode("latin-1") + body
+
+        target.write_bytes(b"# old/big.py\n" + body)
+        assert update_header(target, tmp_path, mode="fix") is Result.CHANGED
+        assert target.read_bytes() == "# données/big.py\n".encode("latin-1") + body
+
+
+def test_update_replaces_stale_header_in_place(tmp_path: Path) -> None:
+    target = tmp_path / "pkg" / "new.py"
+    target.parent.mkdir()
+    target.write_bytes(b"# old/name.py\r\nx = 1\r\n")
+
+    assert update_header(target, tmp_path, mode="check") is Result.CHANGED
+    assert update_header(target, tmp_path, mode="fix") is Result.CHANGED
+    assert target.read_bytes() == b"# pkg/new.py\r\nx = 1\r\n"
+    assert update_header(target, tmp_path, mode="fix") is Result.OK
+
+
+def test_update_keeps_shebang_and_skips_files_without_header(tmp_path: Path) -> None:
+    sh = tmp_path / "run.sh"
+    sh.write_bytes(b"#!/bin/sh\n# scripts/run.sh\necho hi\n")
+    plain = tmp_path / "plain.py"
+    plain.write_bytes(b"# just a comment\nx = 1\n")
+
+    assert update_header(sh, tmp_path, mode="fix") is Result.CHANGED
+    assert sh.read_bytes() == b"#!/bin/sh\n# run.sh\necho hi\n"
+    assert update_header(plain, tmp_path, mode="fix") is Result.SKIPPED
+    assert plain.read_bytes() == b"# just a comment\nx = 1\n"
+
+
+def test_resolved_paths_are_not_resolved_or_stat_again(tmp_path: Path) -> None:
+    root = tmp_path.resolve()
+    target = root / "pkg" / "mod.py"
+    target.parent.mkdir()
+    target.write_bytes(b"x = 1\n")
+
+    with patch.object(Path, "resolve", side_effect=AssertionError), patch(
+        "path_comment.detectors.tags_from_path", side_effect=AssertionError
+    ):
+        assert ensure_header(target, root, mode="fix", resolved=True) is Result.CHANGED
+        assert ensure_header(target, root, mode="check", resolved=True) is Result.OK
+    assert target.read_bytes() == b"# pkg/mod.py\n\nx = 1\n"
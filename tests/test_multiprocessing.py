@@ -1,13 +1,21 @@
 # tests/test_multiprocessing.py
 
+import os
 import time
 from pathlib import Path
 from unittest.mock import patch
 
+from path_comment import processor
+from path_comment.cache import ResultCache
+from path_comment.config import Config
+from path_comment.file_handler import Durability, SyncPolicy
 from path_comment.injector import Result
 from path_comment.processor import (
+    ExecutorKind,
     FileProcessor,
+    ProcessingError,
     ProcessingResult,
+    process_files_iter,
     process_files_parallel,
 )
 
@@ -245,6 +253,105 @@ class TestParallelProcessing:
         assert success_count == 50
 
 
+class TestProcessExecutor:
+    """Test processing files in worker processes."""
+
+    def test_process_executor_fixes_files_in_order(self, tmp_path: Path) -> None:
+        """Test that worker processes fix files and results keep the input order."""
+        files = []
+        for i in range(30):
+            file_path = tmp_path / f"test_{i:02d}.py"
+            file_path.write_text(f"print('hello {i}')\n", encoding="utf-8")
+            files.append(file_path)
+        files.append(tmp_path / "missing.py")
+
+        results = process_files_parallel(
+            files, tmp_path, mode="fix", workers=2, executor=ExecutorKind.PROCESS
+        )
+
+        assert [r.file_path for r in results] == files
+        assert all(r.result == Result.CHANGED for r in results[:-1])
+        assert results[-1].result == Result.SKIPPED
+        assert "does not exist" in str(results[-1].error)
+        assert files[7].read_text(encoding="utf-8").startswith("# test_07.py\n")
+
+    def test_process_executor_streams_results(self, tmp_path: Path) -> None:
+        """Test that worker processes can feed the streaming generator."""
+        files = []
+        for i in range(40):
+            file_path = tmp_path / f"test_{i:02d}.py"
+            file_path.write_text(f"print('hello {i}')\n", encoding="utf-8")
+            files.append(file_path)
+
+        results = process_files_iter(
+            iter(files), tmp_path, workers=2, executor=ExecutorKind.PROCESS, ordered=True
+        )
+
+        assert [r.file_path for r in results] == files
+        assert files[33].read_text(encoding="utf-8").startswith("# test_33.py\n")
+
+    def test_process_executor_merges_sync_and_cache_state(self, tmp_path: Path) -> None:
+        """Test that batched writes and cache updates of workers reach the parent."""
+        files = []
+        for i in range(6):
+            file_path = tmp_path / f"test{i}.py"
+            file_path.write_text(f"# test{i}.py\n" if i % 2 else "x = 1\n", encoding="utf-8")
+            os.utime(file_path, (1_000_000_000, 1_000_000_000))
+            files.append(file_path)
+        sync = SyncPolicy(Durability.BATCH)
+        cache = ResultCache.for_run(tmp_path, Config(), "ensure")
+
+        results = process_files_parallel(
+            files,
+            tmp_path,
+            mode="fix",
+            workers=2,
+            sync=sync,
+            cache=cache,
+            executor=ExecutorKind.PROCESS,
+        )
+
+        assert [r.result for r in results] == [Result.CHANGED, Result.OK] * 3
+        seconds, pending = sync.drain()
+        assert seconds > 0
+        assert pending == set()  # flushed by the parent
+        reloaded = ResultCache.for_run(tmp_path, Config(), "ensure")
+        known = [
+            reloaded.is_known_good(entry)
+            for entry in map(reloaded.entry_for, files)
+            if entry is not None
+        ]
+        assert known == [False, True] * 3
+
+    def test_process_chunk_returns_compact_picklable_results(self, tmp_path: Path) -> None:
+        """Test the worker side: results are compact and errors always picklable."""
+        file_path = tmp_path / "test.py"
+        file_path.write_text("print('hello')\n", encoding="utf-8")
+
+        class Unpicklable(Exception):
+            def __reduce__(self):
+                raise TypeError("cannot pickle")
+
+        processor._init_worker(tmp_path, "check", "ensure", None, None)
+        try:
+            with patch(
+                "path_comment.processor.ensure_header",
+                side_effect=[Result.CHANGED, Unpicklable("boom")],
+            ):
+                compact, sync_state, cache_state = processor._process_chunk([file_path, file_path])
+        finally:
+            processor._worker_processor = None
+
+        assert compact[0][:2] == (Result.CHANGED, None)
+        result, error, duration = compact[1]
+        assert duration >= 0
+        assert result == Result.SKIPPED
+        assert isinstance(error, ProcessingError)
+        assert "Unpicklable: boom" in str(error)
+        assert sync_state == (0.0, set())
+        assert cache_state == ({}, set())
+
+
 class TestProcessingResult:
     """Test the ProcessingResult dataclass."""
 
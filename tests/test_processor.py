@@ -1,19 +1,36 @@
 # tests/test_processor.py
 """Tests for the processor module."""
 
+import asyncio
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import AsyncIterator, Iterator, List
 from unittest.mock import Mock, patch
 
 import pytest
 
+from path_comment.cache import ResultCache
+from path_comment.config import Config, Durability
+from path_comment.file_handler import SyncPolicy
 from path_comment.injector import Result
 from path_comment.processor import (
+    AUTO_WORKERS,
+    ExecutorKind,
     FileProcessor,
+    FileTimeoutError,
     ProcessingError,
     ProcessingResult,
+    SlowestFiles,
+    _batches,
+    _process_batch,
+    _WorkerTuner,
     collect_processing_statistics,
     print_processing_summary,
+    process_files_async,
+    process_files_iter,
     process_files_parallel,
 )
 
@@ -66,6 +83,18 @@ class TestFileProcessor:
         processor = FileProcessor(Path(".."))
         assert processor.project_root == tmp_path.resolve()
 
+    @patch("path_comment.processor.ensure_header")
+    def test_process_file_passes_resolved_paths(self, mock_ensure_header, tmp_path: Path) -> None:
+        """Test that resolved_paths tells the injector not to resolve or stat again."""
+        mock_ensure_header.return_value = Result.OK
+        test_file = tmp_path / "test.py"
+
+        FileProcessor(tmp_path, resolved_paths=True).process_file(test_file, mode="check")
+
+        mock_ensure_header.assert_called_once_with(
+            test_file, tmp_path.resolve(), mode="check", sync=None, resolved=True
+        )
+
     @patch("path_comment.processor.ensure_header")
     def test_process_file_ensure_success(self, mock_ensure_header, tmp_path: Path) -> None:
         """Test successful file processing with ensure operation."""
@@ -80,7 +109,9 @@ class TestFileProcessor:
         assert result.file_path == test_file
         assert result.result == Result.CHANGED
         assert result.error is None
-        mock_ensure_header.assert_called_once_with(test_file, tmp_path.resolve(), mode="fix")
+        mock_ensure_header.assert_called_once_with(
+            test_file, tmp_path.resolve(), mode="fix", sync=None, resolved=False
+        )
 
     @patch("path_comment.processor.delete_header")
     def test_process_file_delete_success(self, mock_delete_header, tmp_path: Path) -> None:
@@ -96,7 +127,9 @@ class TestFileProcessor:
         assert result.file_path == test_file
         assert result.result == Result.REMOVED
         assert result.error is None
-        mock_delete_header.assert_called_once_with(test_file, tmp_path.resolve(), mode="fix")
+        mock_delete_header.assert_called_once_with(
+            test_file, tmp_path.resolve(), mode="fix", sync=None, resolved=False
+        )
 
     @patch("path_comment.processor.ensure_header")
     def test_process_file_check_mode(self, mock_ensure_header, tmp_path: Path) -> None:
@@ -110,7 +143,9 @@ class TestFileProcessor:
         result = processor.process_file(test_file, mode="check", operation="ensure")
 
         assert result.result == Result.OK
-        mock_ensure_header.assert_called_once_with(test_file, tmp_path.resolve(), mode="check")
+        mock_ensure_header.assert_called_once_with(
+            test_file, tmp_path.resolve(), mode="check", sync=None, resolved=False
+        )
 
     @patch("path_comment.processor.ensure_header")
     def test_process_file_exception_handling(self, mock_ensure_header, tmp_path: Path) -> None:
@@ -144,6 +179,32 @@ class TestFileProcessor:
         assert result.result == Result.SKIPPED
         assert result.error == test_error
 
+    def test_process_file_skips_known_good_files(self, tmp_path: Path) -> None:
+        """Test that unchanged files recorded as OK are not read again."""
+        test_file = tmp_path / "test.py"
+        test_file.write_text("# test.py\nprint('hello')\n")
+        os.utime(test_file, (1_000_000_000, 1_000_000_000))
+        cache = ResultCache.for_run(tmp_path, Config(), "ensure")
+        processor = FileProcessor(tmp_path, cache=cache)
+
+        assert processor.process_file(test_file, mode="check").result == Result.OK
+        with patch("path_comment.processor.ensure_header") as mock_ensure_header:
+            result = processor.process_file(test_file, mode="check")
+
+        assert result.result == Result.OK
+        mock_ensure_header.assert_not_called()
+
+    def test_process_file_forgets_files_needing_changes(self, tmp_path: Path) -> None:
+        """Test that files that are not OK are never served from the cache."""
+        test_file = tmp_path / "test.py"
+        test_file.write_text("print('hello')\n")
+        os.utime(test_file, (1_000_000_000, 1_000_000_000))
+        cache = ResultCache.for_run(tmp_path, Config(), "ensure")
+        processor = FileProcessor(tmp_path, cache=cache)
+
+        assert processor.process_file(test_file, mode="check").result == Result.CHANGED
+        assert processor.process_file(test_file, mode="check").result == Result.CHANGED
+
 
 class TestProcessFilesParallel:
     """Test the process_files_parallel function."""
@@ -313,6 +374,444 @@ class TestProcessFilesParallel:
             process_files_parallel([test_file], tmp_path)
 
 
+class TestBatches:
+    """Test how files are split into batched work units."""
+
+    @pytest.mark.parametrize(
+        ("total", "workers"), [(1, 1), (7, 3), (100, 8), (10_000, 4), (500_000, 32)]
+    )
+    def test_batches_cover_all_files_once(self, total: int, workers: int) -> None:
+        """Test that the batches are contiguous, bounded and cover every index."""
+        batches = _batches(total, workers)
+
+        assert batches[0][0] == 0
+        assert batches[-1][1] == total
+        assert all(prev[1] == nxt[0] for prev, nxt in zip(batches, batches[1:]))
+        assert all(0 < stop - start <= 256 for start, stop in batches)
+
+    def test_batches_amortize_scheduling_for_large_runs(self) -> None:
+        """Test that huge runs use far fewer tasks than files, small ones stay balanced."""
+        assert len(_batches(500_000, 8)) < 500_000 // 200
+        assert len(_batches(40, 4)) >= 4 * 4
+
+    def test_thread_pool_gets_one_task_per_batch(self, tmp_path: Path) -> None:
+        """Test that thread workers receive batches rather than single files."""
+        files = [tmp_path / f"f{i}.py" for i in range(1000)]
+        processor = Mock()
+        processor.process_file.side_effect = lambda f, mode, operation: ProcessingResult(
+            f, Result.OK
+        )
+
+        with patch("path_comment.processor.FileProcessor", return_value=processor), patch(
+            "path_comment.processor._process_batch", wraps=_process_batch
+        ) as batch:
+            results = process_files_parallel(files, tmp_path, workers=2)
+
+        assert batch.call_count == len(_batches(1000, 2)) < 1000
+        assert [r.file_path for r in results] == files
+
+
+class TestTimeouts:
+    """Test per-file durations, time budgets and the slowest files."""
+
+    def test_duration_is_recorded(self, tmp_path: Path) -> None:
+        """Test that every result carries the time spent on its file."""
+        file_path = tmp_path / "test.py"
+        file_path.write_text("print('hello')\n")
+
+        def slow_ensure_header(*args, **kwargs) -> Result:
+            time.sleep(0.02)
+            return Result.OK
+
+        with patch("path_comment.processor.ensure_header", side_effect=slow_ensure_header):
+            result = FileProcessor(tmp_path).process_file(file_path)
+
+        assert result.duration >= 0.02
+
+    def test_stuck_file_is_abandoned(self, tmp_path: Path) -> None:
+        """Test that a file over its budget times out without holding up the rest."""
+        files = [tmp_path / f"f{i}.py" for i in range(6)]
+        for file_path in files:
+            file_path.write_text("print('hello')\n")
+        release = threading.Event()
+
+        def ensure_header(file_path: Path, *args, **kwargs) -> Result:
+            if file_path.name == "f1.py":
+                release.wait(5)
+            return Result.CHANGED
+
+        with patch("path_comment.processor.ensure_header", side_effect=ensure_header), patch(
+            "path_comment.processor._ABANDONED_GRACE_SECONDS", 0
+        ):
+            try:
+                start = time.perf_counter()
+                results = process_files_parallel(files, tmp_path, workers=1, timeout=0.1)
+                elapsed = time.perf_counter() - start
+            finally:
+                release.set()
+
+        assert elapsed < 2
+        assert results[1].result == Result.SKIPPED
+        assert isinstance(results[1].error, FileTimeoutError)
+        assert results[1].duration >= 0.1
+        others = results[:1] + results[2:]
+        assert all(r.result == Result.CHANGED and r.error is None for r in others)
+
+    def test_abandoned_file_finishes_before_the_final_sync(self, tmp_path: Path) -> None:
+        """Test that a run waits briefly for a timed-out file before syncing."""
+        file_path = tmp_path / "test.py"
+        file_path.write_text("print('hello')\n")
+        events: List[str] = []
+        sync = Mock()
+        sync.flush.side_effect = lambda: events.append("flush")
+
+        def ensure_header(*args, **kwargs) -> Result:
+            time.sleep(0.3)
+            events.append("written")
+            return Result.CHANGED
+
+        with patch("path_comment.processor.ensure_header", side_effect=ensure_header):
+            results = process_files_parallel(
+                [file_path], tmp_path, workers=1, timeout=0.05, sync=sync
+            )
+
+        assert isinstance(results[0].error, FileTimeoutError)
+        assert events == ["written", "flush"]
+
+    def test_errors_pass_through_timeout(self, tmp_path: Path) -> None:
+        """Test that errors raised within the budget are reported as usual."""
+        file_path = tmp_path / "test.py"
+        file_path.write_text("print('hello')\n")
+
+        with patch("path_comment.processor.ensure_header", side_effect=OSError("disk")):
+            result = FileProcessor(tmp_path, timeout=1).process_file(file_path)
+
+        assert result.result == Result.SKIPPED
+        assert isinstance(result.error, OSError)
+
+    def test_slowest_files_keeps_the_slowest(self) -> None:
+        """Test that only the N slowest results are kept, slowest first."""
+        slowest = SlowestFiles(3)
+        for i, duration in enumerate([0.5, 0.1, 2.0, 0.3, 1.0, 0.2]):
+            slowest.add(ProcessingResult(Path(f"f{i}.py"), Result.OK, duration=duration))
+
+        assert [r.duration for r in slowest.results()] == [2.0, 1.0, 0.5]
+        assert SlowestFiles(0).results() == []
+
+
+class TestProcessFilesAsync:
+    """Test the asyncio processing API."""
+
+    @staticmethod
+    def _collect(*args, **kwargs) -> List[ProcessingResult]:
+        async def consume() -> List[ProcessingResult]:
+            return [result async for result in process_files_async(*args, **kwargs)]
+
+        return asyncio.run(consume())
+
+    def test_processes_async_iterable(self, tmp_path: Path) -> None:
+        """Test that paths from an async iterable are all processed."""
+        files = [tmp_path / f"f{i}.py" for i in range(5)]
+        for file_path in files:
+            file_path.write_text("print('hello')\n")
+
+        async def paths() -> AsyncIterator[Path]:
+            for file_path in files:
+                await asyncio.sleep(0)
+                yield file_path
+
+        results = self._collect(paths(), tmp_path)
+
+        assert sorted(r.file_path for r in results) == sorted(files)
+        assert all(r.result == Result.CHANGED for r in results)
+        assert files[0].read_text().startswith("# f0.py")
+
+    def test_concurrency_is_bounded(self, tmp_path: Path) -> None:
+        """Test that no more files than the concurrency limit are in flight."""
+        in_flight = peak = 0
+        lock = threading.Lock()
+
+        def process_file(f: Path, mode: str, operation: str) -> ProcessingResult:
+            nonlocal in_flight, peak
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+            time.sleep(0.005)
+            with lock:
+                in_flight -= 1
+            return ProcessingResult(f, Result.OK)
+
+        processor = Mock()
+        processor.process_file.side_effect = process_file
+        files = [tmp_path / f"f{i}.py" for i in range(20)]
+
+        with ThreadPoolExecutor(max_workers=8) as pool, patch(
+            "path_comment.processor.FileProcessor", return_value=processor
+        ):
+            results = self._collect(files, tmp_path, concurrency=2, executor=pool)
+
+        assert len(results) == 20
+        assert peak == 2
+
+    def test_shared_executor_serves_concurrent_callers(self, tmp_path: Path) -> None:
+        """Test that several concurrent calls can share one executor."""
+        files = [tmp_path / f"f{i}.py" for i in range(6)]
+        for file_path in files:
+            file_path.write_text("# placeholder\n")
+
+        async def run_all(pool: ThreadPoolExecutor) -> List[List[ProcessingResult]]:
+            async def one(chunk: List[Path]) -> List[ProcessingResult]:
+                return [
+                    r async for r in process_files_async(chunk, tmp_path, "check", executor=pool)
+                ]
+
+            return await asyncio.gather(one(files[:3]), one(files[3:]))
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            first, second = asyncio.run(run_all(pool))
+
+        assert {r.file_path for r in first} == set(files[:3])
+        assert {r.file_path for r in second} == set(files[3:])
+
+    def test_failing_input_propagates(self, tmp_path: Path) -> None:
+        """Test that an error raised by the path source reaches the caller."""
+
+        async def paths() -> AsyncIterator[Path]:
+            yield tmp_path / "a.py"
+            raise RuntimeError("source failed")
+
+        with pytest.raises(RuntimeError, match="source failed"):
+            self._collect(paths(), tmp_path, "check")
+
+    def test_sync_and_cache_finished(self, tmp_path: Path) -> None:
+        """Test that the sync policy is flushed and the cache saved at the end."""
+        sync, cache = Mock(), Mock()
+        cache.entry_for.return_value = None
+
+        assert self._collect([], tmp_path, sync=sync, cache=cache) == []
+
+        sync.flush.assert_called_once_with()
+        cache.save.assert_called_once_with()
+
+    def test_early_exit_finishes_files_in_flight_then_flushes(self, tmp_path: Path) -> None:
+        """Test that stopping early waits for started files, skips the rest and still flushes."""
+        events: List[str] = []
+
+        def process_file(f: Path, mode: str, operation: str) -> ProcessingResult:
+            events.append(f"start {f.name}")
+            time.sleep(0.01 if f.name == "f0.py" else 0.05)
+            events.append(f"end {f.name}")
+            return ProcessingResult(f, Result.OK)
+
+        processor = Mock()
+        processor.process_file.side_effect = process_file
+        sync, cache = Mock(), Mock()
+        sync.flush.side_effect = lambda: events.append("flush")
+        files = [tmp_path / f"f{i}.py" for i in range(100)]
+
+        async def first_result(pool: ThreadPoolExecutor) -> ProcessingResult:
+            stream = process_files_async(
+                files, tmp_path, concurrency=4, executor=pool, sync=sync, cache=cache
+            )
+            result = await stream.__anext__()
+            await stream.aclose()
+            return result
+
+        with ThreadPoolExecutor(max_workers=2) as pool, patch(
+            "path_comment.processor.FileProcessor", return_value=processor
+        ):
+            first = asyncio.run(first_result(pool))
+
+        assert first.file_path == files[0]
+        assert events[-1] == "flush"
+        started = [e for e in events if e.startswith("start")]
+        assert len(started) < 4 + 2
+        assert len([e for e in events if e.startswith("end")]) == len(started)
+        cache.save.assert_called_once_with()
+
+
+class TestAutotune:
+    """Test the inline fast path and worker autotuning."""
+
+    def test_small_run_is_processed_inline(self, tmp_path: Path) -> None:
+        """Test that a handful of files is processed without starting a pool."""
+        files = [tmp_path / f"f{i}.py" for i in range(3)]
+        for file_path in files:
+            file_path.write_text("print('hello')\n")
+
+        with patch("path_comment.processor.ThreadPoolExecutor") as pool:
+            results = process_files_parallel(files, tmp_path, workers=AUTO_WORKERS)
+
+        pool.assert_not_called()
+        assert [r.result for r in results] == [Result.CHANGED] * 3
+
+    def test_large_run_uses_autotuned_pool(self, tmp_path: Path) -> None:
+        """Test that larger runs are processed in order on the tuned pool."""
+        files = [tmp_path / f"f{i}.py" for i in range(200)]
+        processor = Mock()
+        processor.process_file.side_effect = lambda f, mode, operation: ProcessingResult(
+            f, Result.OK
+        )
+
+        with patch("path_comment.processor.FileProcessor", return_value=processor), patch(
+            "path_comment.processor._PROBE_SECONDS", 0.0
+        ):
+            results = process_files_parallel(files, tmp_path, workers=AUTO_WORKERS)
+
+        assert [r.file_path for r in results] == files
+
+    def test_invalid_workers_value(self, tmp_path: Path) -> None:
+        """Test that unknown worker settings are rejected."""
+        with pytest.raises(ValueError, match="positive integer"):
+            process_files_parallel([tmp_path / "a.py"], tmp_path, workers="many")
+
+    def test_tuner_grows_while_throughput_improves(self) -> None:
+        """Test that the thread count doubles until throughput levels off."""
+        tuner = _WorkerTuner(4, 64)
+        rates = {4: 100, 8: 190, 16: 350, 32: 360}
+
+        while not tuner.settled:
+            tuner.observe(rates[tuner.workers], 1.0)
+
+        assert tuner.workers == 16
+
+    def test_tuner_shrinks_when_growing_does_not_help(self) -> None:
+        """Test that the tuner probes fewer threads if more threads are slower."""
+        tuner = _WorkerTuner(8, 64)
+        rates = {8: 100, 16: 80, 4: 130, 2: 90}
+
+        while not tuner.settled:
+            tuner.observe(rates[tuner.workers], 1.0)
+
+        assert tuner.workers == 4
+
+    def test_tuner_respects_limit(self) -> None:
+        """Test that the tuner never exceeds its thread limit."""
+        tuner = _WorkerTuner(8, 12)
+
+        tuner.observe(100, 1.0)
+
+        assert tuner.settled
+        assert tuner.workers == 8
+
+
+class TestProcessFilesIter:
+    """Test the streaming result generator."""
+
+    @staticmethod
+    def _mock_processor(delays: dict) -> Mock:
+        def process_file(f: Path, mode: str, operation: str) -> ProcessingResult:
+            time.sleep(delays.get(f.name, 0))
+            return ProcessingResult(f, Result.OK)
+
+        processor = Mock()
+        processor.process_file.side_effect = process_file
+        return processor
+
+    def test_yields_every_file(self, tmp_path: Path) -> None:
+        """Test that all files of a generator input are processed."""
+        files = [tmp_path / f"f{i:03d}.py" for i in range(100)]
+        for file_path in files:
+            file_path.write_text("print('hello')\n")
+
+        results = list(process_files_iter((f for f in files), tmp_path, workers=4))
+
+        assert sorted(r.file_path for r in results) == files
+        assert all(r.result == Result.CHANGED for r in results)
+
+    def test_ordered_results_follow_input(self, tmp_path: Path) -> None:
+        """Test that a slow first batch holds back later results when ordered."""
+        files = [tmp_path / f"f{i:03d}.py" for i in range(100)]
+        processor = self._mock_processor({"f000.py": 0.05})
+
+        with patch("path_comment.processor.FileProcessor", return_value=processor):
+            unordered = list(process_files_iter(files, tmp_path, workers=4))
+            ordered = list(process_files_iter(files, tmp_path, workers=4, ordered=True))
+
+        assert [r.file_path for r in ordered] == files
+        assert [r.file_path for r in unordered] != files
+        assert sorted(r.file_path for r in unordered) == files
+
+    def test_input_is_consumed_lazily(self, tmp_path: Path) -> None:
+        """Test that only a bounded number of paths is read ahead."""
+        consumed = 0
+
+        def paths() -> Iterator[Path]:
+            nonlocal consumed
+            for i in range(100_000):
+                consumed += 1
+                yield tmp_path / f"f{i}.py"
+
+        processor = self._mock_processor({})
+        with patch("path_comment.processor.FileProcessor", return_value=processor):
+            stream = process_files_iter(paths(), tmp_path, workers=2, ordered=True)
+            first = next(stream)
+            stream.close()
+
+        assert first.file_path == tmp_path / "f0.py"
+        assert consumed <= 2 * 2 * 32 + 1
+
+    def test_sync_and_cache_finished(self, tmp_path: Path) -> None:
+        """Test that the sync policy is flushed and the cache saved at the end."""
+        sync, cache = Mock(), Mock()
+
+        assert list(process_files_iter([], tmp_path, sync=sync, cache=cache)) == []
+
+        sync.flush.assert_called_once_with()
+        cache.save.assert_called_once_with()
+
+    def test_close_stops_outstanding_work(self, tmp_path: Path) -> None:
+        """Test that closing the stream early cancels work and still flushes."""
+        files = [tmp_path / f"f{i}.py" for i in range(2000)]
+        processor = self._mock_processor({f.name: 0.001 for f in files})
+        processor.sync = sync = Mock()
+
+        with patch("path_comment.processor.FileProcessor", return_value=processor):
+            stream = process_files_iter(files, tmp_path, workers=2, sync=sync)
+            next(stream)
+            stream.close()
+
+        assert processor.process_file.call_count < 2 * 2 * 32 + 2
+        sync.flush.assert_called_once_with()
+
+    def test_close_keeps_state_of_started_worker_processes(self, tmp_path: Path) -> None:
+        """Test that batches still running in worker processes are synced after a close."""
+        files = [tmp_path / f"f{i:04d}.py" for i in range(1000)]
+        for file_path in files:
+            file_path.write_text("print('hello')\n")
+        sync = SyncPolicy(Durability.BATCH)
+        pending: List[int] = []
+        flush = sync.flush
+
+        def record_pending() -> None:
+            pending.append(len(sync._written))
+            flush()
+
+        with patch.object(sync, "flush", side_effect=record_pending):
+            stream = process_files_iter(
+                files, tmp_path, workers=2, sync=sync, executor=ExecutorKind.PROCESS
+            )
+            next(stream)
+            stream.close()
+
+        rewritten = [f for f in files if f.read_text().startswith("# ")]
+        assert len(rewritten) < len(files)
+        assert pending == [len(rewritten)]
+
+    def test_auto_workers_processes_small_input_inline(self, tmp_path: Path) -> None:
+        """Test that a short list is processed without a pool in auto mode."""
+        files = [tmp_path / "a.py", tmp_path / "b.py"]
+        processor = self._mock_processor({})
+
+        with patch("path_comment.processor.FileProcessor", return_value=processor), patch(
+            "path_comment.processor.ThreadPoolExecutor"
+        ) as pool:
+            results = list(process_files_iter(files, tmp_path, workers=AUTO_WORKERS))
+
+        pool.assert_not_called()
+        assert [r.file_path for r in results] == files
+
+
 class TestCollectProcessingStatistics:
     """Test the collect_processing_statistics function."""
 
@@ -451,6 +950,16 @@ class TestPrintProcessingSummary:
         # Verify all result types are handled
         assert mock_console.print.call_count >= 9
 
+    @patch("path_comment.processor.console")
+    def test_print_summary_with_sync_time(self, mock_console) -> None:
+        """Test that time spent syncing is reported when tracked."""
+        results = [ProcessingResult(Path("file1.py"), Result.CHANGED)]
+
+        print_processing_summary(results, "fix", sync_seconds=0.25)
+
+        printed = [str(c.args[0]) for c in mock_console.print.call_args_list if c.args]
+        assert "Time syncing to disk: 0.250s" in printed
+
     @patch("path_comment.processor.console")
     def test_print_summary_empty_results(self, mock_console) -> None:
         """Test summary printing with empty results."""
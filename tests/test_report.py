@@ -0,0 +1,110 @@
+# tests/test_report.py
+"""Test writing, reading and merging run reports."""
+
+from pathlib import Path
+
+import pytest
+
+from path_comment.injector import Result
+from path_comment.processor import ProcessingResult, collect_processing_statistics
+from path_comment.report import (
+    ReportError,
+    RunReport,
+    merge_reports,
+    read_report,
+    write_report,
+)
+
+
+def _report(tmp_path: Path, shard, results, mode: str = "check") -> RunReport:
+    report = RunReport(mode, "ensure", shard, collect_processing_statistics(results))
+    for result in results:
+        report.add(result, tmp_path)
+    return report
+
+
+class TestRunReport:
+    """Test recording results and the report file format."""
+
+    def test_only_files_needing_attention_are_recorded(self, tmp_path: Path) -> None:
+        """Test that OK files are counted but not listed."""
+        report = _report(
+            tmp_path,
+            None,
+            [
+                ProcessingResult(tmp_path / "ok.py", Result.OK),
+                ProcessingResult(tmp_path / "src" / "new.py", Result.CHANGED),
+                ProcessingResult(tmp_path / "bad.py", Result.SKIPPED, ValueError("boom")),
+            ],
+        )
+
+        assert report.stats["total"] == 3
+        assert [(f.path, f.result, f.error) for f in report.files] == [
+            ("src/new.py", "CHANGED", None),
+            ("bad.py", "SKIPPED", "boom"),
+        ]
+        assert report.failed
+
+    def test_round_trip(self, tmp_path: Path) -> None:
+        """Test that a written report reads back unchanged."""
+        report = _report(
+            tmp_path, (2, 3), [ProcessingResult(tmp_path / "a.py", Result.CHANGED)], "fix"
+        )
+        path = tmp_path / "report.json"
+
+        write_report(report, path)
+
+        assert read_report(path) == report
+        assert not report.failed
+
+    def test_invalid_report(self, tmp_path: Path) -> None:
+        """Test that unreadable or malformed reports raise ReportError."""
+        path = tmp_path / "report.json"
+        path.write_text('{"format": 1}', encoding="utf-8")
+
+        with pytest.raises(ReportError, match="not a valid report"):
+            read_report(path)
+        with pytest.raises(ReportError, match="Failed to read"):
+            read_report(tmp_path / "missing.json")
+
+
+class TestMergeReports:
+    """Test combining the reports of sharded runs."""
+
+    def test_merge_sums_shards(self, tmp_path: Path) -> None:
+        """Test that statistics are summed and files combined in path order."""
+        first = _report(tmp_path, (1, 2), [ProcessingResult(tmp_path / "b.py", Result.CHANGED)])
+        second = _report(
+            tmp_path,
+            (2, 2),
+            [
+                ProcessingResult(tmp_path / "a.py", Result.CHANGED),
+                ProcessingResult(tmp_path / "c.py", Result.OK),
+            ],
+        )
+
+        merged = merge_reports([second, first])
+
+        assert merged.shard is None
+        assert merged.stats["total"] == 3
+        assert merged.stats["changed"] == 2
+        assert [f.path for f in merged.files] == ["a.py", "b.py"]
+        assert merged.failed
+
+    def test_missing_and_duplicate_shards_are_rejected(self, tmp_path: Path) -> None:
+        """Test that merging an incomplete set of shards fails."""
+        one, three = _report(tmp_path, (1, 3), []), _report(tmp_path, (3, 3), [])
+
+        with pytest.raises(ReportError, match="Missing shard reports: 2/3"):
+            merge_reports([one, three])
+        with pytest.raises(ReportError, match="more than once"):
+            merge_reports([one, one, _report(tmp_path, (2, 3), []), three])
+        with pytest.raises(ReportError, match="differently sharded"):
+            merge_reports([one, _report(tmp_path, (2, 2), [])])
+
+    def test_mismatched_runs_are_rejected(self, tmp_path: Path) -> None:
+        """Test that reports of different modes cannot be merged."""
+        with pytest.raises(ReportError, match="Cannot merge"):
+            merge_reports([_report(tmp_path, None, []), _report(tmp_path, None, [], "fix")])
+        with pytest.raises(ReportError, match="No reports"):
+            merge_reports([])